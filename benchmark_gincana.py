@@ -0,0 +1,1092 @@
+import argparse
+import contextlib
+import multiprocessing
+import os
+import resource
+import shutil
+import tempfile
+import threading
+import time
+import tracemalloc
+import types
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+import gincana_banco
+import gincana_calculos
+import gincana_dados
+import gincana_graficos
+import gincana_sinteticos
+from gincana_dados import ABAS_PLANILHA, FontePlanilha
+from tests.etapas import etapas_caminho_dados
+from tests.planilhas import PLANILHA_LOCAL, planilha_ampliada, planilha_sintetica, servidor_local
+
+APP_DASHBOARD = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gincana_bem.py')
+
+
+def _cronometrar(funcao, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    return (time.perf_counter() - inicio) / repeticoes
+
+
+# Compara a leitura antiga (três read_excel direto da URL) com a FontePlanilha
+def bench_download(repeticoes):
+    with servidor_local() as (servidor, url):
+        def leitura_antiga():
+            for aba in ABAS_PLANILHA:
+                pd.read_excel(url, sheet_name=aba)
+
+        tempo_antigo = _cronometrar(leitura_antiga, repeticoes)
+        requisicoes_antigas, bytes_antigos = servidor.requisicoes, servidor.bytes_enviados
+
+        fonte = FontePlanilha(url)
+        tempo_frio = _cronometrar(fonte.ler_abas, 1)
+        tempo_quente = _cronometrar(fonte.ler_abas, repeticoes)
+
+    print(f'três read_excel por carga:   {tempo_antigo * 1000:8.1f} ms/carga '
+          f'({requisicoes_antigas} requisições, {bytes_antigos:,} bytes)')
+    print(f'FontePlanilha (fria):        {tempo_frio * 1000:8.1f} ms')
+    print(f'FontePlanilha (304):         {tempo_quente * 1000:8.1f} ms/carga')
+    estatisticas = fonte.estatisticas
+    print(f'  requisições={estatisticas.requisicoes} downloads={estatisticas.downloads} '
+          f'304={estatisticas.nao_modificados} bytes={estatisticas.bytes_transferidos:,}')
+
+
+# Tempo de partida: parse completo do xlsx x leitura do snapshot Arrow
+def bench_snapshot(repeticoes, linhas=100_000):
+    caminho = planilha_ampliada(linhas)
+    with tempfile.TemporaryDirectory() as diretorio:
+        def carga_fria():
+            fonte = FontePlanilha(caminho)
+            abas = fonte.ler_abas()
+            gincana_dados.limpar_dados(*(abas[aba] for aba in ABAS_PLANILHA))
+
+        def carga_snapshot():
+            assert gincana_dados.carregar_planilha(FontePlanilha(caminho), diretorio).do_snapshot
+
+        tempo_xlsx = _cronometrar(carga_fria, 1)
+        gincana_dados.carregar_planilha(FontePlanilha(caminho), diretorio)
+        tempo_snapshot = _cronometrar(carga_snapshot, repeticoes)
+
+    print(f'{linhas:,} doações')
+    print(f'parse do xlsx + limpeza:     {tempo_xlsx * 1000:8.1f} ms')
+    print(f'snapshot Arrow (mmap):       {tempo_snapshot * 1000:8.1f} ms '
+          f'({tempo_xlsx / tempo_snapshot:,.0f}x mais rápido)')
+
+
+# Caminho antigo da limpeza (Series.apply célula a célula), mantido só para comparação
+def _limpar_com_apply(doacoes):
+    for col in gincana_dados.COLUNAS_NUMERICAS:
+        if col in doacoes.columns:
+            doacoes[col] = doacoes[col].apply(lambda x:
+                float(str(x).replace('=G', '').replace('*H', '').split('*')[0])
+                if isinstance(x, str) and '=' in str(x)
+                else x
+            )
+            doacoes[col] = pd.to_numeric(doacoes[col], errors='coerce').fillna(0)
+
+
+# Aba de doações como vem de uma planilha sem valores em cache: Pontos_Total
+# e Total_Geral como texto de fórmula, quantidades misturando número e texto
+def doacoes_com_formulas(linhas):
+    linha_excel = pd.RangeIndex(2, linhas + 2).astype(str)
+    quantidades = np.random.default_rng(42).integers(1, 50, linhas)
+    return pd.DataFrame({
+        'SPRINT': '1ºSPRINT',
+        'Data': '2025-10-27',
+        'Nome': 'Participante',
+        'Grupo': 'VIRTUX',
+        'Categoria': 'Brinquedos',
+        'Tipo_Item': 'Novo',
+        'Quantidade': pd.Series(quantidades, dtype=object).where(quantidades % 3 > 0, quantidades.astype(str)),
+        'Pontos_Unit': 5,
+        'Pontos_Total': '=G' + linha_excel + '*H' + linha_excel,
+        'Bonus': None,
+        'Total_Geral': '=I' + linha_excel + '+J' + linha_excel,
+        'Observações': '',
+    })
+
+
+# O caminho antigo quebra em =I2+J2 (só entende o formato =G*H), então ele é
+# medido com Total_Geral no formato que consegue processar
+def bench_limpeza(repeticoes, escalas=(10_000, 100_000, 1_000_000)):
+    for linhas in escalas:
+        base = doacoes_com_formulas(linhas)
+        base_apply = base.assign(Total_Geral=base['Pontos_Total'])
+        tempo_apply = _cronometrar(lambda: _limpar_com_apply(base_apply.copy()), 1)
+        relatorios = []
+        tempo_vetorizado = _cronometrar(
+            lambda: relatorios.append(gincana_dados.limpar_colunas_numericas(base.copy())), 1
+        )
+        relatorio = relatorios[-1]
+        print(f'{linhas:>9,} linhas: apply {linhas / tempo_apply:>12,.0f} linhas/s | '
+              f'vetorizado {linhas / tempo_vetorizado:>12,.0f} linhas/s '
+              f'({tempo_apply / tempo_vetorizado:,.1f}x) | '
+              f'convertidas={relatorio.total_convertidas:,} inválidas={relatorio.total_invalidos:,}')
+
+
+# Participantes e doações sintéticos (já limpos) para medir as agregações
+def dados_sinteticos(n_participantes, n_doacoes, semente=42):
+    rng = np.random.default_rng(semente)
+    grupos = np.array(['PACE DO BEM', 'MOTIVADOS NETSUPRE', 'VIRTUX'])
+    nomes = np.array([f'Participante {i:05d}' for i in range(n_participantes)])
+    participantes = pd.DataFrame({'Nome': nomes, 'Grupo': grupos[rng.integers(0, len(grupos), n_participantes)]})
+
+    quem = rng.integers(0, n_participantes, n_doacoes)
+    quantidade = rng.integers(1, 10, n_doacoes).astype('float64')
+    pontos_unit = rng.choice([2.0, 3.0, 4.0, 5.0, 10.0], n_doacoes)
+    datas = np.datetime64('2025-10-14') + rng.integers(0, 66, n_doacoes).astype('timedelta64[D]')
+    doacoes = pd.DataFrame({
+        'SPRINT': rng.choice(['1ºSPRINT', '2ºSPRINT', '3ºSPRINT'], n_doacoes),
+        'Data': datas.astype(str),
+        'Nome': nomes[quem],
+        'Grupo': participantes['Grupo'].to_numpy()[quem],
+        'Categoria': rng.choice(['Brinquedos', 'Roupas', 'Material Escolar', 'Alimentos', 'Higiene'], n_doacoes),
+        'Tipo_Item': rng.choice(['Novo', 'Usado bom estado', 'Peça de roupa', 'Kg solto', 'Cesta básica'], n_doacoes),
+        'Quantidade': quantidade,
+        'Pontos_Unit': pontos_unit,
+        'Total_Geral': quantidade * pontos_unit,
+    })
+    return participantes, doacoes
+
+
+# Ranking antigo da aba Individual: um filtro booleano por participante
+def _ranking_com_loop(participantes, doacoes):
+    ranking_completo = []
+    for _, participante in participantes.iterrows():
+        doacoes_participante = doacoes[doacoes['Nome'] == participante['Nome']]
+        ranking_completo.append({
+            'Nome': participante['Nome'],
+            'Grupo': participante['Grupo'],
+            'Total_Pontos': doacoes_participante['Total_Geral'].sum(),
+            'Total_Doacoes': doacoes_participante['Quantidade'].sum(),
+        })
+    ranking = pd.DataFrame(ranking_completo).sort_values(['Total_Pontos', 'Nome'], ascending=[False, True])
+    ranking['Posição'] = range(1, len(ranking) + 1)
+    return ranking
+
+
+def bench_ranking(repeticoes, n_participantes=5_000, n_doacoes=500_000):
+    participantes, doacoes = dados_sinteticos(n_participantes, n_doacoes)
+    tempo_loop = _cronometrar(lambda: _ranking_com_loop(participantes, doacoes), 1)
+    tempo_groupby = _cronometrar(lambda: gincana_calculos.calcular_ranking(participantes, doacoes), repeticoes)
+    print(f'{n_participantes:,} participantes x {n_doacoes:,} doações')
+    print(f'loop iterrows:               {tempo_loop * 1000:10.1f} ms')
+    print(f'calcular_ranking (groupby):  {tempo_groupby * 1000:10.1f} ms ({tempo_loop / tempo_groupby:,.0f}x)')
+
+
+# Agregados que uma interação com os filtros recalcula, a partir das doações brutas
+def _agregados_brutos(participantes, doacoes, grupo, sprint):
+    filtradas = doacoes.copy()
+    filtradas = filtradas[filtradas['Grupo'] == grupo]
+    filtradas = filtradas[filtradas['SPRINT'] == sprint]
+    for dimensao in ('Grupo', 'SPRINT', 'Categoria', 'Nome'):
+        filtradas.groupby(dimensao)['Total_Geral'].sum()
+    _ranking_com_loop(participantes.head(50), filtradas)
+
+
+def _agregados_cubo(participantes, cubo, grupo, sprint):
+    fatia = gincana_calculos.fatiar_cubo(cubo, grupo, sprint)
+    for dimensao in ('Grupo', 'SPRINT', 'Categoria', 'Nome'):
+        gincana_calculos.totais_por(fatia, dimensao)
+    gincana_calculos.calcular_ranking(participantes.head(50), fatia)
+
+
+# Latência de uma interação (troca de filtro) conforme o log de doações cresce
+def bench_cubo(repeticoes, escalas=(10_000, 100_000, 1_000_000)):
+    for linhas in escalas:
+        participantes, doacoes = dados_sinteticos(500, linhas)
+        tempo_montagem = _cronometrar(lambda: gincana_calculos.montar_cubo(doacoes), 1)
+        cubo = gincana_calculos.montar_cubo(doacoes)
+        tempo_bruto = _cronometrar(lambda: _agregados_brutos(participantes, doacoes, 'VIRTUX', '2ºSPRINT'), repeticoes)
+        tempo_cubo = _cronometrar(lambda: _agregados_cubo(participantes, cubo, 'VIRTUX', '2ºSPRINT'), repeticoes)
+        print(f'{linhas:>9,} doações: interação bruta {tempo_bruto * 1000:8.1f} ms | '
+              f'via cubo {tempo_cubo * 1000:6.1f} ms ({len(cubo):,} células, montado em {tempo_montagem * 1000:.0f} ms)')
+
+
+# Filtro antigo da sidebar: cópia do frame inteiro seguida de máscaras encadeadas
+def _filtro_com_copia(doacoes, grupo, sprint):
+    filtradas = doacoes.copy()
+    if grupo != 'Todos':
+        filtradas = filtradas[filtradas['Grupo'] == grupo]
+    if sprint != 'Todos':
+        filtradas = filtradas[filtradas['SPRINT'] == sprint]
+    return filtradas
+
+
+def _mb(n_bytes):
+    return n_bytes / 1024 ** 2
+
+
+# Memória que cada sessão retém com o resultado do filtro, antes (cópia com
+# colunas de texto) e depois (posições sobre colunas categóricas)
+def bench_filtro(repeticoes, linhas=1_000_000):
+    participantes, doacoes = dados_sinteticos(5_000, linhas)
+    categorico = doacoes.copy()
+    for col in gincana_dados.COLUNAS_CATEGORICAS:
+        if col in categorico.columns:
+            categorico[col] = categorico[col].astype('category')
+
+    print(f'{linhas:,} doações: frame texto {_mb(doacoes.memory_usage(deep=True).sum()):.1f} MB | '
+          f'frame categórico {_mb(categorico.memory_usage(deep=True).sum()):.1f} MB')
+    for grupo, sprint in (('Todos', 'Todos'), ('VIRTUX', 'Todos'), ('VIRTUX', '2ºSPRINT')):
+        antes = _filtro_com_copia(doacoes, grupo, sprint)
+        tempo_antes = _cronometrar(lambda: _filtro_com_copia(doacoes, grupo, sprint), repeticoes)
+        posicoes = gincana_calculos.posicoes_filtradas(categorico, grupo, sprint)
+        tempo_depois = _cronometrar(lambda: gincana_calculos.posicoes_filtradas(categorico, grupo, sprint), repeticoes)
+        memoria_depois = 0 if posicoes is None else posicoes.nbytes
+        print(f'  {grupo:>7} / {sprint:<8}: cópia {_mb(antes.memory_usage(deep=True).sum()):7.1f} MB '
+              f'em {tempo_antes * 1000:6.1f} ms | posições {_mb(memoria_depois):5.1f} MB '
+              f'em {tempo_depois * 1000:5.1f} ms')
+
+
+# Memória por aba antes e depois do schema compacto (categóricos + inteiros reduzidos)
+def bench_schema(repeticoes, linhas=1_000_000):
+    participantes, doacoes = dados_sinteticos(5_000, linhas)
+    categorias = pd.read_excel(PLANILHA_LOCAL, sheet_name='categorias')
+    tempo = _cronometrar(lambda: gincana_dados.aplicar_schema(
+        participantes.copy(), categorias.copy(), doacoes.copy()
+    ), 1)
+    relatorio = gincana_dados.aplicar_schema(participantes, categorias, doacoes)
+    print(f'{linhas:,} doações, schema aplicado em {tempo * 1000:.0f} ms')
+    for aba in relatorio.antes:
+        print(f'  {aba:<18} {_mb(relatorio.antes[aba]):8.2f} MB -> {_mb(relatorio.depois[aba]):8.2f} MB')
+    print(f'  {"total":<18} {_mb(relatorio.total_antes):8.2f} MB -> {_mb(relatorio.total_depois):8.2f} MB')
+
+
+# Recarga depois de chegarem doações novas: ingestão incremental x carga
+# completa. A planilha ampliada com mais linhas tem as mesmas linhas iniciais
+# da original, então só as novas precisam ser lidas.
+def bench_incremental(repeticoes, linhas=100_000, novas=(10, 1_000, 10_000)):
+    base = planilha_ampliada(linhas)
+    with tempfile.TemporaryDirectory() as diretorio:
+        gincana_dados.carregar_planilha(FontePlanilha(base), diretorio)
+        print(f'{linhas:,} doações já carregadas')
+        for quantidade in novas:
+            ampliada = planilha_ampliada(linhas + quantidade)
+            tempos = []
+            for _ in range(repeticoes):
+                ingestao = gincana_dados.IngestaoIncremental(FontePlanilha(base), diretorio)
+                ingestao.atualizar()
+                ingestao.fonte.origem = ampliada
+                inicio = time.perf_counter()
+                dados = ingestao.atualizar()
+                tempos.append(time.perf_counter() - inicio)
+                assert ingestao.estatisticas.cargas_incrementais == 1
+            assert len(dados.doacoes) == linhas + quantidade
+            print(f'  +{quantidade:>6,} novas: recarga incremental {min(tempos) * 1000:8.1f} ms')
+
+        with tempfile.TemporaryDirectory() as vazio:
+            tempo_completo = _cronometrar(
+                lambda: gincana_dados.carregar_planilha(FontePlanilha(ampliada), vazio), 1
+            )
+    print(f'  carga completa ({linhas + quantidade:,}): {tempo_completo * 1000:8.1f} ms')
+
+
+# Atualizador compartilhado com um servidor local no lugar do GitHub: com
+# várias sessões lendo os dados sem parar (e a planilha mudando no meio), a
+# fonte recebe uma consulta por intervalo, não uma por sessão, e as leituras
+# nunca esperam a troca dos dados.
+def bench_atualizador(repeticoes, sessoes=20, intervalo=0.5, duracao=4.0):
+    versoes = [PLANILHA_LOCAL, planilha_ampliada(2_000)]
+    with tempfile.TemporaryDirectory() as diretorio:
+        servida = os.path.join(diretorio, 'planilha.xlsx')
+        shutil.copyfile(versoes[0], servida)
+        with servidor_local(servida) as (servidor, url):
+            ingestao = gincana_dados.IngestaoIncremental(FontePlanilha(url), os.path.join(diretorio, 'snapshots'))
+            atualizador = gincana_dados.AtualizadorPlanilha(ingestao, intervalo).iniciar()
+            parar = threading.Event()
+            leituras = [0] * sessoes
+            maior_espera = [0.0] * sessoes
+            hashes = set()
+
+            def sessao(indice):
+                while not parar.is_set():
+                    inicio = time.perf_counter()
+                    dados = ingestao.atual()
+                    espera = time.perf_counter() - inicio
+                    if leituras[indice]:
+                        maior_espera[indice] = max(maior_espera[indice], espera)
+                    leituras[indice] += 1
+                    hashes.add(dados.hash_conteudo)
+                    time.sleep(0.001)
+
+            threads = [threading.Thread(target=sessao, args=(indice,)) for indice in range(sessoes)]
+            for thread in threads:
+                thread.start()
+            inicio = time.perf_counter()
+            troca = 0
+            while time.perf_counter() - inicio < duracao:
+                time.sleep(duracao / 4)
+                troca += 1
+                shutil.copyfile(versoes[troca % 2], servida)
+            parar.set()
+            for thread in threads:
+                thread.join()
+            ciclos = atualizador.ciclos
+
+            # Vários cliques em "Recarregar" ao mesmo tempo viram uma consulta
+            antes = servidor.requisicoes
+            pedidos = [threading.Thread(target=atualizador.solicitar, args=(30,)) for _ in range(sessoes)]
+            for pedido in pedidos:
+                pedido.start()
+            for pedido in pedidos:
+                pedido.join()
+            consultas_pedidos = servidor.requisicoes - antes
+            atualizador.parar()
+
+    consultas = antes
+    print(f'{sessoes} sessões, intervalo {intervalo} s, {duracao} s: {sum(leituras):,} leituras, '
+          f'{len(hashes)} versões vistas')
+    print(f'  consultas à fonte: {consultas} ({ciclos} ciclos do atualizador, '
+          f'{servidor.respostas_304} respostas 304)')
+    print(f'  maior espera de uma leitura: {max(maior_espera) * 1000:.2f} ms')
+    print(f'  {sessoes} pedidos de recarga simultâneos: {consultas_pedidos} consulta(s)')
+
+
+# Carga completa num processo novo: tempo, pico de memória residente (KB no
+# Linux) e uma impressão digital do frame de doações resultante
+def _carga_isolada(caminho, em_fluxo):
+    fonte = FontePlanilha(caminho)
+    fonte.obter()
+    with tempfile.TemporaryDirectory() as diretorio:
+        inicio = time.perf_counter()
+        dados = gincana_dados.carregar_planilha(fonte, diretorio, revalidar=False, em_fluxo=em_fluxo)
+        tempo = time.perf_counter() - inicio
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return tempo, pico, len(dados.doacoes), int(pd.util.hash_pandas_object(dados.doacoes).sum())
+
+
+# Leitura em fluxo da aba de doações x pd.read_excel da pasta inteira. Cada
+# carga roda num processo separado para que o pico de memória de uma não
+# esconda o da outra.
+def bench_streaming(repeticoes, linhas=100_000):
+    caminho = planilha_ampliada(linhas)
+    contexto = multiprocessing.get_context('spawn')
+    resultados = {}
+    with contexto.Pool(1, maxtasksperchild=1) as pool:
+        for em_fluxo, nome in ((False, 'pd.read_excel'), (True, 'em fluxo')):
+            medidas = [pool.apply(_carga_isolada, (caminho, em_fluxo)) for _ in range(repeticoes)]
+            resultados[nome] = medidas
+            tempo = min(medida[0] for medida in medidas)
+            pico = min(medida[1] for medida in medidas)
+            print(f'{nome:<14} {tempo * 1000:9.1f} ms   pico RSS {pico / 1024:8.1f} MB')
+
+    impressoes = {medida[2:] for medidas in resultados.values() for medida in medidas}
+    assert len(impressoes) == 1, 'leitura em fluxo difere do pd.read_excel'
+    print(f'  {linhas:,} doações, frames idênticos nas duas leituras')
+
+
+# Bytes que um frame ocupa serializado em Arrow (o formato que o
+# st.dataframe envia pelo websocket)
+def _bytes_arrow(frame):
+    saida = pa.BufferOutputStream()
+    tabela = pa.Table.from_pandas(frame, preserve_index=False)
+    with pa.ipc.new_stream(saida, tabela.schema) as escritor:
+        escritor.write_table(tabela)
+    return saida.getvalue().size
+
+
+# Tabela de dados: frame filtrado inteiro no st.dataframe x página montada no
+# servidor (busca + ordenação + recorte), e exportação CSV de uma vez x em blocos
+def bench_tabela(repeticoes, linhas=1_000_000, tamanho_pagina=50):
+    _, doacoes = dados_sinteticos(5_000, linhas)
+    gincana_dados.aplicar_schema_doacoes(doacoes)
+    posicoes = gincana_calculos.posicoes_filtradas(doacoes, 'VIRTUX')
+
+    def tabela_inteira():
+        return _bytes_arrow(gincana_calculos.aplicar_filtro(doacoes, posicoes))
+
+    def pagina():
+        linhas_tabela = gincana_calculos.buscar_texto(doacoes, posicoes, 'brinq')
+        linhas_tabela = gincana_calculos.ordenar_posicoes(doacoes, linhas_tabela, 'Total_Geral', False)
+        return _bytes_arrow(gincana_calculos.pagina_de(doacoes, linhas_tabela, 3, tamanho_pagina))
+
+    print(f'{linhas:,} doações, {len(posicoes):,} no grupo VIRTUX')
+    print(f'  frame filtrado inteiro: {_mb(tabela_inteira()):8.2f} MB em '
+          f'{_cronometrar(tabela_inteira, repeticoes) * 1000:7.1f} ms')
+    print(f'  página de {tamanho_pagina} (busca + ordem): {pagina() / 1024:6.1f} KB em '
+          f'{_cronometrar(pagina, repeticoes) * 1000:7.1f} ms (sem cache)')
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        destino = os.path.join(diretorio, 'doacoes.csv')
+        for nome, exportar in (
+            ('to_csv de uma vez', lambda: open(destino, 'wb').write(
+                gincana_calculos.aplicar_filtro(doacoes, posicoes).to_csv(index=False).encode())),
+            ('em blocos', lambda: gincana_dados.exportar_doacoes(doacoes, posicoes, destino, 'CSV')),
+        ):
+            tempo = _cronometrar(exportar, 1)
+            tracemalloc.start()
+            exportar()
+            pico = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f'  exportação CSV {nome:<18}: {tempo * 1000:7.1f} ms, pico {_mb(pico):7.1f} MB, '
+                  f'arquivo {_mb(os.path.getsize(destino)):.1f} MB')
+
+
+# Latência de cada interação no dashboard (rerun pelo streamlit.testing),
+# com a seção escolhida executando sob demanda x todas as seções a cada
+# rerun, como fazia o st.tabs (versão do script que chama todas as seções)
+def bench_secoes(repeticoes, linhas=20_000):
+    from streamlit.testing.v1 import AppTest
+
+    fonte = open(APP_DASHBOARD, encoding='utf-8').read()
+    chamada = '    SECOES[secao_ativa]()\n'
+    assert chamada in fonte, 'despacho das seções mudou no gincana_bem.py'
+    variantes = {
+        'todas as seções (st.tabs)': fonte.replace(chamada, '    for secao in SECOES.values():\n        secao()\n'),
+        'seção sob demanda': fonte,
+    }
+    cabecalho = f'import sys\nsys.path.insert(0, {os.path.dirname(APP_DASHBOARD)!r})\n'
+    ambiente = {'GINCANA_PLANILHA': planilha_ampliada(linhas) if linhas else PLANILHA_LOCAL}
+
+    with tempfile.TemporaryDirectory() as diretorio, _ambiente(ambiente):
+        for nome, codigo in variantes.items():
+            script = os.path.join(diretorio, 'app.py')
+            with open(script, 'w', encoding='utf-8') as arquivo:
+                arquivo.write(cabecalho + codigo)
+            app = AppTest.from_file(script, default_timeout=600)
+            app.run()
+            assert not app.exception, [erro.value for erro in app.exception]
+
+            tempos = []
+            for _ in range(repeticoes):
+                for secao in app.radio[0].options:
+                    for interacao in (
+                        lambda: app.radio[0].set_value(secao),
+                        lambda: app.sidebar.selectbox[0].set_value(app.sidebar.selectbox[0].options[1]),
+                        lambda: app.sidebar.selectbox[1].set_value(app.sidebar.selectbox[1].options[1]),
+                        lambda: app.sidebar.selectbox[0].set_value('Todos'),
+                        lambda: app.sidebar.selectbox[1].set_value('Todos'),
+                    ):
+                        interacao()
+                        inicio = time.perf_counter()
+                        app.run()
+                        tempos.append(time.perf_counter() - inicio)
+            tempos = np.array(tempos) * 1000
+            print(f'{nome:<26} mediana {np.median(tempos):7.1f} ms   p90 {np.percentile(tempos, 90):7.1f} ms '
+                  f'({len(tempos)} interações)')
+    print(f'  {linhas or "planilha original"} doações')
+
+
+# Gráficos do dashboard para cada combinação de filtros: montados a cada vista
+# x vindos do CacheFiguras (o JSON que o st.plotly_chart envia custa igual nos dois)
+def bench_figuras(repeticoes, linhas=100_000):
+    _, doacoes = dados_sinteticos(500, linhas)
+    cubo = gincana_calculos.montar_cubo(doacoes)
+    filtros = [(grupo, sprint) for grupo in ('Todos', 'PACE DO BEM', 'VIRTUX')
+               for sprint in ('Todos', '1ºSPRINT', '2ºSPRINT')]
+
+    def graficos(grupo, sprint):
+        fatia = gincana_calculos.fatiar_cubo(cubo, grupo, sprint)
+        por_grupo = gincana_calculos.totais_por(fatia, 'Grupo')
+        categorias = gincana_calculos.totais_por(fatia, 'Categoria')
+        return {
+            'pontos por grupo': lambda: gincana_graficos.grafico_pontos_por_grupo(por_grupo),
+            'distribuição por grupo': lambda: gincana_graficos.grafico_pizza(por_grupo, 'Distribuição', 0.4),
+            'pontos por sprint': lambda: gincana_graficos.grafico_pontos_por_sprint(
+                gincana_calculos.totais_por(fatia, 'SPRINT')),
+            'categorias do grupo': lambda: gincana_graficos.grafico_categorias_do_grupo(categorias, grupo),
+        }
+
+    montagens = [(('v1', grupo, sprint, id_grafico), montar)
+                 for grupo, sprint in filtros for id_grafico, montar in graficos(grupo, sprint).items()]
+    cache = gincana_graficos.CacheFiguras()
+
+    def vista_sem_cache():
+        for _, montar in montagens:
+            montar()
+
+    def vista_com_cache():
+        for chave, montar in montagens:
+            cache.obter(chave, montar)
+
+    def serializar():
+        for chave, montar in montagens:
+            cache.obter(chave, montar).to_json()
+
+    tempo_sem_cache = _cronometrar(vista_sem_cache, repeticoes)
+    tempo_primeira = _cronometrar(vista_com_cache, 1)
+    tempo_com_cache = _cronometrar(vista_com_cache, repeticoes)
+    tempo_json = _cronometrar(serializar, repeticoes)
+    estatisticas = cache.estatisticas
+    print(f'{len(montagens)} gráficos ({len(filtros)} combinações de filtros), {linhas:,} doações')
+    print(f'  montados a cada vista: {tempo_sem_cache * 1000 / len(montagens):7.2f} ms por gráfico')
+    print(f'  via CacheFiguras:      {tempo_com_cache * 1000 / len(montagens):7.2f} ms por gráfico '
+          f'({tempo_sem_cache / tempo_com_cache:,.0f}x; acertos {estatisticas.taxa_acerto:.0%}, '
+          f'{estatisticas.bytes_em_uso / 1024:,.0f} KB em cache; primeira vista {tempo_primeira * 1000:,.0f} ms)')
+    print(f'  serialização (to_json): {tempo_json * 1000 / len(montagens):6.2f} ms por gráfico, com ou sem cache')
+
+
+# Detalhe de um participante como era (varredura das doações por Nome, do
+# cadastro pelo grupo e ordenação do histórico) x IndiceParticipantes
+def bench_participantes(repeticoes, escalas=(100_000, 1_000_000), n_participantes=5_000):
+    for linhas in escalas:
+        participantes, doacoes = dados_sinteticos(n_participantes, linhas)
+        gincana_dados.aplicar_schema_doacoes(doacoes)
+        nome = participantes['Nome'].iloc[n_participantes // 2]
+
+        def varredura(grupo='Todos', sprint='Todos'):
+            linhas_nome = gincana_calculos.aplicar_filtro(
+                doacoes, gincana_calculos.posicoes_filtradas(doacoes, grupo, sprint, nome))
+            participantes[participantes['Nome'] == nome]['Grupo'].iloc[0]
+            linhas_nome[['Total_Geral', 'Quantidade']].sum()
+            return linhas_nome.sort_values('Data', ascending=False)
+
+        tempo_montagem = _cronometrar(lambda: gincana_calculos.IndiceParticipantes(participantes, doacoes), 1)
+        indice = gincana_calculos.IndiceParticipantes(participantes, doacoes)
+
+        def consulta(grupo='Todos', sprint='Todos'):
+            indice.grupo_de(nome)
+            indice.totais_de(nome, grupo, sprint)
+            return doacoes.iloc[indice.posicoes_de(nome, grupo, sprint)]
+
+        print(f'{linhas:>9,} doações ({indice.registros.max():,} no máximo por participante; '
+              f'índice montado em {tempo_montagem * 1000:,.0f} ms)')
+        for grupo, sprint in (('Todos', 'Todos'), (participantes['Grupo'].iloc[n_participantes // 2], '2ºSPRINT')):
+            tempo_varredura = _cronometrar(lambda: varredura(grupo, sprint), repeticoes)
+            tempo_indice = _cronometrar(lambda: consulta(grupo, sprint), repeticoes)
+            print(f'  filtros {grupo}/{sprint}: varredura {tempo_varredura * 1000:8.2f} ms | '
+                  f'índice {tempo_indice * 1000:6.2f} ms ({tempo_varredura / tempo_indice:,.0f}x)')
+
+
+# Corrida dos grupos num log sintético de vários anos: acumulado montado das
+# doações brutas a cada rerun (Data em texto) x consulta à série diária, e
+# atualização da série com doações novas x remontagem
+def bench_serie(repeticoes, linhas=1_000_000, anos=5, novas=1_000):
+    _, doacoes = dados_sinteticos(5_000, linhas + novas)
+    rng = np.random.default_rng(7)
+    dias = np.sort(rng.integers(0, 365 * anos, linhas + novas))
+    doacoes['Data'] = (np.datetime64('2021-01-01') + dias.astype('timedelta64[D]')).astype(str)
+
+    def bruto(frequencia):
+        filtradas = doacoes[doacoes['SPRINT'] == '2ºSPRINT']
+        datas = pd.to_datetime(filtradas['Data'], errors='coerce')
+        por_dia = filtradas.groupby([datas.dt.normalize(), filtradas['Grupo']])['Total_Geral'].sum().unstack(fill_value=0)
+        return por_dia.resample(frequencia).sum().cumsum()
+
+    gincana_dados.aplicar_schema_doacoes(doacoes)
+    base, recentes = doacoes.iloc[:linhas], doacoes.iloc[linhas:]
+    tempo_montagem = _cronometrar(lambda: gincana_calculos.montar_serie_diaria(base), 1)
+    serie_base = gincana_calculos.montar_serie_diaria(base)
+    tempo_incremental = _cronometrar(lambda: gincana_calculos.combinar_cubos(
+        serie_base, gincana_calculos.montar_serie_diaria(recentes), dimensoes=gincana_calculos.DIMENSOES_SERIE
+    ), repeticoes)
+    serie = gincana_calculos.montar_serie_diaria(doacoes)
+
+    print(f'{linhas:,} doações em {anos} anos -> série diária com {len(serie):,} linhas '
+          f'(montada em {tempo_montagem * 1000:,.0f} ms)')
+    for nome, frequencia in gincana_calculos.FREQUENCIAS.items():
+        tempo_bruto = _cronometrar(lambda: bruto(frequencia), 1)
+        tempo_serie = _cronometrar(lambda: gincana_calculos.acumulado_por(
+            serie, 'Grupo', frequencia, sprint='2ºSPRINT'), repeticoes)
+        print(f'  acumulado {nome.lower():<8}: doações brutas {tempo_bruto * 1000:8.1f} ms | '
+              f'série diária {tempo_serie * 1000:6.1f} ms ({tempo_bruto / tempo_serie:,.0f}x)')
+    tempo_ritmo = _cronometrar(lambda: gincana_calculos.ritmo_diario(serie, sprint='2ºSPRINT'), repeticoes)
+    print(f'  ritmo (pontos/dia): {tempo_ritmo * 1000:6.1f} ms')
+    print(f'  +{novas:,} doações: série atualizada em {tempo_incremental * 1000:6.1f} ms '
+          f'(remontar: {tempo_montagem * 1000:,.0f} ms)')
+
+
+# Catálogo sintético com `n_categorias` categorias de dois tipos cada e as
+# doações redistribuídas entre eles
+def _catalogo_sintetico(doacoes, n_categorias, semente=11):
+    rng = np.random.default_rng(semente)
+    nomes = np.array([f'Categoria {i:04d}' for i in range(n_categorias)])
+    categorias = pd.DataFrame({
+        'Categoria': np.repeat(nomes, 2),
+        'Tipo_Item': np.tile(['Novo', 'Usado bom estado'], n_categorias),
+        'Meta_Grupo': np.repeat(rng.integers(50, 5_000, n_categorias).astype('float64'), 2),
+    })
+    escolhidas = rng.integers(0, len(categorias), len(doacoes))
+    doacoes = doacoes.assign(Categoria=categorias['Categoria'].to_numpy()[escolhidas],
+                             Tipo_Item=categorias['Tipo_Item'].to_numpy()[escolhidas])
+    return categorias, doacoes
+
+
+# Progresso das metas como era (laço por categoria, agora também por grupo,
+# com uma máscara nas doações a cada par) x tabela de metas + progresso_metas
+def bench_metas(repeticoes, linhas=1_000_000, catalogos=(12, 120, 1_200)):
+    _, base = dados_sinteticos(5_000, linhas)
+    grupos = sorted(base['Grupo'].unique())
+    for n_categorias in catalogos:
+        categorias, doacoes = _catalogo_sintetico(base, n_categorias)
+        gincana_dados.aplicar_schema_doacoes(doacoes)
+
+        def laco():
+            metas = categorias.groupby('Categoria')['Meta_Grupo'].first()
+            progresso = {}
+            for categoria in categorias['Categoria'].unique():
+                da_categoria = doacoes['Categoria'] == categoria
+                for grupo in grupos:
+                    feito = doacoes.loc[da_categoria & (doacoes['Grupo'] == grupo), 'Quantidade'].sum()
+                    progresso[grupo, categoria] = min(feito / metas[categoria] * 100, 100)
+            return progresso
+
+        tempo_tabela = _cronometrar(lambda: gincana_calculos.montar_tabela_metas(doacoes, categorias), 1)
+        tabela = gincana_calculos.montar_tabela_metas(doacoes, categorias)
+        inicio, fim = pd.Timestamp('2025-10-14'), pd.Timestamp('2025-12-18')
+        tempo_vetorizado = _cronometrar(lambda: gincana_calculos.progresso_metas(
+            tabela, categorias, grupos, inicio, fim, sprint='2ºSPRINT'), repeticoes)
+        tempo_laco = _cronometrar(laco, 1) if n_categorias <= 120 else None
+        texto_laco = f'{tempo_laco * 1000:9.1f} ms' if tempo_laco is not None else '   (pulado)'
+        print(f'{n_categorias:>5,} categorias x {len(grupos)} grupos, {linhas:,} doações: laço {texto_laco} | '
+              f'progresso_metas {tempo_vetorizado * 1000:6.1f} ms (tabela de metas montada na carga em '
+              f'{tempo_tabela * 1000:,.0f} ms, {len(tabela):,} linhas)')
+
+
+# Conferência dos pontos com merge no catálogo (o jeito direto em pandas) x
+# validar_pontos, num log sintético com ~1% das linhas adulteradas
+def bench_pontos(repeticoes, linhas=1_000_000, n_categorias=120):
+    _, base = dados_sinteticos(5_000, linhas)
+    categorias, doacoes = _catalogo_sintetico(base, n_categorias)
+    rng = np.random.default_rng(5)
+    categorias['Pontos_Unit'] = rng.choice([2.0, 3.0, 4.0, 5.0, 10.0], len(categorias))
+    categorias['Bonus_Pontos'] = 0.0
+    unit = categorias.set_index(['Categoria', 'Tipo_Item'])['Pontos_Unit']
+    doacoes['Pontos_Unit'] = unit.reindex(pd.MultiIndex.from_arrays(
+        [doacoes['Categoria'], doacoes['Tipo_Item']])).to_numpy()
+    doacoes['Pontos_Total'] = doacoes['Quantidade'] * doacoes['Pontos_Unit']
+    doacoes['Bonus'] = 0.0
+    doacoes['Total_Geral'] = doacoes['Pontos_Total']
+    adulteradas = rng.choice(linhas, linhas // 100, replace=False)
+    doacoes.loc[adulteradas, 'Total_Geral'] += 1
+    gincana_dados.aplicar_schema_doacoes(doacoes)
+
+    def com_merge():
+        juntas = doacoes.merge(categorias[['Categoria', 'Tipo_Item', 'Pontos_Unit', 'Bonus_Pontos']],
+                               on=['Categoria', 'Tipo_Item'], how='left', suffixes=('', '_catalogo'))
+        recalculado = juntas['Quantidade'].astype('float64') * juntas['Pontos_Unit_catalogo'] + juntas['Bonus']
+        return (recalculado - juntas['Total_Geral'].astype('float64')).abs().gt(1e-6).sum()
+
+    tempo_merge = _cronometrar(com_merge, repeticoes)
+    tempo_validar = _cronometrar(lambda: gincana_calculos.validar_pontos(doacoes, categorias), repeticoes)
+    relatorio = gincana_calculos.validar_pontos(doacoes, categorias)
+    print(f'{linhas:,} doações, {len(categorias):,} itens no catálogo: merge {tempo_merge * 1000:7.1f} ms | '
+          f'validar_pontos {tempo_validar * 1000:7.1f} ms ({tempo_merge / tempo_validar:,.1f}x) | '
+          f'divergentes={relatorio.linhas_divergentes:,} (adulteradas={len(adulteradas):,})')
+
+
+# Geração antiga dos dados de demonstração: um sorteio e dois filtros nos
+# cadastros por doação
+def _doacoes_com_loop(participantes, categorias, linhas):
+    np.random.seed(42)
+    doacoes_data = []
+    for _ in range(linhas):
+        nome = np.random.choice(participantes['Nome'])
+        grupo = participantes[participantes['Nome'] == nome]['Grupo'].iloc[0]
+        categoria = np.random.choice(categorias['Categoria'].unique())
+        tipo_item = np.random.choice(categorias[categorias['Categoria'] == categoria]['Tipo_Item'].values)
+        pontos_unit = categorias[
+            (categorias['Categoria'] == categoria) & (categorias['Tipo_Item'] == tipo_item)
+        ]['Pontos_Unit'].iloc[0]
+        quantidade = np.random.randint(1, 10)
+        doacoes_data.append({'Nome': nome, 'Grupo': grupo, 'Categoria': categoria, 'Tipo_Item': tipo_item,
+                             'Quantidade': quantidade, 'Pontos_Total': quantidade * pontos_unit})
+    return pd.DataFrame(doacoes_data)
+
+
+# Etapas do dashboard medidas por bench_escala, na ordem em que rodam: as
+# da carga (uma vez por versão dos dados) e as de cada rerun (filtros da
+# sidebar aplicados, página da tabela com busca e ordem)
+def _etapas_dashboard(participantes, categorias, doacoes):
+    grupo = str(participantes['Grupo'].iloc[0])
+    grupos = sorted(participantes['Grupo'].astype(str).unique())
+    inicio, fim = doacoes['Data'].min(), doacoes['Data'].max()
+    estado = {}
+
+    def carga_cubo():
+        estado['cubo'] = gincana_calculos.montar_cubo(doacoes)
+
+    def carga_serie():
+        estado['serie'] = gincana_calculos.montar_serie_diaria(doacoes)
+
+    def carga_metas():
+        estado['metas'] = gincana_calculos.montar_tabela_metas(doacoes, categorias)
+
+    def filtros():
+        fatia = gincana_calculos.fatiar_cubo(estado['cubo'], grupo, '2ºSPRINT')
+        for dimensao in ('Grupo', 'SPRINT', 'Categoria'):
+            gincana_calculos.totais_por(fatia, dimensao)
+
+    def tabela():
+        posicoes = gincana_calculos.posicoes_filtradas(doacoes, grupo, '2ºSPRINT')
+        posicoes = gincana_calculos.buscar_texto(doacoes, posicoes, 'brinq')
+        posicoes = gincana_calculos.ordenar_posicoes(doacoes, posicoes, 'Total_Geral', False)
+        gincana_calculos.pagina_de(doacoes, posicoes, 0, 50)
+
+    def corrida():
+        gincana_calculos.acumulado_por(estado['serie'], 'Grupo', 'W', sprint='2ºSPRINT')
+        gincana_calculos.ritmo_diario(estado['serie'], grupo)
+
+    return {
+        'schema': lambda: gincana_dados.aplicar_schema_doacoes(doacoes),
+        'cubo': carga_cubo,
+        'série diária': carga_serie,
+        'tabela de metas': carga_metas,
+        'índice participantes': lambda: gincana_calculos.IndiceParticipantes(participantes, doacoes),
+        'validação de pontos': lambda: gincana_calculos.validar_pontos(doacoes, categorias),
+        'ranking': lambda: gincana_calculos.calcular_ranking(participantes, doacoes),
+        'filtros (cubo)': filtros,
+        'tabela (página)': tabela,
+        'corrida': corrida,
+        'progresso metas': lambda: gincana_calculos.progresso_metas(
+            estado['metas'], categorias, grupos, inicio, fim, sprint='2ºSPRINT'),
+    }
+
+
+# Curvas de escala: todas as agregações do dashboard em logs sintéticos de
+# 10^3 a 10^7 doações (gerador vetorizado). O expoente é a inclinação
+# log-log entre as duas maiores escalas (1.0 = linear). As medidas também
+# vão para um CSV, para traçar as curvas.
+def bench_escala(repeticoes, escalas=(1_000, 10_000, 100_000, 1_000_000, 10_000_000), n_participantes=5_000):
+    participantes_demo, categorias = gincana_sinteticos.cadastros_demo()
+    participantes = gincana_sinteticos.participantes_sinteticos(n_participantes)
+    tempo_loop = _cronometrar(lambda: _doacoes_com_loop(participantes_demo, categorias, 1_000), 1)
+    tempo_vetorizado = _cronometrar(
+        lambda: gincana_sinteticos.gerar_doacoes(participantes_demo, categorias, 1_000), repeticoes)
+    print(f'gerar 1,000 doações: laço {tempo_loop * 1000:,.0f} ms | vetorizado {tempo_vetorizado * 1000:.2f} ms '
+          f'({tempo_loop / tempo_vetorizado:,.0f}x)')
+
+    tempos = {}
+    for linhas in escalas:
+        inicio = time.perf_counter()
+        doacoes = gincana_sinteticos.gerar_doacoes(participantes, categorias, linhas)
+        tempos.setdefault('geração', {})[linhas] = time.perf_counter() - inicio
+        for etapa, funcao in _etapas_dashboard(participantes, categorias, doacoes).items():
+            tempos.setdefault(etapa, {})[linhas] = _cronometrar(funcao, 1 if linhas >= 1_000_000 else repeticoes)
+        del doacoes
+
+    print(f'{"etapa (ms)":<22}' + ''.join(f'{linhas:>12,}' for linhas in escalas) + '   expoente')
+    for etapa, por_escala in tempos.items():
+        maior, anterior = escalas[-1], escalas[-2]
+        expoente = np.log(por_escala[maior] / por_escala[anterior]) / np.log(maior / anterior)
+        print(f'{etapa:<22}' + ''.join(f'{por_escala[linhas] * 1000:12.1f}' for linhas in escalas)
+              + f'{expoente:11.2f}')
+
+    destino = os.path.join(tempfile.gettempdir(), 'gincana_escala.csv')
+    pd.DataFrame(tempos).rename_axis('linhas').mul(1000).to_csv(destino, float_format='%.3f')
+    print(f'  {n_participantes:,} participantes; tempos em ms gravados em {destino}')
+
+
+# Cada etapa do caminho de dados (carga, limpeza, filtro, totais por grupo e
+# sprint, ranking, metas) medida sem Streamlit, na planilha do repositório e
+# em planilhas sintéticas: tempo mín./mediana/máx. das `repeticoes` rodadas
+# e pico de memória (tracemalloc, numa rodada à parte) de cada etapa
+def bench_etapas(repeticoes, escalas=(0, 10_000, 100_000)):
+    for linhas in escalas:
+        caminho = planilha_sintetica(linhas) if linhas else PLANILHA_LOCAL
+        etapas = etapas_caminho_dados(caminho)
+        tempos = {etapa: [] for etapa in etapas}
+        for _ in range(repeticoes):
+            estado = {}
+            for etapa, funcao in etapas.items():
+                inicio = time.perf_counter()
+                funcao(estado)
+                tempos[etapa].append(time.perf_counter() - inicio)
+
+        picos = {}
+        estado = {}
+        for etapa, funcao in etapas.items():
+            tracemalloc.start()
+            funcao(estado)
+            picos[etapa] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+        descricao = f'{len(estado["doacoes"]):,} doações' + ('' if linhas else ' (planilha do repositório)')
+        print(f'{descricao}\n  {"etapa":<22}{"mín. ms":>10}{"mediana ms":>12}{"máx. ms":>10}{"pico MB":>10}')
+        for etapa, medidas in tempos.items():
+            medidas = np.array(medidas) * 1000
+            print(f'  {etapa:<22}{medidas.min():10.2f}{np.median(medidas):12.2f}{medidas.max():10.2f}'
+                  f'{_mb(picos[etapa]):10.2f}')
+
+
+# Várias edições servidas por servidores HTTP locais com latência: carga uma
+# planilha por vez x RegistroPlanilhas (threads e, com mais de um núcleo,
+# processos), recarga sem mudanças e ranking entre edições pelo cubo
+# federado x recarregando todas as planilhas
+def bench_edicoes(repeticoes, edicoes=4, linhas=20_000, atraso=0.2):
+    participantes, categorias = gincana_sinteticos.cadastros_demo()
+    caminhos = []
+    for i in range(edicoes):
+        caminho = os.path.join(tempfile.gettempdir(), f'gincana_edicao_{i}_{linhas}.xlsx')
+        if not os.path.exists(caminho):
+            doacoes = gincana_sinteticos.gerar_doacoes(participantes, categorias, linhas, semente=i)
+            gincana_sinteticos.salvar_fixture(participantes, categorias, doacoes, caminho)
+        caminhos.append(caminho)
+
+    variantes = {'threads': 0}
+    if (os.cpu_count() or 1) > 1:
+        variantes['threads + processos'] = min(edicoes, os.cpu_count())
+    with contextlib.ExitStack() as pilha:
+        urls = [pilha.enter_context(servidor_local(caminho, atraso))[1] for caminho in caminhos]
+        registro = [gincana_dados.EdicaoPlanilha(str(2020 + i), 'Geral', url) for i, url in enumerate(urls)]
+
+        with tempfile.TemporaryDirectory() as diretorio:
+            def sequencial():
+                return [gincana_dados.IngestaoIncremental(FontePlanilha(url), os.path.join(diretorio, str(i))).atual()
+                        for i, url in enumerate(urls)]
+
+            tempo_frio = _cronometrar(sequencial, 1)
+            tempo_quente = _cronometrar(sequencial, repeticoes)
+        print(f'{edicoes} planilhas de {linhas:,} doações, latência {atraso * 1000:,.0f} ms:')
+        print(f'  uma por vez:           fria {tempo_frio * 1000:8.0f} ms | com snapshot {tempo_quente * 1000:7.0f} ms')
+
+        for nome, processos in variantes.items():
+            with tempfile.TemporaryDirectory() as diretorio:
+                def paralela():
+                    return gincana_dados.RegistroPlanilhas(registro, diretorio, processos=processos).atual()
+
+                tempo_frio = _cronometrar(paralela, 1)
+                tempo_quente = _cronometrar(paralela, repeticoes)
+                federado = gincana_dados.RegistroPlanilhas(registro, diretorio, processos=processos)
+                federado.atual()
+                tempo_recarga = _cronometrar(federado.atualizar, repeticoes)
+            print(f'  {nome + ":":<22} fria {tempo_frio * 1000:8.0f} ms | com snapshot {tempo_quente * 1000:7.0f} ms'
+                  f' | recarga sem mudanças {tempo_recarga * 1000:6.0f} ms')
+
+        dados = federado.atual()
+        tempo_cubo = _cronometrar(lambda: gincana_calculos.ranking_grupos_edicoes(dados.cubo), repeticoes)
+        print(f'  ranking entre edições: cubo federado {tempo_cubo * 1000:6.1f} ms '
+              f'({len(dados.doacoes):,} doações, cubo de {len(dados.cubo):,} linhas)')
+
+
+# Dados para a primeira pintura num processo novo: consultando a fonte
+# (atual) ou pelo último snapshot bom em disco (anteriores)
+def _primeira_pintura(url, diretorio, anteriores):
+    ingestao = gincana_dados.IngestaoIncremental(FontePlanilha(url), diretorio)
+    inicio = time.perf_counter()
+    dados = ingestao.anteriores() if anteriores else None
+    if dados is None:
+        dados = ingestao.atual()
+    return time.perf_counter() - inicio, len(dados.doacoes)
+
+
+# Tempo até os dados da primeira pintura com a fonte remota lenta: esperar
+# a consulta (o snapshot só ajuda depois do download e do hash) x
+# stale-while-revalidate pelo último snapshot bom, que não depende da rede
+def bench_primeira_pintura(repeticoes, linhas=20_000, latencias=(0.1, 1.0, 3.0)):
+    caminho = planilha_ampliada(linhas)
+    contexto = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as diretorio, contexto.Pool(1, maxtasksperchild=1) as pool:
+        for latencia in latencias:
+            with servidor_local(caminho, latencia) as (_, url):
+                pool.apply(_primeira_pintura, (url, diretorio, False))
+                medidas = {
+                    anteriores: min(pool.apply(_primeira_pintura, (url, diretorio, anteriores))[0]
+                                    for _ in range(repeticoes))
+                    for anteriores in (False, True)
+                }
+            print(f'latência {latencia * 1000:6,.0f} ms: consultando a fonte {medidas[False] * 1000:8.0f} ms | '
+                  f'último snapshot bom {medidas[True] * 1000:7.0f} ms')
+    print(f'  {linhas:,} doações, cada carga num processo novo')
+
+
+# Placar a cada atualização: recalcular o ranking de todas as doações versus
+# o histórico, que só soma as doações novas; depois de muitas atualizações
+# o histórico continua limitado a `max_fotos` fotos
+def bench_placar(repeticoes, linhas=1_000_000, novas=1_000, atualizacoes=500, n_participantes=5_000):
+    participantes = gincana_sinteticos.participantes_sinteticos(n_participantes)
+    _, categorias = gincana_sinteticos.cadastros_demo()
+    doacoes = gincana_sinteticos.gerar_doacoes(participantes, categorias, linhas + novas * atualizacoes)
+
+    def recalcular():
+        ranking = gincana_calculos.calcular_ranking(participantes, doacoes.iloc[:linhas + novas])
+        totais = gincana_calculos.totais_validos(doacoes.iloc[:linhas + novas], 'Grupo')
+        return ranking, totais.rank(method='min', ascending=False)
+
+    def registrar_novas():
+        historico = gincana_calculos.HistoricoPlacar()
+        historico.registrar('base', participantes, doacoes.iloc[:linhas])
+        inicio = time.perf_counter()
+        historico.registrar('novas', participantes, doacoes.iloc[:linhas + novas], linhas_iguais=linhas)
+        return time.perf_counter() - inicio
+
+    tempo_recalcular = _cronometrar(recalcular, repeticoes)
+    tempo_incremental = min(registrar_novas() for _ in range(repeticoes))
+    print(f'{linhas:,} doações + {novas:,} novas: ranking completo {tempo_recalcular * 1000:7.1f} ms | '
+          f'placar incremental {tempo_incremental * 1000:6.1f} ms ({tempo_recalcular / tempo_incremental:,.1f}x)')
+
+    historico = gincana_calculos.HistoricoPlacar()
+    inicio = time.perf_counter()
+    for atualizacao in range(atualizacoes + 1):
+        linhas_base = linhas + novas * atualizacao
+        historico.registrar(atualizacao, participantes, doacoes.iloc[:linhas_base],
+                            linhas_iguais=linhas_base - novas if atualizacao else 0,
+                            registrada_em=atualizacao * 3_600.0)
+    tempo_total = time.perf_counter() - inicio
+    print(f'{atualizacoes:,} atualizações de hora em hora: {tempo_total:5.1f} s | {len(historico.fotos):,} fotos '
+          f'({_mb(historico.bytes_em_uso):.2f} MB, {historico.compactacoes:,} compactações) | '
+          f'movimentos {len(historico.movimentos()):,} participantes')
+
+
+# Tabelas derivadas que uma sessão calcula ao abrir o dashboard e o ranking
+# com um par de filtros (grupo, sprint)
+def _resultados_sessao(participantes, cubo, grupo, sprint, obter):
+    fatia = obter((grupo, sprint, 'cubo filtrado'), lambda: gincana_calculos.fatiar_cubo(cubo, grupo, sprint))
+    return [
+        obter((grupo, sprint, 'resumo'), lambda: gincana_calculos.resumo_geral(fatia)),
+        obter((grupo, sprint, 'pontos por grupo'), lambda: gincana_calculos.totais_validos(fatia, 'Grupo')),
+        obter((grupo, sprint, 'pontos por sprint'), lambda: gincana_calculos.totais_validos(fatia, 'SPRINT')),
+        obter((grupo, sprint, 'ranking'), lambda: gincana_calculos.calcular_ranking(participantes, fatia)),
+    ]
+
+
+# Muitas sessões abrindo o app ao mesmo tempo (uma thread cada, filtros
+# sorteados entre poucas combinações): cada uma calculando tudo versus o
+# cache de resultados do processo, com cálculos simultâneos iguais feitos
+# uma vez só; por fim, o mesmo com um limite pequeno, para ver os descartes
+def bench_resultados(repeticoes, sessoes=32, linhas=1_000_000, n_participantes=5_000):
+    participantes, doacoes = dados_sinteticos(n_participantes, linhas)
+    cubo = gincana_calculos.montar_cubo(doacoes)
+    grupos = ['Todos'] + gincana_calculos.opcoes_filtro(participantes['Grupo'])
+    sprints = ['Todos'] + gincana_calculos.opcoes_filtro(cubo['SPRINT'])
+    rng = np.random.default_rng(3)
+    filtros = [(grupos[rng.integers(len(grupos))], sprints[rng.integers(len(sprints))]) for _ in range(sessoes)]
+
+    def abrir_sessoes(obter):
+        barreira = threading.Barrier(sessoes)
+
+        def sessao(grupo, sprint):
+            barreira.wait()
+            _resultados_sessao(participantes, cubo, grupo, sprint, obter)
+
+        threads = [threading.Thread(target=sessao, args=filtro) for filtro in filtros]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    tempo_sem_cache = _cronometrar(lambda: abrir_sessoes(lambda chave, calcular: calcular()), repeticoes)
+    caches = []
+
+    def com_cache(limite_bytes=gincana_calculos.LIMITE_CACHE_RESULTADOS):
+        caches.append(gincana_calculos.CacheResultados(limite_bytes))
+        abrir_sessoes(caches[-1].obter)
+
+    tempo_com_cache = _cronometrar(com_cache, repeticoes)
+    estatisticas = caches[-1].estatisticas
+    print(f'{sessoes} sessões, {len(set(filtros))} combinações de filtros, {linhas:,} doações: '
+          f'sem cache {tempo_sem_cache * 1000:7.1f} ms | cache de resultados {tempo_com_cache * 1000:6.1f} ms '
+          f'({tempo_sem_cache / tempo_com_cache:,.1f}x)')
+    print(f'  {estatisticas.faltas:,} cálculos, {estatisticas.compartilhados:,} compartilhados em andamento, '
+          f'{estatisticas.acertos:,} acertos | {estatisticas.resultados:,} resultados em '
+          f'{_mb(estatisticas.bytes_em_uso):.2f} MB')
+
+    limite = estatisticas.bytes_em_uso / 4
+    com_cache(limite)
+    estatisticas = caches[-1].estatisticas
+    print(f'  limite de {_mb(limite):.2f} MB: {estatisticas.resultados:,} resultados em '
+          f'{_mb(estatisticas.bytes_em_uso):.2f} MB, {estatisticas.descartes:,} descartes')
+
+
+# Banco SQLite das doações: importação completa, sincronização só das
+# doações novas e consultas do dashboard por SQL versus o pandas sobre as
+# doações brutas (o que o app faria sem o cubo), com a memória do processo
+# que cada caminho precisa manter
+def bench_banco(repeticoes, linhas=1_000_000, novas=1_000, n_participantes=5_000):
+    participantes = gincana_sinteticos.participantes_sinteticos(n_participantes)
+    _, categorias = gincana_sinteticos.cadastros_demo()
+    doacoes = gincana_sinteticos.gerar_doacoes(participantes, categorias, linhas + novas)
+    versoes = [
+        types.SimpleNamespace(hash_conteudo=f'v{total}', frames=(participantes, categorias, doacoes.iloc[:total]))
+        for total in (linhas, linhas + novas)
+    ]
+    with tempfile.TemporaryDirectory() as diretorio:
+        banco = gincana_banco.BancoDoacoes(os.path.join(diretorio, 'gincana.sqlite'))
+        inicio = time.perf_counter()
+        banco.sincronizar(versoes[0])
+        tempo_completa = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        banco.sincronizar(versoes[1], versoes[0].hash_conteudo, linhas)
+        tempo_incremental = time.perf_counter() - inicio
+        print(f'{linhas:,} doações: importação completa {tempo_completa:6.1f} s | '
+              f'+{novas:,} novas sincronizadas em {tempo_incremental * 1000:6.1f} ms | '
+              f'{_mb(banco.bytes_em_disco):,.0f} MB em disco')
+
+        consultas = {
+            'ranking': (lambda: gincana_calculos.calcular_ranking(participantes, doacoes),
+                        lambda: banco.ranking()),
+            'ranking de um grupo e sprint': (
+                lambda: gincana_calculos.calcular_ranking(participantes, doacoes.iloc[
+                    gincana_calculos.posicoes_filtradas(doacoes, 'VIRTUX', '2ºSPRINT')]),
+                lambda: banco.ranking('VIRTUX', '2ºSPRINT')),
+            'totais por grupo': (lambda: gincana_calculos.totais_validos(doacoes, 'Grupo'),
+                                 lambda: banco.totais('Grupo', validos=True)),
+            'totais por categoria da sprint': (
+                lambda: gincana_calculos.totais_por(doacoes.iloc[
+                    gincana_calculos.posicoes_filtradas(doacoes, sprint='2ºSPRINT')], 'Categoria'),
+                lambda: banco.totais('Categoria', sprint='2ºSPRINT')),
+        }
+        for nome, (com_pandas, com_sql) in consultas.items():
+            print(f'  {nome:32} pandas {_cronometrar(com_pandas, repeticoes) * 1000:7.1f} ms | '
+                  f'SQL {_cronometrar(com_sql, repeticoes) * 1000:7.1f} ms')
+        with banco.conexao() as conexao:
+            cache_sqlite = -conexao.execute('PRAGMA cache_size').fetchone()[0] * 1024
+        print(f'  memória das doações no pandas {_mb(doacoes.memory_usage(deep=True).sum()):,.0f} MB | '
+              f'cache de páginas do SQLite por conexão {_mb(cache_sqlite):,.0f} MB')
+        banco.fechar()
+
+
+@contextlib.contextmanager
+def _ambiente(variaveis):
+    anteriores = {nome: os.environ.get(nome) for nome in variaveis}
+    os.environ.update(variaveis)
+    try:
+        yield
+    finally:
+        for nome, valor in anteriores.items():
+            if valor is None:
+                os.environ.pop(nome, None)
+            else:
+                os.environ[nome] = valor
+
+
+BENCHMARKS = {
+    'download': bench_download,
+    'snapshot': bench_snapshot,
+    'limpeza': bench_limpeza,
+    'ranking': bench_ranking,
+    'cubo': bench_cubo,
+    'filtro': bench_filtro,
+    'schema': bench_schema,
+    'incremental': bench_incremental,
+    'atualizador': bench_atualizador,
+    'streaming': bench_streaming,
+    'secoes': bench_secoes,
+    'tabela': bench_tabela,
+    'figuras': bench_figuras,
+    'participantes': bench_participantes,
+    'serie': bench_serie,
+    'metas': bench_metas,
+    'pontos': bench_pontos,
+    'escala': bench_escala,
+    'etapas': bench_etapas,
+    'edicoes': bench_edicoes,
+    'primeira_pintura': bench_primeira_pintura,
+    'placar': bench_placar,
+    'resultados': bench_resultados,
+    'banco': bench_banco,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks da Gincana do Bem')
+    parser.add_argument('benchmarks', nargs='*', help='um ou mais de: ' + ', '.join(BENCHMARKS))
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+    desconhecidos = [nome for nome in args.benchmarks if nome not in BENCHMARKS]
+    if desconhecidos:
+        parser.error('benchmark desconhecido: ' + ', '.join(desconhecidos))
+
+    for nome in args.benchmarks or list(BENCHMARKS):
+        print(f'== {nome} ==')
+        BENCHMARKS[nome](args.repeticoes)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,468 @@
+import contextlib
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+import pandas as pd
+
+from gincana_calculos import COLUNAS_BUSCA, DIMENSOES_CUBO, MEDIDAS_CUBO, ResumoGeral, numerar_ranking
+
+# Banco SQLite das doações (vazio = desligado): a ingestão sincroniza nele
+# cada versão nova da planilha e o dashboard tira dele, por SQL, os totais
+# por grupo, sprint e categoria e o ranking
+BANCO_DOACOES = os.environ.get('GINCANA_BANCO', '')
+
+# Conexões que o pool mantém abertas (leituras em paralelo, com WAL)
+CONEXOES_BANCO = int(os.environ.get('GINCANA_CONEXOES_BANCO', '4'))
+
+# Linhas por executemany ao inserir doações
+LOTE_INSERCAO = 50_000
+
+# Linhas por bloco ao ler doações do banco (exportação e carga a partir dele)
+LOTE_LEITURA = 10_000
+
+# Índices da tabela `cubo`: todas as dimensões (filtro por grupo e busca da
+# combinação na sincronização incremental) e a sprint sozinha
+INDICES_CUBO = {'cubo_dimensoes': DIMENSOES_CUBO, 'cubo_sprint': ['SPRINT']}
+
+# Índices da tabela `doacoes`: o histórico de um participante
+INDICES_DOACOES = {'doacoes_nome': ['Nome']}
+
+# Tipos (do esquema gravado) das colunas em que a busca da tabela procura
+TIPOS_TEXTO = ('category', 'object', 'str', 'string')
+
+
+# Contadores do banco (exibidos na sidebar e nos benchmarks)
+@dataclass
+class EstatisticasBanco:
+    sincronizacoes_completas: int = 0
+    sincronizacoes_incrementais: int = 0
+    linhas_inseridas: int = 0
+    consultas: int = 0
+    conexoes: int = 0
+    tempo_sincronizacao: float = 0.0
+
+
+# Identificador entre aspas (os nomes das colunas vêm da planilha)
+def _nome(coluna):
+    return '"' + str(coluna).replace('"', '""') + '"'
+
+
+# Tipo SQLite de uma coluna do DataFrame; números são sempre REAL, porque o
+# schema reduz inteiros (int8, int16...) conforme os valores de cada versão
+# e a tabela não deve ser recriada por isso
+def _tipo(serie):
+    if pd.api.types.is_bool_dtype(serie):
+        return 'INTEGER'
+    if pd.api.types.is_numeric_dtype(serie):
+        return 'REAL'
+    return 'TEXT'
+
+
+# Valores de uma coluna prontos para o sqlite3: datas como texto ISO,
+# vazios como NULL e o que não for texto nem número convertido em texto
+def _valores(serie):
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie.dt.strftime('%Y-%m-%d %H:%M:%S').astype(object).where(serie.notna(), None).tolist()
+    valores = serie.astype(object).where(serie.notna(), None).tolist()
+    if serie.dtype == object:
+        valores = [valor if valor is None or isinstance(valor, (str, int, float)) else str(valor)
+                   for valor in valores]
+    return valores
+
+
+# Tipo de cada coluna do frame, como texto (o esquema gravado no banco)
+def _esquema(frame):
+    return {str(coluna): str(frame[coluna].dtype) for coluna in frame.columns}
+
+
+# Linhas lidas do banco com os tipos do `esquema`: datas voltam a datetime,
+# números ao tipo do frame (inteiros só sem vazios) e categóricas aos tipos
+# de `categorias` (ou às categorias das próprias linhas). A coluna `linha`
+# vira o índice, como as posições no frame em memória.
+def _restaurar(frame, esquema, categorias=None):
+    if 'linha' in frame.columns:
+        frame = frame.set_index('linha').rename_axis(None)
+    for coluna, tipo in esquema.items():
+        if coluna not in frame.columns:
+            continue
+        serie = frame[coluna]
+        if tipo == 'category':
+            frame[coluna] = serie.astype((categorias or {}).get(coluna, 'category'))
+        elif tipo.startswith('datetime64'):
+            frame[coluna] = pd.to_datetime(serie).astype(tipo)
+        elif tipo == 'bool' or pd.api.types.is_numeric_dtype(tipo):
+            serie = pd.to_numeric(serie)
+            if tipo == 'bool' or pd.api.types.is_integer_dtype(tipo):
+                frame[coluna] = serie.astype(tipo) if serie.notna().all() else serie
+            else:
+                frame[coluna] = serie.astype(tipo)
+    return frame
+
+
+# Busca sem diferenciar maiúsculas (como o str.contains(case=False) do
+# pandas), registrada nas conexões; `termo` já vem em maiúsculas
+def _contem(valor, termo):
+    return valor is not None and termo in str(valor).upper()
+
+
+# Condição WHERE (e parâmetros) dos filtros de grupo e sprint da sidebar e,
+# com `nome`, do participante
+def _filtros(grupo='Todos', sprint='Todos', extras=(), nome='Todos'):
+    condicoes, parametros = list(extras), []
+    for coluna, valor in (('Grupo', grupo), ('SPRINT', sprint), ('Nome', nome)):
+        if valor != 'Todos':
+            condicoes.append(f'{_nome(coluna)} = ?')
+            parametros.append(valor)
+    return (' WHERE ' + ' AND '.join(condicoes) if condicoes else ''), parametros
+
+
+# Cópia das abas da planilha num banco SQLite indexado, alternativa ao xlsx
+# para as consultas do dashboard. Cada linha de `doacoes` guarda a posição
+# dela na aba (coluna `linha`), então uma versão nova que só acrescentou
+# doações apaga e insere apenas as linhas depois das `linhas_iguais` da
+# ingestão incremental. As consultas do dashboard leem a tabela `cubo`, os
+# agregados por grupo, sprint, categoria e nome (como o cubo em memória),
+# mantida na mesma transação. As conexões ficam num pool: cada consulta pega uma
+# livre e a devolve; com WAL, leituras seguem durante a sincronização, que
+# roda numa transação só (um escritor por vez). Com a ingestão, as doações
+# ficam só aqui: a tabela de dados, o histórico de cada participante e a
+# exportação são consultas nas linhas gravadas.
+class BancoDoacoes:
+    def __init__(self, caminho=BANCO_DOACOES, conexoes=CONEXOES_BANCO):
+        self.caminho = caminho
+        self.estatisticas = EstatisticasBanco()
+        self.ultimo_erro = None
+        self._livres = queue.LifoQueue()
+        self._vagas = threading.BoundedSemaphore(max(1, conexoes))
+        self._escrita = threading.Lock()
+        # Protege os contadores das estatísticas, atualizados de várias threads
+        self._lock = threading.Lock()
+        with self.conexao() as conexao:
+            conexao.execute('CREATE TABLE IF NOT EXISTS meta (chave TEXT PRIMARY KEY, valor TEXT)')
+            meta = dict(conexao.execute("SELECT chave, valor FROM meta WHERE chave IN ('versao', 'esquema')"))
+        # Versão (hash do conteúdo da planilha) dos dados gravados no banco
+        self.versao = meta.get('versao')
+        # Tipos das colunas de cada tabela gravada, para restaurar as linhas lidas
+        self.esquema = json.loads(meta['esquema']) if 'esquema' in meta else {}
+
+    def _abrir(self):
+        conexao = sqlite3.connect(self.caminho, timeout=30, isolation_level=None, check_same_thread=False)
+        conexao.execute('PRAGMA journal_mode=WAL')
+        conexao.execute('PRAGMA synchronous=NORMAL')
+        conexao.create_function('contem', 2, _contem, deterministic=True)
+        with self._lock:
+            self.estatisticas.conexoes += 1
+        return conexao
+
+    # Conexão do pool (aberta na primeira vez que faltar uma livre); quem
+    # pede com todas em uso espera alguma ser devolvida
+    @contextlib.contextmanager
+    def conexao(self):
+        with self._vagas:
+            try:
+                conexao = self._livres.get_nowait()
+            except queue.Empty:
+                conexao = self._abrir()
+            try:
+                yield conexao
+            finally:
+                self._livres.put(conexao)
+
+    def fechar(self):
+        while True:
+            try:
+                self._livres.get_nowait().close()
+            except queue.Empty:
+                return
+
+    @property
+    def bytes_em_disco(self):
+        return sum(os.path.getsize(self.caminho + sufixo) for sufixo in ('', '-wal')
+                   if os.path.exists(self.caminho + sufixo))
+
+    # (Re)cria a tabela quando as colunas da aba mudaram; True se recriou
+    @staticmethod
+    def _preparar_tabela(conexao, tabela, frame):
+        colunas = [('linha', 'INTEGER')] + [(str(coluna), _tipo(frame[coluna])) for coluna in frame.columns]
+        existentes = [(nome, tipo) for _, nome, tipo, *_ in conexao.execute(f'PRAGMA table_info({_nome(tabela)})')]
+        if existentes == colunas:
+            return False
+        conexao.execute(f'DROP TABLE IF EXISTS {_nome(tabela)}')
+        definicoes = ', '.join(f'{_nome(nome)} {tipo}' for nome, tipo in colunas[1:])
+        conexao.execute(f'CREATE TABLE {_nome(tabela)} (linha INTEGER PRIMARY KEY, {definicoes})')
+        return True
+
+    # Insere as linhas da aba a partir da posição `inicio`; a primeira linha
+    # do frame é a da posição `deslocamento` (as anteriores já estão no banco)
+    @staticmethod
+    def _inserir(conexao, tabela, frame, inicio=0, deslocamento=0):
+        colunas = [_valores(frame[coluna].iloc[inicio - deslocamento:]) for coluna in frame.columns]
+        marcadores = ', '.join('?' * (len(frame.columns) + 1))
+        comando = f'INSERT INTO {_nome(tabela)} VALUES ({marcadores})'
+        total = deslocamento + len(frame)
+        for bloco in range(0, total - inicio, LOTE_INSERCAO):
+            fim = min(bloco + LOTE_INSERCAO, total - inicio)
+            conexao.executemany(comando, zip(range(inicio + bloco, inicio + fim),
+                                             *(valores[bloco:fim] for valores in colunas)))
+        return max(total - inicio, 0)
+
+    # Dimensões e medidas do cubo presentes nas doações gravadas
+    @staticmethod
+    def _colunas_cubo(conexao):
+        colunas = {nome for _, nome, *_ in conexao.execute('PRAGMA table_info(doacoes)')}
+        return [c for c in DIMENSOES_CUBO if c in colunas], [c for c in MEDIDAS_CUBO if c in colunas]
+
+    # Soma das medidas e contagem de doações por combinação das dimensões,
+    # para as doações a partir da linha `primeira`
+    @staticmethod
+    def _agregacao(dimensoes, medidas):
+        colunas = ', '.join(map(_nome, dimensoes))
+        somas = ''.join(f', COALESCE(SUM({_nome(medida)}), 0)' for medida in medidas)
+        return f'SELECT {colunas}{somas}, COUNT(*) FROM doacoes WHERE linha >= ? GROUP BY {colunas}'
+
+    # Recria a tabela `cubo` (como o cubo de montar_cubo, mais o número de
+    # doações de cada combinação) a partir de todas as doações
+    def _montar_cubo(self, conexao):
+        dimensoes, medidas = self._colunas_cubo(conexao)
+        definicoes = [f'{_nome(c)} TEXT' for c in dimensoes] + [f'{_nome(c)} REAL' for c in medidas]
+        conexao.execute('DROP TABLE IF EXISTS cubo')
+        conexao.execute(f'CREATE TABLE cubo ({", ".join(definicoes)}, Registros INTEGER)')
+        conexao.execute(f'INSERT INTO cubo {self._agregacao(dimensoes, medidas)}', (0,))
+        for indice, campos in INDICES_CUBO.items():
+            if set(campos) <= set(dimensoes):
+                conexao.execute(f'CREATE INDEX {_nome(indice)} ON cubo ({", ".join(map(_nome, campos))})')
+
+    # Soma (ou, com sinal -1, subtrai) no cubo os agregados das doações a
+    # partir da linha `primeira`; combinações sem doações restantes saem
+    def _somar_no_cubo(self, conexao, primeira, sinal):
+        dimensoes, medidas = self._colunas_cubo(conexao)
+        onde = ' AND '.join(f'{_nome(c)} IS ?' for c in dimensoes)
+        atribuicoes = ', '.join(f'{_nome(c)} = {_nome(c)} + ?' for c in [*medidas, 'Registros'])
+        atualizar = f'UPDATE cubo SET {atribuicoes} WHERE {onde}'
+        inserir = f'INSERT INTO cubo VALUES ({", ".join("?" * (len(dimensoes) + len(medidas) + 1))})'
+        for linha in conexao.execute(self._agregacao(dimensoes, medidas), (primeira,)).fetchall():
+            chave, valores = linha[:len(dimensoes)], [sinal * valor for valor in linha[len(dimensoes):]]
+            if conexao.execute(atualizar, [*valores, *chave]).rowcount == 0:
+                conexao.execute(inserir, [*chave, *valores])
+        conexao.execute('DELETE FROM cubo WHERE Registros <= 0')
+
+    # Leva ao banco a versão `dados` da planilha. Se o banco está na
+    # `versao_anterior` e a ingestão garante que as `linhas_iguais`
+    # primeiras doações não mudaram, só o resto é regravado e o cubo recebe
+    # só a diferença (sai o resto antigo, entra o novo); senão a aba é
+    # importada inteira e o cubo remontado. Cadastros são
+    # sempre regravados (são pequenos). Quando as doações do frame começam na
+    # linha `inicio_doacoes` da aba (as anteriores só existem no banco), a
+    # sincronização precisa ser incremental a partir de lá; se não puder,
+    # levanta ValueError. Os `metadados` (JSON) e o esquema de cada tabela
+    # são gravados com a versão. Um erro do SQLite desfaz tudo e fica em
+    # `ultimo_erro`; o banco segue na versão anterior.
+    def sincronizar(self, dados, versao_anterior=None, linhas_iguais=0, inicio_doacoes=0, metadados=None):
+        if dados.hash_conteudo == self.versao:
+            return False
+        inicio = time.perf_counter()
+        participantes, categorias, doacoes = dados.frames
+        esquema = {tabela: _esquema(frame) for tabela, frame in
+                   (('participantes', participantes), ('categorias', categorias), ('doacoes', doacoes))}
+        try:
+            with self._escrita, self.conexao() as conexao:
+                conexao.execute('BEGIN IMMEDIATE')
+                try:
+                    for tabela, frame in (('participantes', participantes), ('categorias', categorias)):
+                        self._preparar_tabela(conexao, tabela, frame)
+                        conexao.execute(f'DELETE FROM {_nome(tabela)}')
+                        self._inserir(conexao, tabela, frame)
+                    recriada = self._preparar_tabela(conexao, 'doacoes', doacoes)
+                    incremental = (not recriada and linhas_iguais > 0 and versao_anterior is not None
+                                   and versao_anterior == self.versao)
+                    primeira = linhas_iguais if incremental else 0
+                    if primeira < inicio_doacoes:
+                        raise ValueError(f'o banco não tem as {inicio_doacoes:,} doações anteriores a esta versão')
+                    for indice, campos in INDICES_DOACOES.items():
+                        if set(campos) <= set(esquema['doacoes']):
+                            conexao.execute(f'CREATE INDEX IF NOT EXISTS {_nome(indice)} '
+                                            f'ON doacoes ({", ".join(map(_nome, campos))})')
+                    if incremental:
+                        self._somar_no_cubo(conexao, primeira, -1)
+                    conexao.execute('DELETE FROM doacoes WHERE linha >= ?', (primeira,))
+                    inseridas = self._inserir(conexao, 'doacoes', doacoes, primeira, inicio_doacoes)
+                    if incremental:
+                        self._somar_no_cubo(conexao, primeira, 1)
+                    else:
+                        self._montar_cubo(conexao)
+                    conexao.executemany('INSERT OR REPLACE INTO meta VALUES (?, ?)', [
+                        ('versao', dados.hash_conteudo), ('linhas', str(inicio_doacoes + len(doacoes))),
+                        ('esquema', json.dumps(esquema)), ('metadados', json.dumps(metadados or {})),
+                    ])
+                    conexao.execute('COMMIT')
+                except BaseException:
+                    conexao.execute('ROLLBACK')
+                    raise
+        except sqlite3.Error as erro:
+            self.ultimo_erro = erro
+            return False
+
+        self.versao = dados.hash_conteudo
+        self.esquema = esquema
+        self.ultimo_erro = None
+        with self._lock:
+            if incremental:
+                self.estatisticas.sincronizacoes_incrementais += 1
+            else:
+                self.estatisticas.sincronizacoes_completas += 1
+            self.estatisticas.linhas_inseridas += inseridas
+            self.estatisticas.tempo_sincronizacao = time.perf_counter() - inicio
+        return True
+
+    def _contar_consulta(self):
+        with self._lock:
+            self.estatisticas.consultas += 1
+
+    def _consultar(self, sql, parametros=()):
+        with self.conexao() as conexao:
+            resultado = pd.read_sql_query(sql, conexao, params=parametros)
+        self._contar_consulta()
+        return resultado
+
+    # Versão gravada, número de doações e os metadados gravados com ela
+    # (None com o banco vazio)
+    def metadados(self):
+        with self.conexao() as conexao:
+            meta = dict(conexao.execute('SELECT chave, valor FROM meta'))
+        self._contar_consulta()
+        if 'versao' not in meta:
+            return None
+        return {**json.loads(meta.get('metadados') or '{}'), 'versao': meta['versao'],
+                'linhas': int(meta.get('linhas', 0))}
+
+    # Participantes e categorias gravados, na ordem da planilha
+    def cadastros(self):
+        return tuple(
+            _restaurar(self._consultar(f'SELECT * FROM {_nome(tabela)} ORDER BY linha'),
+                       self.esquema.get(tabela, {})).reset_index(drop=True)
+            for tabela in ('participantes', 'categorias')
+        )
+
+    # Tipo categórico de cada coluna categórica das doações, com todos os
+    # valores gravados (ordenados, como no astype('category') da carga)
+    def categorias_doacoes(self):
+        tipos = {}
+        with self.conexao() as conexao:
+            for coluna, tipo in self.esquema.get('doacoes', {}).items():
+                if tipo == 'category':
+                    valores = pd.Index([valor for valor, in conexao.execute(
+                        f'SELECT DISTINCT {_nome(coluna)} FROM doacoes WHERE {_nome(coluna)} IS NOT NULL')])
+                    try:
+                        valores = valores.sort_values()
+                    except TypeError:
+                        pass
+                    tipos[coluna] = pd.CategoricalDtype(valores)
+        self._contar_consulta()
+        return tipos
+
+    # WHERE e ORDER BY das doações com os filtros da sidebar, a busca da
+    # tabela de dados (como buscar_texto) e a ordem por `coluna` (como
+    # ordenar_posicoes: estável, vazios por último; sem ela, a da planilha)
+    def _selecao(self, grupo='Todos', sprint='Todos', busca='', coluna=None, crescente=True, nome='Todos'):
+        esquema = self.esquema.get('doacoes', {})
+        extras, parametros = [], []
+        termo = busca.strip().upper()
+        if termo:
+            colunas = [c for c in COLUNAS_BUSCA if esquema.get(c) in TIPOS_TEXTO]
+            extras.append('(' + (' OR '.join(f'contem({_nome(c)}, ?)' for c in colunas) or '0') + ')')
+            parametros = [termo] * len(colunas)
+        onde, parametros_filtros = _filtros(grupo, sprint, extras, nome)
+        ordem = ' ORDER BY linha'
+        if coluna in esquema:
+            ordem = f' ORDER BY {_nome(coluna)} IS NULL, {_nome(coluna)} {"ASC" if crescente else "DESC"}, linha'
+        return onde + ordem, parametros + parametros_filtros
+
+    # Número de doações com os filtros da sidebar e a busca da tabela
+    def contar_doacoes(self, grupo='Todos', sprint='Todos', busca=''):
+        selecao, parametros = self._selecao(grupo, sprint, busca)
+        return int(self._consultar(f'SELECT COUNT(*) AS total FROM doacoes{selecao}', parametros)['total'].iloc[0])
+
+    # Doações filtradas e ordenadas (ver _selecao), `limite` linhas a partir
+    # da `inicio`-ésima (limite None = todas), com os tipos do frame
+    def doacoes(self, grupo='Todos', sprint='Todos', busca='', coluna=None, crescente=True, inicio=0, limite=None,
+                categorias=None):
+        selecao, parametros = self._selecao(grupo, sprint, busca, coluna, crescente)
+        linhas = self._consultar(f'SELECT * FROM doacoes{selecao} LIMIT ? OFFSET ?',
+                                 [*parametros, -1 if limite is None else limite, inicio])
+        return _restaurar(linhas, self.esquema.get('doacoes', {}), categorias)
+
+    # As mesmas doações de doacoes(), em blocos de `tamanho` linhas lidos de
+    # um cursor só: quem percorre (exportação, carga a partir do banco) não
+    # monta todas em memória. A conexão fica com o gerador até ele acabar.
+    def blocos_doacoes(self, grupo='Todos', sprint='Todos', busca='', coluna=None, crescente=True,
+                       tamanho=LOTE_LEITURA, categorias=None):
+        selecao, parametros = self._selecao(grupo, sprint, busca, coluna, crescente)
+        esquema = self.esquema.get('doacoes', {})
+        with self.conexao() as conexao:
+            cursor = conexao.execute(f'SELECT * FROM doacoes{selecao}', parametros)
+            colunas = [descricao[0] for descricao in cursor.description]
+            self._contar_consulta()
+            while linhas := cursor.fetchmany(tamanho):
+                yield _restaurar(pd.DataFrame(linhas, columns=colunas), esquema, categorias)
+
+    # Doações de um participante na ordem do histórico (como
+    # IndiceParticipantes: Data mais recente primeiro, sem data no fim,
+    # empates na ordem da planilha), restritas aos filtros da sidebar
+    def historico(self, nome, grupo='Todos', sprint='Todos'):
+        esquema = self.esquema.get('doacoes', {})
+        onde, parametros = _filtros(grupo, sprint, nome=nome)
+        ordem = ' ORDER BY linha'
+        if esquema.get('Data', '').startswith('datetime64'):
+            ordem = ' ORDER BY "Data" IS NULL, "Data" DESC, linha'
+        return _restaurar(self._consultar(f'SELECT * FROM doacoes{onde}{ordem}', parametros), esquema)
+
+    # Doações nas posições dadas da aba, na mesma ordem
+    def doacoes_nas_linhas(self, posicoes):
+        posicoes = [int(posicao) for posicao in posicoes]
+        linhas = self._consultar(
+            f'SELECT * FROM doacoes WHERE linha IN ({", ".join("?" * len(posicoes)) or "NULL"})', posicoes
+        )
+        return _restaurar(linhas, self.esquema.get('doacoes', {})).reindex(posicoes)
+
+    # Soma de `medida` por `dimensao` com os filtros da sidebar (como
+    # totais_por; com `validos`, sem os rótulos vazios, como totais_validos)
+    def totais(self, dimensao, grupo='Todos', sprint='Todos', medida='Total_Geral', validos=False):
+        extras = [f'{_nome(dimensao)} IS NOT NULL']
+        if validos:
+            extras.append(f"{_nome(dimensao)} NOT IN ('', 'nan', 'NaN')")
+        onde, parametros = _filtros(grupo, sprint, extras)
+        totais = self._consultar(
+            f'SELECT {_nome(dimensao)}, SUM({_nome(medida)}) AS {_nome(medida)} FROM cubo{onde} '
+            f'GROUP BY {_nome(dimensao)} ORDER BY {_nome(dimensao)}', parametros
+        )
+        return totais.set_index(dimensao)[medida].astype('float64')
+
+    # Métricas principais com os filtros da sidebar (como resumo_geral); com
+    # `nome`, as de um participante
+    def resumo(self, grupo='Todos', sprint='Todos', nome='Todos'):
+        onde, parametros = _filtros(grupo, sprint, nome=nome)
+        linha = self._consultar(
+            'SELECT COALESCE(SUM("Total_Geral"), 0) AS total_pontos, COALESCE(SUM("Quantidade"), 0) AS total_doacoes, '
+            f'COUNT(DISTINCT "Grupo") AS grupos_ativos, COUNT(DISTINCT "Nome") AS participantes_ativos FROM cubo{onde}',
+            parametros
+        ).iloc[0]
+        return ResumoGeral(float(linha['total_pontos']), float(linha['total_doacoes']),
+                           int(linha['grupos_ativos']), int(linha['participantes_ativos']))
+
+    # Ranking de todos os participantes com os filtros da sidebar (como
+    # calcular_ranking): a soma por nome e a junção com o cadastro em SQL
+    def ranking(self, grupo='Todos', sprint='Todos'):
+        onde, parametros = _filtros(grupo, sprint)
+        ranking = self._consultar(
+            'SELECT p."Nome", p."Grupo", COALESCE(t.Total_Pontos, 0) AS Total_Pontos, '
+            'COALESCE(t.Total_Doacoes, 0) AS Total_Doacoes FROM participantes p LEFT JOIN ('
+            f'SELECT "Nome", SUM("Total_Geral") AS Total_Pontos, SUM("Quantidade") AS Total_Doacoes FROM cubo{onde} '
+            'GROUP BY "Nome") t ON t."Nome" = p."Nome" ORDER BY p.linha',
+            parametros
+        )
+        return numerar_ranking(ranking)
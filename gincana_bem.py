@@ -1,10 +1,24 @@
+import io
+import os
+import time
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import numpy as np
 
+from gincana_calculos import (FREQUENCIAS, VERIFICACOES_PONTOS, CacheResultados, IndiceParticipantes, acumulado_por,
+                              buscar_texto, calcular_ranking, fatiar_cubo, montar_cubo, montar_serie_diaria, montar_tabela_metas, ordenar_posicoes,
+                              opcoes_filtro, pagina_de, posicoes_filtradas, progresso_metas, ranking_grupos_edicoes,
+                              resumo_geral, ritmo_diario, totais_por, totais_validos, validar_pontos)
+from gincana_dados import (FORMATOS_EXPORTACAO, INTERVALO_ATUALIZACAO, PLANILHAS_FEDERADAS, AtualizadorPlanilha,
+                           FontePlanilha, IngestaoIncremental, RegistroPlanilhas, exportar_blocos, exportar_doacoes,
+                           ler_registro)
+from gincana_graficos import (CacheFiguras, grafico_categorias_do_grupo, grafico_corrida, grafico_grupos_edicoes,
+                               grafico_pizza, grafico_pontos_por_grupo, grafico_pontos_por_sprint)
+from gincana_perfil import Cronometro, exportar_jsonl, perfil_ativo
+from gincana_banco import BANCO_DOACOES, BancoDoacoes
+from gincana_sinteticos import cadastros_demo, gerar_doacoes
+
 # Configuração da página
 st.set_page_config(
     page_title="Gincana do Bem| Netsupre",
@@ -13,6 +27,10 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Perfil de tempo do rerun (GINCANA_PERFIL=1 ou ?perfil=1 na URL); desligado
+# não mede nada
+perfil = Cronometro(perfil_ativo(st.query_params.get('perfil')))
+
 # CSS personalizado
 st.markdown("""
 <style>
@@ -59,122 +77,238 @@ st.markdown("""
 # Título principal
 st.markdown('<div class="main-header">🎄 Gincana do Bem 2025 🎄 Netsupre </div>', unsafe_allow_html=True)
 
-# Caminho absoluto da planilha (URL raw do GitHub)
-PLANILHA_PATH = 'https://raw.githubusercontent.com/Tiagoalvesds/gincana_do_bem/main/planilha_gincana_solidaria.xlsx'
+# Caminho absoluto da planilha (URL raw do GitHub); GINCANA_PLANILHA aponta
+# para outra fonte (ex.: um arquivo local nos benchmarks)
+PLANILHA_PATH = os.environ.get(
+    'GINCANA_PLANILHA',
+    'https://raw.githubusercontent.com/Tiagoalvesds/gincana_do_bem/main/planilha_gincana_solidaria.xlsx'
+)
 
-# Função para carregar dados
-@st.cache_data
+# Fonte da planilha compartilhada pelo processo: guarda ETag/Last-Modified
+# para que recarregar um arquivo inalterado custe apenas um 304
+@st.cache_resource
+def get_fonte_planilha():
+    return FontePlanilha(PLANILHA_PATH)
+
+# Ingestão da planilha compartilhada pelo processo: numa recarga em que as
+# doações anteriores não mudaram, só as linhas novas são lidas e somadas
+@st.cache_resource
+def get_ingestao():
+    return IngestaoIncremental(get_fonte_planilha(), banco=get_banco())
+
+# Banco SQLite das doações (GINCANA_BANCO), sincronizado pela ingestão a cada
+# versão nova da planilha; None quando desligado
+@st.cache_resource
+def get_banco():
+    return BancoDoacoes(BANCO_DOACOES) if BANCO_DOACOES else None
+
+# Atualizador em segundo plano (uma thread por processo): consulta a planilha
+# a cada GINCANA_INTERVALO_ATUALIZACAO segundos e troca os dados de uma vez
+@st.cache_resource
+def get_atualizador():
+    return AtualizadorPlanilha(get_ingestao()).iniciar()
+
+# Registro das planilhas de outras edições e unidades (GINCANA_PLANILHAS),
+# carregadas em paralelo e mantidas pelo seu próprio atualizador
+@st.cache_resource
+def get_registro():
+    return RegistroPlanilhas(ler_registro(PLANILHAS_FEDERADAS))
+
+@st.cache_resource
+def get_atualizador_registro():
+    return AtualizadorPlanilha(get_registro()).iniciar()
+
+# Cache de figuras Plotly prontas, compartilhado pelas sessões do processo
+@st.cache_resource
+def get_cache_figuras():
+    return CacheFiguras()
+
+# Figura de um gráfico para a versão dos dados e os filtros atuais da
+# sidebar (`extras` completa a chave, ex.: o grupo ou participante em
+# análise); só é montada se ainda não estiver no cache
+def figura_em_cache(id_grafico, montar, *extras):
+    chave = (versao_dados, grupo_selecionado, sprint_selecionada, id_grafico, *extras)
+    return get_cache_figuras().obter(chave, montar)
+
+# Cache de resultados derivados (totais, rankings, posições), compartilhado
+# pelas sessões do processo
+@st.cache_resource
+def get_cache_resultados():
+    return CacheResultados()
+
+# Resultado de um cálculo para a versão dos dados e os filtros atuais da
+# sidebar (`extras` completa a chave, como em figura_em_cache); sessões que
+# pedem o mesmo resultado ao mesmo tempo esperam um único cálculo
+def resultado_em_cache(id_resultado, calcular, *extras):
+    chave = (versao_dados, grupo_selecionado, sprint_selecionada, id_resultado, *extras)
+    return get_cache_resultados().obter(chave, calcular)
+
+# Tempo decorrido em texto curto ("agora", "há 5 min")
+def tempo_decorrido(segundos):
+    if segundos < 5:
+        return "agora"
+    if segundos < 60:
+        return f"há {segundos:.0f} s"
+    if segundos < 3600:
+        return f"há {segundos / 60:.0f} min"
+    if segundos < 86400:
+        return f"há {segundos / 3600:.0f} h"
+    return f"há {segundos / 86400:.0f} dias"
+
+# Indicador de atualização (no lugar do aviso de carga): de quando são os
+# dados na tela e se a consulta à planilha em segundo plano está em dia
+def indicador_atualizacao(dados, ingestao, atualizador):
+    registros = f"{dados.total_doacoes:,} registros"
+    if ingestao.confirmado_em is None:
+        salvo_em = time.strftime('%d/%m %H:%M', time.localtime(ingestao.salvo_em or 0))
+        if atualizador.ultimo_erro is not None:
+            st.error(f"🔴 Sem acesso à planilha - mostrando os dados salvos em {salvo_em} ({registros}). "
+                     f"Erro: {atualizador.ultimo_erro}")
+        else:
+            st.warning(f"🟡 Mostrando os dados salvos em {salvo_em} ({registros}); buscando a versão mais "
+                       f"recente da planilha em segundo plano - ela aparece na próxima interação.")
+    elif atualizador.ultimo_erro is not None:
+        st.warning(f"🟠 Dados confirmados {tempo_decorrido(time.time() - ingestao.confirmado_em)} ({registros}); "
+                   f"a última consulta à planilha falhou: {atualizador.ultimo_erro}")
+    else:
+        st.success(f"🟢 Dados em dia - confirmados com a planilha "
+                   f"{tempo_decorrido(time.time() - ingestao.confirmado_em)} ({registros}).")
+
+# Função para carregar dados: todas as sessões leem os mesmos frames, sem
+# cópia a cada rerun e sem consultar a fonte (quem consulta é o atualizador);
+# o app só lê os DataFrames, nunca os altera
 def load_data():
     try:
-        # Carregar as abas da planilha diretamente da URL
-        participantes = pd.read_excel(PLANILHA_PATH, sheet_name='participantes')
-        categorias = pd.read_excel(PLANILHA_PATH, sheet_name='categorias')
-        doacoes = pd.read_excel(PLANILHA_PATH, sheet_name='doacoes_registros')
-        
-      
-        # Converter coluna Grupo para string para evitar problemas de tipo
-        participantes['Grupo'] = participantes['Grupo'].astype(str)
-        if 'Grupo' in doacoes.columns:
-            doacoes['Grupo'] = doacoes['Grupo'].astype(str)
-        
-        # Processar dados das doações - converter colunas numéricas
-        colunas_numericas = ['Pontos_Total', 'Total_Geral', 'Quantidade', 'Pontos_Unit', 'Bonus']
-        for col in colunas_numericas:
-            if col in doacoes.columns:
-                # Extrair apenas valores numéricos das fórmulas
-                doacoes[col] = doacoes[col].apply(lambda x: 
-                    float(str(x).replace('=G', '').replace('*H', '').split('*')[0]) 
-                    if isinstance(x, str) and '=' in str(x) 
-                    else x
-                )
-                doacoes[col] = pd.to_numeric(doacoes[col], errors='coerce').fillna(0)
+        ingestao = get_ingestao()
+        # Stale-while-revalidate: com o atualizador rodando, a primeira
+        # pintura usa o último snapshot bom em disco, sem esperar a rede; o
+        # atualizador (iniciado logo depois) baixa a planilha e troca os dados
+        dados = ingestao.anteriores() if INTERVALO_ATUALIZACAO > 0 else None
+        atualizador = get_atualizador()
+        if dados is None:
+            # Sem snapshot: a primeira carga do processo baixa a planilha; depois
+            # o xlsx só é interpretado de novo quando o conteúdo muda (senão vem
+            # do snapshot colunar em disco ou da ingestão incremental)
+            with st.spinner("⏳ Baixando e lendo a planilha..."):
+                dados = ingestao.atual()
+        falha = ingestao.ultima_falha
+        if dados is None and falha is not None:
+            # A primeira carga falhou: as sessões não tentam de novo (cada
+            # tentativa espera a rede); o atualizador ou o botão de recarga tenta
+            erro, falhou_em = falha
+            st.error(f"❌ Erro ao carregar dados ({time.strftime('%d/%m %H:%M', time.localtime(falhou_em))}): {erro}")
+            if atualizador.ativo:
+                st.info(f"💡 Nova tentativa em segundo plano a cada {INTERVALO_ATUALIZACAO:.0f} s. Verifique se "
+                        "a planilha está no formato correto e se todas as abas existem")
+            else:
+                st.info("💡 Use 🔄 Recarregar Dados na barra lateral para tentar de novo. Verifique se a planilha "
+                        "está no formato correto e se todas as abas existem")
+            return None
+        if dados is None:
+            # A falha acabou de ser superada pelo atualizador
+            dados = ingestao.dados
         
-        st.success(f"✅ Dados carregados com sucesso! {len(doacoes)} registros encontrados.")
-        return participantes, categorias, doacoes
+        indicador_atualizacao(dados, ingestao, atualizador)
+        return dados
         
     except Exception as e:
         st.error(f"❌ Erro ao carregar dados: {e}")
         st.info("💡 Dica: Verifique se a planilha está no formato correto e se todas as abas existem")
-        return None, None, None
+        return None
 # Função para criar dados de demonstração
 def create_demo_data():
     st.warning("📊 Usando dados de demonstração - Carregue sua planilha para ver os dados reais")
     
-    # Dados de exemplo baseados na sua planilha original
-    participantes = pd.DataFrame({
-        'Nome': [
-            'Alexandre Alves', 'Ana Paula Martins', 'Bruno Hudson', 'Danillo Rodrigues',
-            'Durga', 'Eurípedes Lemes', 'Geovany Marcos', 'Gustavo Cordeiro', 'Igor Moreira',
-            'Ismael', 'Jessica Alcantara', 'Jorge Henrique', 'Jorge Nazaré', 'Kamila Nascimento',
-            'Lucas Dias', 'Lucas Rodrigues', 'Matheus Lima', 'Maycon cordeiro', 'Milena Jorge',
-            'Osias Fernando', 'Pabllo Gomes', 'Patricia Barbosa', 'Raécio Griêco', 'Thiago Porto',
-            'Tiago Alves', 'Wanderson Saldanha','Leonardo Max Pereira'
-        ],
-        'Grupo': ['MOTIVADOS NETSUPRE', 'VIRTUX', 'VIRTUX', 'VIRTUX', 'MOTIVADOS NETSUPRE', 'PACE DO BEM', 'PACE DO BEM', 'VIRTUX', 
-                 'MOTIVADOS NETSUPRE', 'PACE DO BEM', 'MOTIVADOS NETSUPRE', 'PACE DO BEM', 'VIRTUX', 'VIRTUX', 'MOTIVADOS NETSUPRE', 'PACE DO BEM', 
-                 'MOTIVADOS NETSUPRE', 'PACE DO BEM', 'PACE DO BEM', 'MOTIVADOS NETSUPRE', 'MOTIVADOS NETSUPRE', 'VIRTUX', 'PACE DO BEM', 'PACE DO BEM', 
-                 'VIRTUX', 'MOTIVADOS NETSUPRE','VIRTUX']
-    })
-    
-    categorias = pd.DataFrame({
-        'Categoria': ['Brinquedos', 'Brinquedos', 'Roupas', 'Roupas', 'Material Escolar', 'Material Escolar', 'Alimentos', 'Alimentos', 'Higiene', 'Higiene'],
-        'Tipo_Item': ['Novo', 'Usado bom estado', 'Peça de roupa', 'Par de calçados', 'Item individual', 'Kit completo', 'Kg solto', 'Cesta básica', 'Item de higiene', 'Pacote de fraldas'],
-        'Pontos_Unit': [5, 3, 3, 5, 4, 10, 2, 5, 4, 6],
-        'Meta_Grupo': [100, 100, 150, 150, 80, 80, 500, 500, 200, 200],
-        'Bonus_Condicao': [
-            'Instituição específica', 'Instituição específica', 'Itens lavados/organizados',
-            'Itens lavados/organizados', 'Foco em 2026', 'Foco em 2026', 'Consistência semanal',
-            'Consistência semanal', 'Embalagens coletivas', 'Embalagens coletivas'
-        ],
-        'Bonus_Pontos': [50, 50, 40, 40, 60, 60, 20, 20, 30, 30]
-    })
-    
-    # Gerar dados de doações realistas
-    np.random.seed(42)
-    doacoes_data = []
-    sprints = ['1ºSPRINT', '2ºSPRINT', '3ºSPRINT']
-    categorias_list = ['Brinquedos', 'Roupas', 'Material Escolar', 'Alimentos', 'Higiene']
-    
-    for i in range(50):
-        nome = np.random.choice(participantes['Nome'])
-        grupo = participantes[participantes['Nome'] == nome]['Grupo'].iloc[0]
-        categoria = np.random.choice(categorias_list)
-        tipo_item = np.random.choice(categorias[categorias['Categoria'] == categoria]['Tipo_Item'].values)
-        pontos_unit = categorias[
-            (categorias['Categoria'] == categoria) & 
-            (categorias['Tipo_Item'] == tipo_item)
-        ]['Pontos_Unit'].iloc[0]
-        
-        quantidade = np.random.randint(1, 10)
-        pontos_total = quantidade * pontos_unit
-        bonus = np.random.choice([0, 20, 30, 40, 50, 60], p=[0.7, 0.1, 0.05, 0.05, 0.05, 0.05])
-        total_geral = pontos_total + bonus
-        
-        doacoes_data.append({
-            'SPRINT': np.random.choice(sprints),
-            'Data': f"2024-{np.random.randint(10, 13):02d}-{np.random.randint(1, 28):02d}",
-            'Nome': nome,
-            'Grupo': grupo,
-            'Categoria': categoria,
-            'Tipo_Item': tipo_item,
-            'Quantidade': quantidade,
-            'Pontos_Unit': pontos_unit,
-            'Pontos_Total': pontos_total,
-            'Bonus': bonus,
-            'Total_Geral': total_geral,
-            'Observações': 'Doação registrada' if bonus == 0 else 'Doação com bônus'
-        })
-    
-    doacoes = pd.DataFrame(doacoes_data)
+    # Dados de exemplo baseados na sua planilha original, com 50 doações sorteadas
+    participantes, categorias = cadastros_demo()
+    doacoes = gerar_doacoes(participantes, categorias, 50)
     
     return participantes, categorias, doacoes
 
+# Cubo de agregados (Grupo x SPRINT x Categoria x Nome), montado uma vez por
+# versão dos dados; filtros e abas leem fatias dele em vez das doações brutas
+@st.cache_data
+def get_cubo(versao_dados, _doacoes):
+    return montar_cubo(_doacoes)
+
+# Série diária dos dados de demonstração (a da planilha é mantida pela ingestão)
+@st.cache_data
+def get_serie_diaria(versao_dados, _doacoes):
+    return montar_serie_diaria(_doacoes)
+
+# Tabela de metas dos dados de demonstração
+@st.cache_data
+def get_tabela_metas(versao_dados, _doacoes, _categorias):
+    return montar_tabela_metas(_doacoes, _categorias)
+
+# Validação de pontos dos dados de demonstração
+@st.cache_data
+def get_relatorio_pontos(versao_dados, _doacoes, _categorias):
+    return validar_pontos(_doacoes, _categorias)
+
+# Índice de participantes dos dados de demonstração (os da planilha já vêm
+# com o índice montado na carga)
+@st.cache_resource(max_entries=1)
+def get_indice_participantes(versao_dados, _participantes, _doacoes):
+    return IndiceParticipantes(_participantes, _doacoes)
+
+# Posições das doações para cada combinação de filtros (compartilhadas entre
+# sessões pelo cache de resultados, sem a cópia que o st.cache_data faz a
+# cada leitura); o DataFrame de doações nunca é copiado para filtrar. Cada
+# nova versão dos dados trazida pelo atualizador gera novas chaves e as
+# antigas saem pelo limite de memória do cache
+def get_posicoes_filtradas(versao_dados, grupo, sprint, doacoes):
+    return get_cache_resultados().obter(
+        (versao_dados, grupo, sprint, 'posições filtradas'), lambda: posicoes_filtradas(doacoes, grupo, sprint)
+    )
+
+# Linhas da tabela de dados (filtros da sidebar + busca + ordenação) como
+# posições nas doações; cada página só recorta essas posições
+def get_posicoes_tabela(versao_dados, grupo, sprint, busca, coluna_ordem, crescente, doacoes):
+    def calcular():
+        posicoes = get_posicoes_filtradas(versao_dados, grupo, sprint, doacoes)
+        posicoes = buscar_texto(doacoes, posicoes, busca)
+        return ordenar_posicoes(doacoes, posicoes, coluna_ordem, crescente)
+
+    return get_cache_resultados().obter(
+        (versao_dados, grupo, sprint, 'posições da tabela', busca, coluna_ordem, crescente), calcular
+    )
+
 # Carregar dados
-participantes, categorias, doacoes = load_data()
+with perfil.etapa('carga'):
+    dados = load_data()
 
-# Se não conseguiu carregar os dados reais, usar dados de demonstração
-if participantes is None:
-    participantes, categorias, doacoes = create_demo_data()
+    # Se não conseguiu carregar os dados reais, usar dados de demonstração
+    if dados is None:
+        participantes, categorias, doacoes = create_demo_data()
+        versao_dados = 'demo'
+        cubo = get_cubo(versao_dados, doacoes)
+        indice_participantes = get_indice_participantes(versao_dados, participantes, doacoes)
+        serie_diaria = get_serie_diaria(versao_dados, doacoes)
+        tabela_metas = get_tabela_metas(versao_dados, doacoes, categorias)
+        relatorio_pontos = get_relatorio_pontos(versao_dados, doacoes, categorias)
+        placar = None
+    else:
+        participantes, categorias, doacoes = dados.frames
+        versao_dados = dados.hash_conteudo
+        # Cubo mantido pela ingestão: numa recarga incremental recebe só os totais novos
+        cubo = dados.cubo
+        indice_participantes = dados.indice_participantes
+        serie_diaria = dados.serie_diaria
+        tabela_metas = dados.tabela_metas
+        relatorio_pontos = dados.relatorio_pontos
+        # Posições de cada atualização, fotografadas pela ingestão
+        placar = get_ingestao().placar
+
+    # Com o banco em dia com os dados exibidos, totais por grupo, sprint e
+    # categoria e o ranking saem de consultas SQL em vez do cubo em memória
+    banco = get_banco() if dados is not None else None
+    if banco is not None and banco.versao != versao_dados:
+        banco = None
+    # Depois de sincronizadas, as doações ficam só no banco: a tabela de
+    # dados, o histórico de cada participante e a exportação o consultam
+    doacoes_no_banco = banco is not None and dados.doacoes_no_banco
+    total_doacoes = dados.total_doacoes if dados is not None else len(doacoes)
 
 # ✅ Efeito balões ao abrir
 st.balloons()
@@ -182,116 +316,122 @@ st.balloons()
 # Sidebar - Filtros
 st.sidebar.title("🔍 Filtros e Controles")
 
-# Filtro por Grupo - CORRIGIDO: converter para string antes de ordenar
-grupos_unicos = [str(grupo) for grupo in participantes['Grupo'].unique()]
-# Remover valores NaN ou vazios
-grupos_unicos = [g for g in grupos_unicos if g and str(g) != 'nan' and str(g) != 'NaN']
-grupos_disponiveis = ['Todos'] + sorted(grupos_unicos, key=lambda x: (x.isdigit(), int(x) if x.isdigit() else x))
-grupo_selecionado = st.sidebar.selectbox('Selecionar Grupo:', grupos_disponiveis)
-
-# Filtro por Sprint
-sprints_unicos = [str(s) for s in doacoes['SPRINT'].dropna().unique()] if 'SPRINT' in doacoes.columns else []
-# Remover valores NaN ou vazios
-sprints_unicos = [s for s in sprints_unicos if s and str(s) != 'nan' and str(s) != 'NaN']
-sprints_disponiveis = ['Todos'] + sorted(sprints_unicos)
-sprint_selecionada = st.sidebar.selectbox('Selecionar Sprint:', sprints_disponiveis)
-
-# Aplicar filtros
-doacoes_filtradas = doacoes.copy()
-if grupo_selecionado != 'Todos':
-    doacoes_filtradas = doacoes_filtradas[doacoes_filtradas['Grupo'] == grupo_selecionado]
-if sprint_selecionada != 'Todos' and 'SPRINT' in doacoes_filtradas.columns:
-    doacoes_filtradas = doacoes_filtradas[doacoes_filtradas['SPRINT'] == sprint_selecionada]
-
-# Abas principais
-tab1, tab2, tab3, tab4, tab5 = st.tabs(["🏆 Dashboard Geral", "📊 Por Sprint", "👥 Por Grupo", "👤 Individual", "📋 Tabela de Dados"])
-
-with tab1:
+with perfil.etapa('filtros'):
+    # Filtro por Grupo - CORRIGIDO: grupos como texto, sem valores NaN ou vazios
+    grupos_disponiveis = ['Todos'] + opcoes_filtro(participantes['Grupo'])
+    grupo_selecionado = st.sidebar.selectbox('Selecionar Grupo:', grupos_disponiveis)
+
+    # Filtro por Sprint
+    sprints_disponiveis = ['Todos'] + (opcoes_filtro(cubo['SPRINT']) if 'SPRINT' in cubo.columns else [])
+    sprint_selecionada = st.sidebar.selectbox('Selecionar Sprint:', sprints_disponiveis)
+
+    # Aplicar filtros - agregados vêm da fatia do cubo; as doações brutas só são
+    # selecionadas (por posição) no histórico individual e na tabela de dados
+    cubo_filtrado = resultado_em_cache(
+        'cubo filtrado', lambda: fatiar_cubo(cubo, grupo_selecionado, sprint_selecionada)
+    )
+
+# Seções principais - cada uma é uma função executada só quando escolhida
+# (ver SECOES abaixo)
+
+# Seção Dashboard Geral: métricas, pontuação por grupo, timeline e metas
+def secao_dashboard():
     st.header("🎯 Visão Geral da Gincana")
     
     # Métricas principais - CORRIGIDO: total_doacoes agora soma a coluna Quantidade
     col1, col2, col3, col4 = st.columns(4)
     
-    total_pontos = doacoes_filtradas['Total_Geral'].sum() if 'Total_Geral' in doacoes_filtradas.columns else 0
-    total_doacoes = doacoes_filtradas['Quantidade'].sum() if 'Quantidade' in doacoes_filtradas.columns else 0
-    grupos_ativos = doacoes_filtradas['Grupo'].nunique() if 'Grupo' in doacoes_filtradas.columns else 0
-    participantes_ativos = doacoes_filtradas['Nome'].nunique() if 'Nome' in doacoes_filtradas.columns else 0
+    resumo = resultado_em_cache('resumo', lambda: banco.resumo(grupo_selecionado, sprint_selecionada) if banco
+                                else resumo_geral(cubo_filtrado))
     
     with col1:
-        st.metric("🏅 Total de Pontos", f"{total_pontos:,.0f}")
+        st.metric("🏅 Total de Pontos", f"{resumo.total_pontos:,.0f}")
     with col2:
-        st.metric("📦 Total de Doações", f"{total_doacoes:,.0f}")
+        st.metric("📦 Total de Doações", f"{resumo.total_doacoes:,.0f}")
     with col3:
-        st.metric("👥 Grupos Ativos", grupos_ativos)
+        st.metric("👥 Grupos Ativos", resumo.grupos_ativos)
     with col4:
-        st.metric("🙋 Participantes Ativos", participantes_ativos)
+        st.metric("🙋 Participantes Ativos", resumo.participantes_ativos)
     
     # COMPARAÇÃO DE PONTUAÇÃO POR GRUPO - BARRAS INDIVIDUALIZADAS
     st.subheader("📈 Comparação de Pontuação por Grupo")
     
-    if 'Grupo' in doacoes_filtradas.columns and 'Total_Geral' in doacoes_filtradas.columns:
+    if 'Grupo' in cubo_filtrado.columns and 'Total_Geral' in cubo_filtrado.columns:
         # Filtrar grupos válidos (remover NaN)
-        pontos_por_grupo = doacoes_filtradas.groupby('Grupo')['Total_Geral'].sum()
-        pontos_por_grupo = pontos_por_grupo[pontos_por_grupo.index.notna()]
-        pontos_por_grupo = pontos_por_grupo[pontos_por_grupo.index.astype(str) != 'nan']
-        pontos_por_grupo = pontos_por_grupo[pontos_por_grupo.index.astype(str) != 'NaN']
-        pontos_por_grupo = pontos_por_grupo.sort_values(ascending=False)
+        pontos_por_grupo = resultado_em_cache('pontos por grupo', lambda: (
+            banco.totais('Grupo', grupo_selecionado, sprint_selecionada, validos=True) if banco
+            else totais_validos(cubo_filtrado, 'Grupo')
+        ).sort_values(ascending=False))
+        
+        # Movimento de cada grupo desde a atualização anterior (o placar é da
+        # gincana inteira, então só aparece sem filtros)
+        if placar is not None and grupo_selecionado == 'Todos' and sprint_selecionada == 'Todos':
+            movimentos = placar.movimentos('grupos', versao=versao_dados).sort_values('Posição')
+            if not movimentos.empty:
+                for coluna, (grupo, movimento) in zip(st.columns(len(movimentos)), movimentos.iterrows()):
+                    variacao, ganhos = movimento['Variação'], movimento['Pontos_Ganhos']
+                    coluna.metric(f"{movimento['Posição']}º {grupo}", f"{movimento['Pontos']:,.0f} pts",
+                                  delta=f"{variacao:+.0f} posição · +{ganhos:,.0f} pts" if pd.notna(variacao) else None,
+                                  delta_color='normal' if variacao else 'off')
+                historico = placar.historico_grupos()
+                if len(historico) > 1:
+                    with st.expander(f"📸 Posições nas últimas {len(historico)} atualizações"):
+                        st.dataframe(historico.sort_index(ascending=False), use_container_width=True)
         
         col1, col2 = st.columns(2)
         
         with col1:
             # GRÁFICO DE BARRAS INDIVIDUALIZADAS - CADA GRUPO COM SUA PRÓPRIA BARRA
             if not pontos_por_grupo.empty:
-                # Criar gráfico com barras individuais para cada grupo
-                fig = go.Figure()
-                
-                # Definir cores específicas para cada grupo
-                cores_grupos = {
-                    'PACE DO BEM': '#FF6B6B',
-                    'MOTIVADOS NETSUPRE': '#4ECDC4', 
-                    'VIRTUX': '#45B7D1'
-                }
-                
-                # Adicionar uma barra para cada grupo individualmente
-                for grupo in pontos_por_grupo.index:
-                    cor = cores_grupos.get(grupo, '#888888')  # Cor padrão se não encontrado
-                    fig.add_trace(go.Bar(
-                        x=[grupo],
-                        y=[pontos_por_grupo[grupo]],
-                        name=grupo,
-                        marker_color=cor,
-                        text=[f"{pontos_por_grupo[grupo]:,.0f}"],
-                        textposition='outside',
-                        hovertemplate=f'<b>{grupo}</b><br>Pontos: %{{y:,.0f}}<extra></extra>'
-                    ))
-                
-                fig.update_layout(
-                    title="Pontuação por Grupo - Comparação Individual",
-                    xaxis_title="Grupos",
-                    yaxis_title="Pontos",
-                    showlegend=False,
-                    height=500
-                )
-                
-                st.plotly_chart(fig, use_container_width=True)
+                with perfil.etapa('gráfico pontos por grupo'):
+                    # Criar gráfico com barras individuais para cada grupo
+                    fig = figura_em_cache(
+                        'pontos por grupo', lambda: grafico_pontos_por_grupo(pontos_por_grupo)
+                    )
+                    st.plotly_chart(fig, use_container_width=True)
             else:
                 st.info("Nenhum dado disponível para exibir o gráfico de grupos.")
         
         with col2:
             # Gráfico de pizza para distribuição percentual
             if not pontos_por_grupo.empty:
-                fig = px.pie(
-                    values=pontos_por_grupo.values,
-                    names=pontos_por_grupo.index,
-                    title="Distribuição Percentual de Pontos",
-                    hole=0.4
-                )
-                st.plotly_chart(fig, use_container_width=True)
+                with perfil.etapa('gráfico distribuição por grupo'):
+                    fig = figura_em_cache('distribuição por grupo', lambda: grafico_pizza(
+                        pontos_por_grupo, "Distribuição Percentual de Pontos", 0.4
+                    ))
+                    st.plotly_chart(fig, use_container_width=True)
             else:
                 st.info("Nenhum dado disponível para exibir o gráfico de pizza.")
     else:
         st.warning("Dados de grupos não disponíveis para exibição")
     
+    # CORRIDA DOS GRUPOS - PONTOS ACUMULADOS AO LONGO DO TEMPO
+    st.subheader("🏁 Corrida dos Grupos")
+    
+    with perfil.etapa('corrida dos grupos'):
+        ritmo_geral, ritmo_recente = resultado_em_cache(
+            'ritmo', lambda: ritmo_diario(serie_diaria, grupo_selecionado, sprint_selecionada)
+        )
+        col1, col2, col3 = st.columns([1, 1, 2])
+        with col1:
+            st.metric("⚡ Ritmo (pontos/dia)", f"{ritmo_geral:,.0f}")
+        with col2:
+            st.metric("🔥 Últimos 7 dias (pontos/dia)", f"{ritmo_recente:,.0f}",
+                      delta=f"{ritmo_recente - ritmo_geral:,.0f}" if ritmo_geral else None)
+        with col3:
+            frequencia = st.radio('Agrupar por:', list(FREQUENCIAS), horizontal=True, key='corrida_frequencia')
+        
+        acumulado = resultado_em_cache('acumulado por grupo', lambda: acumulado_por(
+            serie_diaria, 'Grupo', FREQUENCIAS[frequencia], grupo_selecionado, sprint_selecionada
+        ), frequencia)
+        if not acumulado.empty:
+            fig = figura_em_cache('corrida dos grupos', lambda: grafico_corrida(
+                acumulado, f"Pontos Acumulados por Grupo ({frequencia.lower()})"
+            ), frequencia)
+            st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.info("Nenhuma doação com data para exibir a corrida dos grupos.")
+    
     # TIMELINE DA GINCANA - DATAS CORRIGIDAS
     st.subheader("🗓️ Timeline da Gincana")
     
@@ -321,39 +461,51 @@ with tab1:
     # PROGRESSO DAS METAS - ATUALIZADO COM DADOS REAIS DA PLANILHA
     st.subheader("🎯 Progresso das Metas")
     
-    if 'Categoria' in doacoes_filtradas.columns and 'Quantidade' in doacoes_filtradas.columns:
-        # Usar as metas definidas na planilha de categorias
-        metas = categorias.groupby('Categoria')['Meta_Grupo'].first()
-        
-        # Calcular progresso real baseado nas doações
-        progresso = doacoes_filtradas.groupby('Categoria')['Quantidade'].sum()
-        
-        # Mostrar progresso para cada categoria definida na planilha
-        for categoria in categorias['Categoria'].unique():
-            if categoria in metas.index:
-                meta = metas[categoria]
-                progresso_atual = progresso.get(categoria, 0)  # 0 se não houver doações
-                percentual = min(progresso_atual / meta * 100, 100) if meta > 0 else 0
-                
-                col1, col2 = st.columns([3, 1])
-                with col1:
-                    st.write(f"**{categoria}**")
-                    st.progress(percentual / 100)
-                with col2:
-                    st.write(f"**{progresso_atual:,} / {meta:,}**")
-                    st.write(f"({percentual:.1f}%)")
+    # Meta de cada grupo por categoria (Meta_Grupo do catálogo), com a
+    # previsão pelo ritmo de doações do período filtrado; todas as barras
+    # saem de uma tabela só
+    with perfil.etapa('progresso das metas'):
+        def calcular_progresso():
+            periodo = fatiar_cubo(serie_diaria, sprint=sprint_selecionada)['Dia']
+            return progresso_metas(
+                tabela_metas, categorias, grupos_disponiveis[1:], periodo.min(), periodo.max(),
+                grupo_selecionado, sprint_selecionada
+            )
+        progresso = resultado_em_cache('progresso das metas', calcular_progresso)
+    
+    if not progresso.empty:
+        dias_para_meta = progresso['Dias_Para_Meta']
+        no_ritmo = 'em ~' + dias_para_meta.where(np.isfinite(dias_para_meta), 0).astype('int64').astype(str) + ' dias'
+        situacao = np.where(progresso['Faltam'] == 0, '✅ Meta atingida',
+                            np.where(np.isfinite(dias_para_meta), no_ritmo, 'sem doações no período'))
+        st.dataframe(
+            progresso[['Grupo', 'Categoria', 'Percentual', 'Quantidade', 'Meta_Grupo', 'Faltam', 'Ritmo',
+                       'Previsao']].assign(Situacao=situacao),
+            column_config={
+                'Percentual': st.column_config.ProgressColumn('Progresso', format='%.1f%%', min_value=0, max_value=100),
+                'Quantidade': st.column_config.NumberColumn('Doado', format='%.2f'),
+                'Meta_Grupo': st.column_config.NumberColumn('Meta', format='%.0f'),
+                'Faltam': st.column_config.NumberColumn('Faltam', format='%.2f'),
+                'Ritmo': st.column_config.NumberColumn('Ritmo (por dia)', format='%.2f'),
+                'Previsao': st.column_config.DateColumn('Previsão', format='DD/MM/YYYY'),
+                'Situacao': st.column_config.TextColumn('Situação'),
+            },
+            hide_index=True,
+            use_container_width=True,
+        )
     else:
         st.info("Dados de categorias não disponíveis para exibir progresso")
 
-with tab2:
+# Seção Por Sprint: pontuação por sprint e categorias da sprint filtrada
+def secao_sprints():
     st.header("📊 Análise por Sprint")
     
-    if 'SPRINT' in doacoes_filtradas.columns and 'Total_Geral' in doacoes_filtradas.columns:
+    if 'SPRINT' in cubo_filtrado.columns and 'Total_Geral' in cubo_filtrado.columns:
         # Filtrar sprints válidas
-        pontos_por_sprint = doacoes_filtradas.groupby('SPRINT')['Total_Geral'].sum()
-        pontos_por_sprint = pontos_por_sprint[pontos_por_sprint.index.notna()]
-        pontos_por_sprint = pontos_por_sprint[pontos_por_sprint.index.astype(str) != 'nan']
-        pontos_por_sprint = pontos_por_sprint[pontos_por_sprint.index.astype(str) != 'NaN']
+        pontos_por_sprint = resultado_em_cache('pontos por sprint', lambda: (
+            banco.totais('SPRINT', grupo_selecionado, sprint_selecionada, validos=True) if banco
+            else totais_validos(cubo_filtrado, 'SPRINT')
+        ))
         
         # Métricas por Sprint
         col1, col2, col3 = st.columns(3)
@@ -373,55 +525,64 @@ with tab2:
         with col1:
             # Gráfico de barras por sprint - VERTICAL
             if not pontos_por_sprint.empty:
-                fig = px.bar(
-                    x=pontos_por_sprint.index,
-                    y=pontos_por_sprint.values,
-                    title="Pontuação por Sprint",
-                    labels={'x': 'Sprint', 'y': 'Pontos'},
-                    color=pontos_por_sprint.values,
-                    color_continuous_scale='Blues',
-                    text=pontos_por_sprint.values
-                )
-                fig.update_traces(texttemplate='%{text:.0f}', textposition='outside')
-                st.plotly_chart(fig, use_container_width=True)
+                with perfil.etapa('gráfico pontos por sprint'):
+                    fig = figura_em_cache(
+                        'pontos por sprint', lambda: grafico_pontos_por_sprint(pontos_por_sprint)
+                    )
+                    st.plotly_chart(fig, use_container_width=True)
             else:
                 st.info("Nenhum dado disponível para exibir o gráfico de sprints.")
         
         with col2:
             # Detalhamento por categoria na sprint selecionada
             if sprint_selecionada != 'Todos':
-                sprint_data = doacoes_filtradas[doacoes_filtradas['SPRINT'] == sprint_selecionada]
+                sprint_data = fatiar_cubo(cubo_filtrado, sprint=sprint_selecionada)
                 if not sprint_data.empty and 'Categoria' in sprint_data.columns:
-                    cat_points = sprint_data.groupby('Categoria')['Total_Geral'].sum()
+                    cat_points = resultado_em_cache('categorias da sprint', lambda: (
+                        banco.totais('Categoria', grupo_selecionado, sprint_selecionada) if banco
+                        else totais_por(sprint_data, 'Categoria')
+                    ))
                     if not cat_points.empty:
-                        fig = px.pie(
-                            values=cat_points.values,
-                            names=cat_points.index,
-                            title=f"Distribuição por Categoria - {sprint_selecionada}",
-                            hole=0.3
-                        )
-                        st.plotly_chart(fig, use_container_width=True)
+                        with perfil.etapa('gráfico categorias da sprint'):
+                            fig = figura_em_cache('categorias da sprint', lambda: grafico_pizza(
+                                cat_points, f"Distribuição por Categoria - {sprint_selecionada}", 0.3
+                            ))
+                            st.plotly_chart(fig, use_container_width=True)
                     else:
                         st.info("Nenhuma categoria com dados para esta sprint.")
                 else:
                     st.info("Nenhum dado disponível para a sprint selecionada.")
+        
+        # Pontos acumulados de cada sprint ao longo do tempo
+        st.subheader("📈 Pontos Acumulados por Sprint")
+        with perfil.etapa('gráfico acumulado por sprint'):
+            frequencia = st.radio('Agrupar por:', list(FREQUENCIAS), horizontal=True, key='sprint_frequencia')
+            acumulado = resultado_em_cache('acumulado por sprint', lambda: acumulado_por(
+                serie_diaria, 'SPRINT', FREQUENCIAS[frequencia], grupo_selecionado, sprint_selecionada
+            ), frequencia)
+            if not acumulado.empty:
+                fig = figura_em_cache('acumulado por sprint', lambda: grafico_corrida(
+                    acumulado, f"Pontos Acumulados por Sprint ({frequencia.lower()})"
+                ), frequencia)
+                st.plotly_chart(fig, use_container_width=True)
+            else:
+                st.info("Nenhuma doação com data para exibir o acumulado por sprint.")
     else:
         st.warning("Dados de sprints não disponíveis para análise")
 
-with tab3:
+# Seção Por Grupo: card, top participantes e categorias do grupo
+def secao_grupos():
     st.header("👥 Análise por Grupo")
     
-    # Filtrar grupos válidos
-    grupos_validos = [g for g in participantes['Grupo'].unique() if g and str(g) != 'nan' and str(g) != 'NaN']
-    
     grupo_analise = grupo_selecionado if grupo_selecionado != 'Todos' else st.selectbox(
         'Escolha um grupo para detalhar:', 
-        sorted([str(g) for g in grupos_validos], 
-               key=lambda x: (x.isdigit(), int(x) if x.isdigit() else x))
+        grupos_disponiveis[1:],
+        key='grupo_detalhe'
     )
     
     if grupo_analise != 'Todos':
-        grupo_data = doacoes_filtradas[doacoes_filtradas['Grupo'] == grupo_analise]
+        grupo_data = resultado_em_cache('cubo do grupo', lambda: fatiar_cubo(cubo_filtrado, grupo=grupo_analise),
+                                        grupo_analise)
         participantes_grupo = participantes[participantes['Grupo'] == grupo_analise]
         
         # Card do Grupo
@@ -431,15 +592,16 @@ with tab3:
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            total_pontos_grupo = grupo_data['Total_Geral'].sum() if 'Total_Geral' in grupo_data.columns else 0
-            st.metric("🏅 Pontos Totais", f"{total_pontos_grupo:,.0f}")
+            resumo_grupo = resultado_em_cache('resumo do grupo', lambda: (
+                banco.resumo(grupo_analise, sprint_selecionada) if banco else resumo_geral(grupo_data)
+            ), grupo_analise)
+            st.metric("🏅 Pontos Totais", f"{resumo_grupo.total_pontos:,.0f}")
         with col2:
-            total_doacoes_grupo = grupo_data['Quantidade'].sum() if 'Quantidade' in grupo_data.columns else 0
-            st.metric("📦 Total de Doações", f"{total_doacoes_grupo:,.0f}")
+            st.metric("📦 Total de Doações", f"{resumo_grupo.total_doacoes:,.0f}")
         with col3:
             st.metric("🙋 Membros", len(participantes_grupo))
         with col4:
-            media_pessoa = total_pontos_grupo / len(participantes_grupo) if len(participantes_grupo) > 0 else 0
+            media_pessoa = resumo_grupo.total_pontos / len(participantes_grupo) if len(participantes_grupo) > 0 else 0
             st.metric("📊 Média por Pessoa", f"{media_pessoa:.0f}")
         
         st.markdown('</div>', unsafe_allow_html=True)
@@ -449,7 +611,9 @@ with tab3:
         with col1:
             st.subheader("🏆 Top Participantes")
             if 'Nome' in grupo_data.columns and 'Total_Geral' in grupo_data.columns:
-                top_participantes = grupo_data.groupby('Nome')['Total_Geral'].sum().nlargest(10)
+                top_participantes = resultado_em_cache('top participantes do grupo', lambda: (
+                    banco.totais('Nome', grupo_analise, sprint_selecionada) if banco else totais_por(grupo_data, 'Nome')
+                ).nlargest(10), grupo_analise)
                 
                 for i, (nome, pontos) in enumerate(top_participantes.items(), 1):
                     medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else "🎯"
@@ -460,58 +624,34 @@ with tab3:
         with col2:
             st.subheader("📊 Distribuição por Categoria")
             if 'Categoria' in grupo_data.columns and 'Total_Geral' in grupo_data.columns:
-                cat_dist = grupo_data.groupby('Categoria')['Total_Geral'].sum()
+                cat_dist = resultado_em_cache('categorias do grupo', lambda: (
+                    banco.totais('Categoria', grupo_analise, sprint_selecionada) if banco
+                    else totais_por(grupo_data, 'Categoria')
+                ), grupo_analise)
                 if not cat_dist.empty:
-                    fig = px.bar(
-                        x=cat_dist.values,
-                        y=cat_dist.index,
-                        orientation='h',
-                        title=f"Pontos por Categoria - {grupo_analise}",
-                        color=cat_dist.values,
-                        color_continuous_scale='Greens'
-                    )
-                    st.plotly_chart(fig, use_container_width=True)
+                    with perfil.etapa('gráfico categorias do grupo'):
+                        fig = figura_em_cache(
+                            'categorias do grupo', lambda: grafico_categorias_do_grupo(cat_dist, grupo_analise),
+                            grupo_analise
+                        )
+                        st.plotly_chart(fig, use_container_width=True)
                 else:
                     st.info("Nenhuma categoria com dados para este grupo.")
             else:
                 st.info("Dados de categorias não disponíveis")
 
-with tab4:
+# Seção Individual: ranking completo e detalhes de um participante
+def secao_individual():
     st.header("👤 Análise Individual")
     
     # RANKING COMPLETO DE TODOS OS PARTICIPANTES - INCLUINDO OS COM 0 PONTOS
     st.subheader("🏆 Ranking Geral de Participantes")
     
-    # Calcular pontos por participante - INCLUINDO TODOS OS PARTICIPANTES (MESMO COM 0 PONTOS)
-    ranking_completo = []
-    
-    for _, participante in participantes.iterrows():
-        nome = participante['Nome']
-        grupo = participante['Grupo']
-        
-        # Buscar doações do participante (pode retornar DataFrame vazio)
-        doacoes_participante = doacoes_filtradas[doacoes_filtradas['Nome'] == nome]
-        total_pontos = doacoes_participante['Total_Geral'].sum() if 'Total_Geral' in doacoes_participante.columns else 0
-        total_doacoes = doacoes_participante['Quantidade'].sum() if 'Quantidade' in doacoes_participante.columns else 0
-        
-        ranking_completo.append({
-            'Nome': nome,
-            'Grupo': grupo,
-            'Total_Pontos': total_pontos,
-            'Total_Doacoes': total_doacoes
-        })
-    
-    # Criar DataFrame do ranking
-    ranking_df = pd.DataFrame(ranking_completo)
-    
-    # Ordenar por pontuação (maior primeiro) - participantes com 0 pontos ficam no final
-    ranking_df = ranking_df.sort_values(['Total_Pontos', 'Nome'], ascending=[False, True])
-    
-    # Adicionar coluna de posição com emojis
-    ranking_df['Posição'] = range(1, len(ranking_df) + 1)
-    ranking_df['Medalha'] = ranking_df['Posição'].apply(
-        lambda x: '🥇' if x == 1 else '🥈' if x == 2 else '🥉' if x == 3 else f'{x}°'
-    )
+    # Calcular pontos por participante numa única agregação - INCLUINDO TODOS
+    # OS PARTICIPANTES (MESMO COM 0 PONTOS); empatados dividem a posição
+    with perfil.etapa('ranking'):
+        ranking_df = resultado_em_cache('ranking', lambda: banco.ranking(grupo_selecionado, sprint_selecionada) if banco
+                                        else calcular_ranking(participantes, cubo_filtrado))
     
     # Exibir ranking em formato de tabela
     col1, col2 = st.columns([2, 1])
@@ -519,8 +659,13 @@ with tab4:
     with col1:
         # Formatar a tabela para melhor visualização
         ranking_display = ranking_df[['Medalha', 'Nome', 'Grupo', 'Total_Pontos', 'Total_Doacoes']].copy()
+        # Subiu/desceu desde a atualização anterior (placar sem filtros)
+        if placar is not None and grupo_selecionado == 'Todos' and sprint_selecionada == 'Todos':
+            movimentos = placar.movimentos('participantes', versao=versao_dados)
+            ranking_display.insert(2, 'Movimento', ranking_display['Nome'].map(movimentos['Movimento']))
         ranking_display = ranking_display.rename(columns={
             'Medalha': '🏅', 
+            'Movimento': '↕️ Desde a última atualização', 
             'Nome': '👤 Participante', 
             'Grupo': '👥 Grupo', 
             'Total_Pontos': '🏅 Pontos',
@@ -565,36 +710,55 @@ with tab4:
     
     participante_selecionado = st.selectbox(
         'Selecione o participante para detalhes:',
-        [''] + sorted(list(participantes['Nome'].unique()))
+        [''] + sorted(list(participantes['Nome'].unique())),
+        key='participante'
     )
     
     if participante_selecionado:
-        participante_data = doacoes_filtradas[doacoes_filtradas['Nome'] == participante_selecionado]
-        grupo_participante = participantes[participantes['Nome'] == participante_selecionado]['Grupo'].iloc[0]
+        if doacoes_no_banco:
+            # Doações do participante numa consulta (já em ordem de data) e os
+            # totais pelo cubo do banco, restritos aos filtros
+            participante_data = resultado_em_cache('histórico do participante', lambda: banco.historico(
+                participante_selecionado, grupo_selecionado, sprint_selecionada
+            ), participante_selecionado)
+            resumo_participante = resultado_em_cache('resumo do participante', lambda: banco.resumo(
+                grupo_selecionado, sprint_selecionada, participante_selecionado
+            ), participante_selecionado)
+            totais_participante = {'Total_Geral': resumo_participante.total_pontos,
+                                   'Quantidade': resumo_participante.total_doacoes}
+            cadastro = participantes.drop_duplicates('Nome').set_index('Nome')
+            grupo_participante = cadastro['Grupo'].get(participante_selecionado) if 'Grupo' in cadastro else None
+        else:
+            # Doações do participante pelo índice (já em ordem de data), restritas aos filtros
+            posicoes_participante = indice_participantes.posicoes_de(
+                participante_selecionado, grupo_selecionado, sprint_selecionada
+            )
+            participante_data = doacoes.iloc[posicoes_participante]
+            totais_participante = indice_participantes.totais_de(
+                participante_selecionado, grupo_selecionado, sprint_selecionada
+            )
+            grupo_participante = indice_participantes.grupo_de(participante_selecionado)
         
         col1, col2 = st.columns(2)
         
         with col1:
             st.subheader(f"📈 Desempenho de {participante_selecionado}")
             st.metric("👥 Grupo", grupo_participante)
-            total_pontos_participante = participante_data['Total_Geral'].sum() if 'Total_Geral' in participante_data.columns else 0
+            total_pontos_participante = totais_participante.get('Total_Geral', 0)
             st.metric("🏅 Pontos Totais", f"{total_pontos_participante:,.0f}")
-            total_doacoes_participante = participante_data['Quantidade'].sum() if 'Quantidade' in participante_data.columns else 0
+            total_doacoes_participante = totais_participante.get('Quantidade', 0)
             st.metric("📦 Total de Doações", f"{total_doacoes_participante:,.0f}")
             media_doacao = total_pontos_participante / total_doacoes_participante if total_doacoes_participante > 0 else 0
             st.metric("⭐ Média por Doação", f"{media_doacao:.0f}")
         
         with col2:
             st.subheader("📊 Distribuição por Sprint")
-            if not participante_data.empty and 'SPRINT' in participante_data.columns:
-                sprint_points = participante_data.groupby('SPRINT')['Total_Geral'].sum()
-                fig = px.pie(
-                    values=sprint_points.values,
-                    names=sprint_points.index,
-                    title="Pontuação por Sprint",
-                    hole=0.4
-                )
-                st.plotly_chart(fig, use_container_width=True)
+            if len(participante_data) and 'SPRINT' in participante_data.columns:
+                with perfil.etapa('gráfico sprints do participante'):
+                    fig = figura_em_cache('sprints do participante', lambda: grafico_pizza(
+                        totais_por(participante_data, 'SPRINT'), "Pontuação por Sprint", 0.4
+                    ), participante_selecionado)
+                    st.plotly_chart(fig, use_container_width=True)
             else:
                 st.info("Nenhuma doação registrada para este participante.")
         
@@ -604,16 +768,83 @@ with tab4:
             # Selecionar apenas colunas existentes
             colunas_disponiveis = [col for col in ['Data', 'Categoria', 'Tipo_Item', 'Quantidade', 'Total_Geral', 'Observações'] 
                                  if col in participante_data.columns]
-            historico = participante_data[colunas_disponiveis].sort_values('Data', ascending=False)
+            historico = participante_data[colunas_disponiveis]
             st.dataframe(historico, use_container_width=True)
         else:
             st.info("Nenhuma doação registrada para este participante.")
 
-with tab5:
+# Seção Tabela de Dados: doações filtradas, participantes e categorias
+def secao_tabela():
     st.header("📋 Tabela de Dados Completa")
     
     st.subheader("📊 Dados de Doações")
-    st.dataframe(doacoes_filtradas, use_container_width=True)
+    # Tabela paginada no servidor: busca, ordenação e paginação rodam aqui e
+    # só as linhas da página vão para o navegador
+    col1, col2, col3, col4 = st.columns([3, 2, 1, 1])
+    with col1:
+        busca = st.text_input('🔎 Buscar (nome, grupo, categoria, observações):', key='tabela_busca')
+    with col2:
+        coluna_ordem = st.selectbox(
+            'Ordenar por:', ['(ordem da planilha)'] + list(doacoes.columns), key='tabela_ordem'
+        )
+    with col3:
+        decrescente = st.checkbox('Decrescente', key='tabela_decrescente')
+    with col4:
+        st.session_state.setdefault('tabela_tamanho', 50)
+        tamanho_pagina = st.selectbox('Linhas por página:', [25, 50, 100, 500], key='tabela_tamanho')
+    
+    with perfil.etapa('filtro das doações'):
+        if doacoes_no_banco:
+            # Com as doações no banco, filtro, busca, ordem e página são SQL
+            total_linhas = resultado_em_cache('total da tabela', lambda: banco.contar_doacoes(
+                grupo_selecionado, sprint_selecionada, busca
+            ), busca)
+        else:
+            posicoes = get_posicoes_tabela(
+                versao_dados, grupo_selecionado, sprint_selecionada, busca, coluna_ordem, not decrescente, doacoes
+            )
+            total_linhas = len(posicoes)
+    total_paginas = max(1, -(-total_linhas // tamanho_pagina))
+    # Outra busca, ordem ou filtro volta para a primeira página; dados novos
+    # só trazem a página guardada de volta ao limite
+    estado_tabela = (grupo_selecionado, sprint_selecionada, busca, coluna_ordem, decrescente, tamanho_pagina)
+    if st.session_state.get('tabela_estado') != estado_tabela:
+        st.session_state['tabela_estado'] = estado_tabela
+        st.session_state['tabela_pagina'] = 1
+    elif st.session_state.get('tabela_pagina', 1) > total_paginas:
+        st.session_state['tabela_pagina'] = total_paginas
+    pagina = st.number_input('Página:', min_value=1, max_value=total_paginas, step=1, key='tabela_pagina')
+    inicio = (pagina - 1) * tamanho_pagina
+    if doacoes_no_banco:
+        st.dataframe(banco.doacoes(grupo_selecionado, sprint_selecionada, busca, coluna_ordem, not decrescente,
+                                   inicio, tamanho_pagina), use_container_width=True)
+    else:
+        st.dataframe(pagina_de(doacoes, posicoes, pagina, tamanho_pagina), use_container_width=True)
+    st.caption(f"Linhas {min(inicio + 1, total_linhas):,}–{min(inicio + tamanho_pagina, total_linhas):,} "
+               f"de {total_linhas:,} (página {pagina:,} de {total_paginas:,})")
+    
+    # Exportação das linhas filtradas (todas as páginas). O arquivo só é
+    # gerado no clique (st.download_button com uma função), em blocos (lidos
+    # do banco, se as doações estão nele), e não fica guardado na sessão
+    # entre os reruns.
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        formato = st.radio('Exportar como:', list(FORMATOS_EXPORTACAO), horizontal=True, key='tabela_formato')
+    extensao, mime = FORMATOS_EXPORTACAO[formato]
+
+    def gerar_exportacao():
+        buffer = io.BytesIO()
+        if doacoes_no_banco:
+            exportar_blocos(doacoes, banco.blocos_doacoes(
+                grupo_selecionado, sprint_selecionada, busca, coluna_ordem, not decrescente
+            ), buffer, formato)
+        else:
+            exportar_doacoes(doacoes, posicoes, buffer, formato)
+        return buffer
+
+    with col2:
+        st.download_button(f"⬇️ Baixar {formato} ({total_linhas:,} linhas)", gerar_exportacao,
+                           file_name=f'doacoes.{extensao}', mime=mime)
     
     col1, col2 = st.columns(2)
     
@@ -624,6 +855,99 @@ with tab5:
     with col2:
         st.subheader("🎯 Categorias e Pontuações")
         st.dataframe(categorias, use_container_width=True)
+    
+    # Conferência dos pontos da planilha com o catálogo de categorias
+    with st.expander(f"🧮 Validação dos pontos pelo catálogo ({relatorio_pontos.linhas_divergentes:,} "
+                     f"doações divergentes de {relatorio_pontos.linhas_verificadas:,})"):
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("📄 Pontos na planilha", f"{relatorio_pontos.pontos_planilha:,.0f}")
+        with col2:
+            st.metric("🧮 Pontos pelo catálogo", f"{relatorio_pontos.pontos_recalculados:,.0f}",
+                      delta=f"{relatorio_pontos.pontos_recalculados - relatorio_pontos.pontos_planilha:,.0f}")
+        for chave, descricao in VERIFICACOES_PONTOS.items():
+            st.write(f"• {descricao}: {relatorio_pontos.divergencias.get(chave, 0):,}")
+        if relatorio_pontos.linhas_divergentes:
+            limite = 1000
+            if doacoes_no_banco:
+                divergentes = relatorio_pontos.tabela(
+                    banco.doacoes_nas_linhas(relatorio_pontos.posicoes[:limite]), limite, recortadas=True
+                )
+            else:
+                divergentes = relatorio_pontos.tabela(doacoes, limite)
+            st.dataframe(divergentes, hide_index=True, use_container_width=True)
+            if relatorio_pontos.linhas_divergentes > limite:
+                st.caption(f"Mostrando as primeiras {limite:,} de {relatorio_pontos.linhas_divergentes:,} doações divergentes")
+
+# Seção Edições: ranking dos grupos em cada edição/unidade do registro
+# (GINCANA_PLANILHAS), a partir do cubo federado
+def secao_edicoes():
+    st.header("🗂️ Comparação entre Edições")
+    
+    try:
+        get_atualizador_registro()
+    except ValueError as e:
+        st.error(f"❌ GINCANA_PLANILHAS: {e}")
+        return
+    with st.spinner("Carregando as planilhas das edições..."):
+        federados = get_registro().atual()
+    
+    for chave, erro in federados.erros.items():
+        st.warning(f"⚠️ {' / '.join(chave)}: {erro}")
+    if not federados.particoes:
+        st.info("Nenhuma planilha do registro pôde ser carregada.")
+        return
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("🗂️ Planilhas", f"{len(federados.particoes)} de {len(federados.edicoes)}")
+    with col2:
+        st.metric("📦 Doações registradas", f"{len(federados.doacoes):,}")
+    with col3:
+        st.metric("⏱️ Carga paralela", f"{federados.tempos_carga.get('carga', 0):,.1f} s")
+    
+    ranking = ranking_grupos_edicoes(fatiar_cubo(federados.cubo, sprint=sprint_selecionada))
+    if ranking.empty:
+        st.info("Nenhum dado disponível para comparar as edições.")
+        return
+    
+    fig = figura_em_cache('grupos por edição', lambda: grafico_grupos_edicoes(ranking), federados.versao)
+    st.plotly_chart(fig, use_container_width=True)
+    st.dataframe(
+        ranking[['Edicao', 'Unidade', 'Medalha', 'Grupo', 'Total_Pontos', 'Total_Doacoes', 'Participantes',
+                 'Posição_Geral']],
+        column_config={
+            'Edicao': 'Edição',
+            'Medalha': 'Posição',
+            'Total_Pontos': st.column_config.NumberColumn('Pontos', format='%.0f'),
+            'Total_Doacoes': st.column_config.NumberColumn('Doações', format='%.0f'),
+            'Posição_Geral': 'Posição geral',
+        },
+        hide_index=True,
+        use_container_width=True,
+    )
+
+# Seletor no lugar de st.tabs, que executa o corpo de todas as abas a cada
+# rerun: só a seção escolhida agrega os dados e monta seus gráficos
+SECOES = {
+    "🏆 Dashboard Geral": secao_dashboard,
+    "📊 Por Sprint": secao_sprints,
+    "👥 Por Grupo": secao_grupos,
+    "👤 Individual": secao_individual,
+    "📋 Tabela de Dados": secao_tabela,
+}
+if PLANILHAS_FEDERADAS.strip():
+    SECOES["🗂️ Edições"] = secao_edicoes
+# O Streamlit descarta o estado dos widgets que não são desenhados num rerun;
+# regravar as escolhas feitas dentro das seções as mantém ao trocar de seção
+for chave in ('corrida_frequencia', 'sprint_frequencia', 'grupo_detalhe', 'participante', 'tabela_busca',
+              'tabela_ordem', 'tabela_decrescente', 'tabela_tamanho', 'tabela_pagina', 'tabela_formato'):
+    if chave in st.session_state:
+        st.session_state[chave] = st.session_state[chave]
+secao_ativa = st.radio('Seção:', list(SECOES), horizontal=True, key='secao', label_visibility='collapsed')
+
+with perfil.etapa(f'seção {secao_ativa}'):
+    SECOES[secao_ativa]()
 
 # Rodapé
 st.markdown("---")
@@ -633,12 +957,78 @@ st.markdown("🎄 *Gincana do Bem - Desenvolvido com Streamlit por Tiago Alves*
 with st.sidebar:
     st.markdown("---")
     st.subheader("🔧 Informações do Sistema")
-    st.write(f"📊 Doações carregadas: {len(doacoes):,}")
+    st.write(f"📊 Doações carregadas: {total_doacoes:,}")
     st.write(f"👥 Participantes: {len(participantes):,}")
     st.write(f"🎯 Categorias: {len(categorias):,}")
     if 'Total_Geral' in doacoes.columns:
-        st.write(f"📈 Pontuação total: {doacoes['Total_Geral'].sum():,}")
+        pontuacao_total = cubo['Total_Geral'].sum() if doacoes_no_banco else doacoes['Total_Geral'].sum()
+        st.write(f"📈 Pontuação total: {pontuacao_total:,}")
+    estatisticas_download = get_fonte_planilha().estatisticas
+    st.write(f"🌐 Downloads da planilha: {estatisticas_download.downloads:,} "
+             f"({estatisticas_download.bytes_transferidos / 1024:,.1f} KB)")
+    st.write(f"♻️ Revalidações sem mudança (304): {estatisticas_download.nao_modificados:,}")
+    estatisticas_ingestao = get_ingestao().estatisticas
+    st.write(f"➕ Recargas incrementais: {estatisticas_ingestao.cargas_incrementais:,} "
+             f"({estatisticas_ingestao.linhas_incrementais:,} doações novas lidas)")
+    historico_placar = get_ingestao().placar
+    st.write(f"📸 Fotos do placar: {len(historico_placar.fotos):,} "
+             f"({historico_placar.bytes_em_uso / 1024:,.1f} KB, {historico_placar.compactacoes:,} compactações)")
+    atualizador = get_atualizador()
+    if atualizador.ativo:
+        st.write(f"🔁 Atualização automática a cada {atualizador.intervalo:,.0f} s "
+                 f"({atualizador.ciclos:,} consultas)")
+    if atualizador.ultimo_erro is not None:
+        st.write(f"⚠️ Última consulta à planilha falhou: {atualizador.ultimo_erro}")
+    if dados is not None:
+        relatorio_limpeza = dados.relatorio_limpeza
+        st.write(f"🧹 Células convertidas na limpeza: {relatorio_limpeza.total_convertidas:,} "
+                 f"({relatorio_limpeza.total_invalidos:,} inválidas zeradas)")
+        relatorio_memoria = dados.relatorio_memoria
+        st.write(f"💾 Memória dos dados: {relatorio_memoria.total_depois / 1024 ** 2:,.2f} MB "
+                 f"(eram {relatorio_memoria.total_antes / 1024 ** 2:,.2f} MB)")
+    st.write(f"🧮 Pontos conferidos pelo catálogo: {relatorio_pontos.linhas_divergentes:,} "
+             f"doações divergentes de {relatorio_pontos.linhas_verificadas:,}")
+    estatisticas_figuras = get_cache_figuras().estatisticas
+    st.write(f"🖼️ Cache de gráficos: {estatisticas_figuras.taxa_acerto:.0%} de acertos "
+             f"({estatisticas_figuras.acertos:,}/{estatisticas_figuras.acertos + estatisticas_figuras.faltas:,}, "
+             f"{estatisticas_figuras.bytes_em_uso / 1024:,.0f} KB de {get_cache_figuras().limite_bytes / 1024 ** 2:,.0f} MB)")
+    if get_banco() is not None:
+        estatisticas_banco = get_banco().estatisticas
+        st.write(f"🗄️ Banco SQLite {'em dia' if banco is not None else 'desatualizado'}: "
+                 f"{estatisticas_banco.consultas:,} consultas, {estatisticas_banco.sincronizacoes_incrementais:,} "
+                 f"sincronizações incrementais e {estatisticas_banco.sincronizacoes_completas:,} completas "
+                 f"({get_banco().bytes_em_disco / 1024 ** 2:,.1f} MB em disco)")
+        if get_banco().ultimo_erro is not None:
+            st.write(f"⚠️ Última sincronização do banco falhou: {get_banco().ultimo_erro}")
+    estatisticas_resultados = get_cache_resultados().estatisticas
+    st.write(f"🗃️ Cache de resultados: {estatisticas_resultados.taxa_acerto:.0%} de acertos "
+             f"({estatisticas_resultados.acertos:,} acertos, {estatisticas_resultados.compartilhados:,} cálculos "
+             f"compartilhados, {estatisticas_resultados.faltas:,} faltas; {estatisticas_resultados.resultados:,} "
+             f"resultados, {estatisticas_resultados.bytes_em_uso / 1024:,.0f} KB de "
+             f"{get_cache_resultados().limite_bytes / 1024 ** 2:,.0f} MB)")
+    
+    if perfil.ativo:
+        st.markdown("**⏱️ Tempos deste rerun**")
+        for etapa, segundos in perfil.etapas:
+            st.write(f"{etapa}: {segundos * 1000:,.1f} ms")
+        st.write(f"fora das etapas: {perfil.fora_das_etapas * 1000:,.1f} ms")
+        st.write(f"**total: {perfil.total * 1000:,.1f} ms**")
+        tempos_carga = dados.tempos_carga if dados is not None else {}
+        if tempos_carga:
+            st.write("📥 Última carga da planilha: " + ", ".join(
+                f"{etapa} {segundos * 1000:,.0f} ms" for etapa, segundos in tempos_carga.items()
+            ))
+        try:
+            exportar_jsonl(perfil.registro(
+                versao_dados=versao_dados, grupo=grupo_selecionado, sprint=sprint_selecionada,
+                doacoes=total_doacoes,
+                carga_ms={etapa: round(segundos * 1000, 3) for etapa, segundos in tempos_carga.items()},
+            ))
+        except OSError as e:
+            st.write(f"⚠️ Não foi possível gravar o perfil: {e}")
     
     if st.button("🔄 Recarregar Dados"):
-        st.cache_data.clear()
+        # Antecipa a consulta do atualizador, compartilhada por todas as
+        # sessões; caches por versão dos dados seguem válidos
+        get_atualizador().solicitar(timeout=60)
         st.rerun()
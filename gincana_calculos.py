@@ -0,0 +1,934 @@
+import copy
+import dataclasses
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+# Medalhas das três primeiras posições do ranking
+MEDALHAS = {1: '🥇', 2: '🥈', 3: '🥉'}
+
+# Limite (MB) do cache de resultados compartilhado pelas sessões do processo
+LIMITE_CACHE_RESULTADOS = float(os.environ.get('GINCANA_CACHE_RESULTADOS_MB', '64')) * 1024 ** 2
+
+
+# Ranking de todos os participantes (inclusive os com 0 pontos) com uma única
+# agregação: soma pontos e quantidades por nome, junta em `participantes` e
+# numera as posições com rank "de competição" (empatados dividem a posição
+# e a seguinte é pulada: 1, 1, 3...). Medalha só para quem já pontuou.
+def calcular_ranking(participantes, doacoes):
+    colunas = [col for col in ('Total_Geral', 'Quantidade') if col in doacoes.columns]
+    if 'Nome' in doacoes.columns and colunas:
+        totais = doacoes.groupby('Nome', observed=True, sort=False)[colunas].sum()
+    else:
+        totais = pd.DataFrame(columns=colunas, index=pd.Index([], name='Nome'))
+    totais = totais.rename(columns={'Total_Geral': 'Total_Pontos', 'Quantidade': 'Total_Doacoes'})
+
+    ranking = participantes[['Nome', 'Grupo']].merge(totais, how='left', left_on='Nome', right_index=True)
+    for col in ('Total_Pontos', 'Total_Doacoes'):
+        ranking[col] = ranking[col].fillna(0) if col in ranking.columns else 0
+    return numerar_ranking(ranking)
+
+
+# Ordena um ranking já somado (Nome, Total_Pontos, ...) e numera posições e
+# medalhas; usado também pelo ranking que vem do banco de doações
+def numerar_ranking(ranking):
+    # Ordenar por pontuação (maior primeiro) - participantes com 0 pontos ficam no final
+    ranking = ranking.sort_values(['Total_Pontos', 'Nome'], ascending=[False, True], ignore_index=True)
+    ranking['Posição'] = ranking['Total_Pontos'].rank(method='min', ascending=False).astype('int64')
+    medalhas = ranking['Posição'].map(MEDALHAS).where(ranking['Total_Pontos'] > 0)
+    ranking['Medalha'] = medalhas.fillna(ranking['Posição'].astype(str) + '°')
+    return ranking
+
+
+# Dimensões e medidas do cubo de agregados das doações
+DIMENSOES_CUBO = ['Grupo', 'SPRINT', 'Categoria', 'Nome']
+MEDIDAS_CUBO = ['Total_Geral', 'Quantidade']
+
+
+# Cubo (Grupo x SPRINT x Categoria x Nome) com Total_Geral e Quantidade
+# somados e o número de registros. É montado uma vez por carga de dados;
+# filtros e abas respondem a partir de fatias dele, cujo tamanho depende das
+# combinações existentes e não do número de linhas do log de doações.
+def montar_cubo(doacoes):
+    dimensoes = [col for col in DIMENSOES_CUBO if col in doacoes.columns]
+    medidas = [col for col in MEDIDAS_CUBO if col in doacoes.columns]
+    if not dimensoes:
+        return pd.DataFrame(columns=medidas + ['Registros'])
+
+    agrupado = doacoes.groupby(dimensoes, dropna=False, observed=True, sort=False)
+    cubo = agrupado[medidas].sum() if medidas else pd.DataFrame(index=agrupado.size().index)
+    cubo['Registros'] = agrupado.size()
+    return cubo.reset_index()
+
+
+# Soma cubos de blocos diferentes de doações (ex.: base já carregada + linhas
+# novas) num cubo só, igual ao que montar_cubo daria para os blocos juntos.
+# As dimensões categóricas precisam ter as mesmas categorias nos cubos.
+def combinar_cubos(*cubos, dimensoes=DIMENSOES_CUBO):
+    cubos = [cubo for cubo in cubos if len(cubo)] or list(cubos[:1])
+    if len(cubos) == 1:
+        return cubos[0]
+    dimensoes = [col for col in dimensoes if col in cubos[0].columns]
+    juntos = pd.concat(cubos, ignore_index=True)
+    if not dimensoes:
+        return juntos
+    return juntos.groupby(dimensoes, dropna=False, observed=True, sort=False).sum().reset_index()
+
+
+# Fatia do cubo para os filtros da sidebar ('Todos' não filtra)
+def fatiar_cubo(cubo, grupo='Todos', sprint='Todos', categoria='Todos', nome='Todos'):
+    mascara = pd.Series(True, index=cubo.index)
+    for coluna, valor in (('Grupo', grupo), ('SPRINT', sprint), ('Categoria', categoria), ('Nome', nome)):
+        if valor != 'Todos' and coluna in cubo.columns:
+            mascara &= cubo[coluna] == valor
+    return cubo if mascara.all() else cubo[mascara]
+
+
+# Dimensões da série diária (além do dia) e frequências dos gráficos de corrida
+DIMENSOES_SERIE = ['Dia', 'Grupo', 'SPRINT']
+FREQUENCIAS = {'Diário': 'D', 'Semanal': 'W'}
+
+
+# Série diária das doações: Total_Geral e Quantidade somados por dia x
+# Grupo x SPRINT (um cubo com o tempo como dimensão). O tamanho depende dos
+# dias com doações, não das linhas; doações sem data ficam de fora. Somada a
+# séries de blocos novos com combinar_cubos(..., dimensoes=DIMENSOES_SERIE).
+def montar_serie_diaria(doacoes):
+    medidas = [col for col in MEDIDAS_CUBO if col in doacoes.columns]
+    if 'Data' not in doacoes.columns:
+        return pd.DataFrame(columns=DIMENSOES_SERIE + medidas)
+    datas = doacoes['Data']
+    if not pd.api.types.is_datetime64_any_dtype(datas):
+        datas = pd.to_datetime(datas, errors='coerce')
+    chaves = [datas.dt.normalize().rename('Dia')]
+    chaves += [doacoes[col] for col in DIMENSOES_SERIE[1:] if col in doacoes.columns]
+    serie = doacoes[medidas].groupby(chaves, dropna=False, observed=True, sort=False).sum().reset_index()
+    return serie[serie['Dia'].notna()].reset_index(drop=True)
+
+
+# Pontos acumulados ao longo do tempo para os filtros da sidebar: uma coluna
+# por valor de `dimensao` (ex.: cada grupo), uma linha por dia ou semana
+# (`frequencia` do resample), inclusive períodos sem doações
+def acumulado_por(serie, dimensao, frequencia='D', grupo='Todos', sprint='Todos', medida='Total_Geral'):
+    fatia = fatiar_cubo(serie, grupo, sprint)
+    if fatia.empty or dimensao not in fatia.columns:
+        return pd.DataFrame()
+    por_dia = fatia.groupby(['Dia', dimensao], observed=True)[medida].sum().unstack(fill_value=0)
+    por_dia.columns = por_dia.columns.astype(str)
+    return por_dia.resample(frequencia).sum().cumsum()
+
+
+# Ritmo de pontos por dia para os filtros: média desde a primeira doação até
+# a última e média dos últimos `janela` dias (dias sem doação contam como 0)
+def ritmo_diario(serie, grupo='Todos', sprint='Todos', janela=7, medida='Total_Geral'):
+    fatia = fatiar_cubo(serie, grupo, sprint)
+    if fatia.empty:
+        return 0.0, 0.0
+    por_dia = fatia.groupby('Dia')[medida].sum().resample('D').sum()
+    return float(por_dia.mean()), float(por_dia.iloc[-janela:].mean())
+
+
+# Dimensões da tabela de metas (quantidades por item do catálogo)
+DIMENSOES_METAS = ['Grupo', 'SPRINT', 'Categoria', 'Tipo_Item']
+
+
+# Quantidades doadas por Grupo x SPRINT x Categoria x Tipo_Item já com a meta
+# de cada item do catálogo (junção com `categorias` por Categoria e
+# Tipo_Item, feita uma vez por carga). Tipos fora do catálogo ficam com a
+# meta da categoria; categorias sem meta ficam de fora.
+def montar_tabela_metas(doacoes, categorias):
+    colunas = ['Categoria', 'Tipo_Item', 'Meta_Grupo']
+    if not len(doacoes) or any(col not in categorias.columns for col in colunas) or any(
+        col not in doacoes.columns for col in DIMENSOES_METAS + ['Quantidade']
+    ):
+        return pd.DataFrame(columns=DIMENSOES_METAS + ['Quantidade', 'Meta_Grupo'])
+    catalogo = categorias[colunas].dropna(subset=['Meta_Grupo']).drop_duplicates(['Categoria', 'Tipo_Item'])
+    catalogo = catalogo.astype({'Categoria': str, 'Tipo_Item': str, 'Meta_Grupo': 'float64'})
+
+    quantidades = doacoes.groupby(DIMENSOES_METAS, observed=True, sort=False)['Quantidade'].sum().reset_index()
+    chaves = pd.MultiIndex.from_frame(quantidades[['Categoria', 'Tipo_Item']].astype(str))
+    metas = catalogo.set_index(['Categoria', 'Tipo_Item'])['Meta_Grupo']
+    meta = metas.reindex(chaves).to_numpy()
+    meta_categoria = quantidades['Categoria'].astype(str).map(catalogo.groupby('Categoria')['Meta_Grupo'].first())
+    quantidades['Meta_Grupo'] = np.where(np.isnan(meta), meta_categoria.to_numpy(dtype='float64'), meta)
+    return quantidades[quantidades['Meta_Grupo'].notna()].reset_index(drop=True)
+
+
+# Soma tabelas de metas de blocos de doações (ex.: a base guardada e as linhas
+# novas de uma carga incremental). A meta depende só do item, então entra
+# como dimensão e só as quantidades são somadas.
+def combinar_tabelas_metas(*tabelas):
+    tabela = combinar_cubos(*tabelas, dimensoes=DIMENSOES_METAS + ['Meta_Grupo'])
+    return tabela[DIMENSOES_METAS + ['Quantidade', 'Meta_Grupo']] if len(tabela.columns) else tabela
+
+
+# Progresso de cada grupo em cada meta do catálogo, para os filtros: uma
+# linha por (Grupo, Categoria, meta) na ordem do catálogo, inclusive as
+# ainda sem doações, com
+# percentual, quanto falta, ritmo (quantidade por dia entre `inicio` e
+# `fim`) e a previsão de quando a meta será batida mantido esse ritmo.
+# Tudo em operações sobre colunas inteiras, sem laço por categoria.
+def progresso_metas(tabela, categorias, grupos, inicio=None, fim=None, grupo='Todos', sprint='Todos'):
+    colunas = ['Grupo', 'Categoria', 'Meta_Grupo']
+    if grupo != 'Todos':
+        grupos = [grupo]
+    metas = pd.DataFrame(columns=['Categoria', 'Meta_Grupo'])
+    if 'Categoria' in categorias.columns and 'Meta_Grupo' in categorias.columns:
+        metas = categorias[['Categoria', 'Meta_Grupo']].dropna().drop_duplicates()
+    if not len(metas) or not len(grupos):
+        return pd.DataFrame(columns=colunas + ['Quantidade', 'Percentual', 'Faltam', 'Ritmo', 'Dias_Para_Meta', 'Previsao'])
+
+    # Grade grupos x metas do catálogo: uma posição por linha do resultado
+    categoria = np.tile(metas['Categoria'].astype(str).to_numpy(dtype=object), len(grupos))
+    meta = np.tile(metas['Meta_Grupo'].to_numpy(dtype='float64'), len(grupos))
+    grupo_linha = np.repeat(np.array([str(g) for g in grupos], dtype=object), len(metas))
+
+    fatia = fatiar_cubo(tabela, grupo, sprint) if len(tabela) else tabela
+    feito = fatia.groupby(colunas, observed=True)['Quantidade'].sum()
+    chaves = pd.MultiIndex.from_arrays([grupo_linha, categoria, meta], names=colunas)
+    quantidade = feito.reindex(chaves).to_numpy(dtype='float64', na_value=0.0) if len(feito) else np.zeros(len(meta))
+
+    dias = (fim - inicio).days + 1 if inicio is not None and fim is not None and not pd.isna(inicio) else 0
+    ritmo = quantidade / dias if dias > 0 else np.zeros(len(meta))
+    faltam = np.maximum(meta - quantidade, 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        percentual = np.where(meta > 0, np.minimum(quantidade / meta, 1) * 100, 100.0)
+        dias_para_meta = np.where(faltam == 0, 0.0, np.where(ritmo > 0, np.ceil(faltam / ritmo), np.inf))
+    previsao = np.full(len(meta), np.datetime64('NaT'), dtype='datetime64[ns]')
+    if fim is not None and not pd.isna(fim):
+        finitos = np.isfinite(dias_para_meta) & (faltam > 0)
+        previsao[finitos] = np.datetime64(pd.Timestamp(fim), 'ns') + dias_para_meta[finitos].astype('timedelta64[D]')
+    return pd.DataFrame({
+        'Grupo': grupo_linha, 'Categoria': categoria, 'Meta_Grupo': meta, 'Quantidade': quantidade,
+        'Percentual': percentual, 'Faltam': faltam, 'Ritmo': ritmo, 'Dias_Para_Meta': dias_para_meta,
+        'Previsao': previsao,
+    })
+
+
+# Verificações da validação de pontos (bit de cada uma no código da linha)
+VERIFICACOES_PONTOS = {
+    'fora_do_catalogo': 'Item fora do catálogo',
+    'pontos_unit': 'Pontos_Unit diferente do catálogo',
+    'bonus': 'Bonus diferente do Bonus_Pontos do catálogo',
+    'pontos_total': 'Pontos_Total ≠ Quantidade × Pontos_Unit',
+    'total_geral': 'Total_Geral ≠ Quantidade × Pontos_Unit do catálogo + Bonus',
+}
+
+
+# Resultado da validação de pontos: contagens por verificação e, só para as
+# linhas com divergência, a posição, o código (bits de VERIFICACOES_PONTOS)
+# e o Total_Geral recalculado pelo catálogo
+@dataclass
+class RelatorioPontos:
+    linhas_verificadas: int = 0
+    divergencias: dict = field(default_factory=dict)
+    pontos_planilha: float = 0.0
+    pontos_recalculados: float = 0.0
+    posicoes: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.int32))
+    codigos: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.uint8))
+    recalculados: np.ndarray = field(default_factory=lambda: np.zeros(0))
+
+    @property
+    def linhas_divergentes(self):
+        return len(self.posicoes)
+
+    # Relatório das doações deste mais as de `outro`, validado a partir da
+    # posição `inicio` das mesmas doações (carga incremental)
+    def somar(self, outro, inicio):
+        posicoes = np.concatenate([self.posicoes, outro.posicoes.astype(np.int64) + inicio])
+        tipo = np.int32 if not len(posicoes) or posicoes[-1] < 2**31 else np.int64
+        return RelatorioPontos(
+            linhas_verificadas=self.linhas_verificadas + outro.linhas_verificadas,
+            divergencias={
+                chave: self.divergencias.get(chave, 0) + outro.divergencias.get(chave, 0) for chave in VERIFICACOES_PONTOS
+            },
+            pontos_planilha=self.pontos_planilha + outro.pontos_planilha,
+            pontos_recalculados=self.pontos_recalculados + outro.pontos_recalculados,
+            posicoes=posicoes.astype(tipo),
+            codigos=np.concatenate([self.codigos, outro.codigos]),
+            recalculados=np.concatenate([self.recalculados, outro.recalculados]),
+        )
+
+    # Linhas divergentes (até `limite`) com o valor recalculado e os motivos;
+    # com `recortadas`, `doacoes` já são só essas linhas, na mesma ordem (ex.:
+    # lidas do banco de doações)
+    def tabela(self, doacoes, limite=None, recortadas=False):
+        posicoes, codigos = self.posicoes[:limite], self.codigos[:limite]
+        colunas = [col for col in ('SPRINT', 'Data', 'Nome', 'Grupo', 'Categoria', 'Tipo_Item', 'Quantidade',
+                                   'Pontos_Unit', 'Pontos_Total', 'Bonus', 'Total_Geral') if col in doacoes.columns]
+        tabela = (doacoes if recortadas else doacoes.iloc[posicoes])[colunas].reset_index(drop=True)
+        tabela.insert(0, 'Linha', posicoes + 2)
+        tabela['Total_Recalculado'] = self.recalculados[:limite]
+        motivos = [
+            '; '.join(texto for bit, texto in enumerate(VERIFICACOES_PONTOS.values()) if codigo >> bit & 1)
+            for codigo in codigos
+        ]
+        tabela['Problemas'] = motivos
+        return tabela
+
+
+# Valores numéricos de uma coluna como float64 (inteiros reduzidos sobem
+# antes das contas, sem overflow); vazios e coluna ausente viram 0
+def _numeros(doacoes, coluna):
+    if coluna not in doacoes.columns:
+        return np.zeros(len(doacoes))
+    return np.nan_to_num(doacoes[coluna].to_numpy(dtype='float64', na_value=np.nan))
+
+
+# Códigos inteiros (-1 = vazio) e valores distintos de uma coluna
+def _codificar(serie):
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie.cat.codes.to_numpy(), serie.cat.categories
+    return pd.factorize(serie)
+
+
+# Recalcula os pontos de todas as doações pelo catálogo (`categorias` é a
+# fonte da verdade): Total_Geral = Quantidade × Pontos_Unit do item +
+# Bonus, numa passada vetorizada, e confere os valores da planilha. Linhas
+# sem categoria, tipo e quantidade (ex.: a linha de INÍCIO) não contam.
+def validar_pontos(doacoes, categorias, tolerancia=1e-6):
+    relatorio = RelatorioPontos(divergencias={chave: 0 for chave in VERIFICACOES_PONTOS})
+    if not len(doacoes) or 'Categoria' not in doacoes.columns or 'Tipo_Item' not in doacoes.columns:
+        return relatorio
+
+    colunas = [col for col in ('Categoria', 'Tipo_Item', 'Pontos_Unit', 'Bonus_Pontos') if col in categorias.columns]
+    catalogo = categorias[colunas].dropna(subset=['Categoria', 'Tipo_Item']).drop_duplicates(['Categoria', 'Tipo_Item'])
+    linha_catalogo = {(str(c), str(t)): i for i, (c, t) in enumerate(zip(catalogo['Categoria'], catalogo['Tipo_Item']))}
+
+    # Cada par (categoria, tipo) distinto é procurado no catálogo uma vez só
+    codigos_categoria, categorias_doacoes = _codificar(doacoes['Categoria'])
+    codigos_tipo, tipos_doacoes = _codificar(doacoes['Tipo_Item'])
+    base = len(tipos_doacoes) + 1
+    pares_linhas, pares = pd.factorize((codigos_categoria.astype(np.int64) + 1) * base + codigos_tipo + 1)
+    no_par = np.array([
+        linha_catalogo.get((str(categorias_doacoes[par // base - 1]), str(tipos_doacoes[par % base - 1])), -1)
+        if par // base and par % base else -1
+        for par in pares
+    ], dtype=np.int64)
+    no_catalogo = no_par[pares_linhas] if len(no_par) else np.full(len(doacoes), -1)
+
+    quantidade = _numeros(doacoes, 'Quantidade')
+    pontos_unit = _numeros(doacoes, 'Pontos_Unit')
+    bonus = _numeros(doacoes, 'Bonus')
+    pontos_total = _numeros(doacoes, 'Pontos_Total')
+    total_geral = _numeros(doacoes, 'Total_Geral')
+    conhecido = no_catalogo >= 0
+
+    # Valor do catálogo para cada doação (NaN fora do catálogo)
+    def do_catalogo(coluna):
+        if coluna not in catalogo.columns or not len(catalogo):
+            return np.full(len(doacoes), np.nan)
+        return np.where(conhecido, catalogo[coluna].to_numpy(dtype='float64', na_value=np.nan)[no_catalogo], np.nan)
+
+    unit_catalogo = do_catalogo('Pontos_Unit')
+    bonus_catalogo = do_catalogo('Bonus_Pontos')
+
+    doacao = doacoes['Categoria'].notna().to_numpy() | doacoes['Tipo_Item'].notna().to_numpy() | (quantidade != 0)
+    # Itens fora do catálogo (ou sem Pontos_Unit nele) ficam com o da própria linha
+    com_unit = ~np.isnan(unit_catalogo)
+    recalculado = quantidade * np.where(com_unit, unit_catalogo, pontos_unit) + bonus
+
+    def diferente(a, b):
+        return ~np.isclose(a, b, rtol=tolerancia, atol=tolerancia)
+
+    verificacoes = {
+        'fora_do_catalogo': ~conhecido,
+        'pontos_unit': com_unit & diferente(pontos_unit, unit_catalogo),
+        'bonus': conhecido & (bonus != 0) & diferente(bonus, np.nan_to_num(bonus_catalogo)),
+        'pontos_total': diferente(pontos_total, quantidade * pontos_unit),
+        'total_geral': diferente(total_geral, recalculado),
+    }
+    codigos = np.zeros(len(doacoes), dtype=np.uint8)
+    for bit, (chave, marcadas) in enumerate(verificacoes.items()):
+        marcadas &= doacao
+        relatorio.divergencias[chave] = int(marcadas.sum())
+        codigos |= marcadas.astype(np.uint8) << bit
+
+    relatorio.linhas_verificadas = int(doacao.sum())
+    relatorio.pontos_planilha = float(total_geral[doacao].sum())
+    relatorio.pontos_recalculados = float(recalculado[doacao].sum())
+    posicoes = np.flatnonzero(codigos)
+    relatorio.posicoes = posicoes.astype(np.int32 if len(doacoes) < 2**31 else np.int64)
+    relatorio.codigos = codigos[posicoes]
+    relatorio.recalculados = recalculado[posicoes]
+    return relatorio
+
+
+# Soma de uma medida por dimensão a partir de uma fatia do cubo
+def totais_por(cubo, dimensao, medida='Total_Geral'):
+    return cubo.groupby(dimensao, observed=True)[medida].sum()
+
+
+# Rótulo vazio ou NaN (inclusive o texto 'nan' de células convertidas)
+def _rotulo_invalido(valor):
+    return pd.isna(valor) or str(valor) in ('', 'nan', 'NaN')
+
+
+# Totais por dimensão sem os rótulos vazios/NaN (gráficos e métricas)
+def totais_validos(cubo, dimensao, medida='Total_Geral'):
+    totais = totais_por(cubo, dimensao, medida)
+    return totais[[not _rotulo_invalido(valor) for valor in totais.index]]
+
+
+# Valores distintos válidos de uma coluna como texto, ordenados (números
+# depois dos nomes) — opções dos filtros de grupo e sprint
+def opcoes_filtro(serie):
+    valores = [str(valor) for valor in serie.unique() if not _rotulo_invalido(valor)]
+    return sorted(valores, key=lambda x: (x.isdigit(), int(x) if x.isdigit() else x))
+
+
+# Ranking dos grupos dentro de cada edição/unidade do cubo federado, com a
+# posição geral entre todas as edições (comparação entre edições)
+def ranking_grupos_edicoes(cubo, particao=('Edicao', 'Unidade')):
+    particao = [col for col in particao if col in cubo.columns]
+    medidas = {'Total_Pontos': ('Total_Geral', 'sum'), 'Total_Doacoes': ('Quantidade', 'sum')}
+    if 'Nome' in cubo.columns:
+        medidas['Participantes'] = ('Nome', 'nunique')
+    medidas = {nome: medida for nome, medida in medidas.items() if medida[0] in cubo.columns}
+    ranking = cubo.groupby([*particao, 'Grupo'], observed=True).agg(**medidas).reset_index()
+    ranking = ranking[[not _rotulo_invalido(grupo) for grupo in ranking['Grupo']]]
+    if 'Total_Pontos' not in ranking.columns:
+        ranking['Total_Pontos'] = 0.0
+
+    pontos = ranking.groupby(particao, observed=True)['Total_Pontos'] if particao else ranking['Total_Pontos']
+    ranking['Posição'] = pontos.rank(method='min', ascending=False).astype('int64')
+    ranking['Posição_Geral'] = ranking['Total_Pontos'].rank(method='min', ascending=False).astype('int64')
+    ranking['Medalha'] = ranking['Posição'].map(MEDALHAS).fillna(ranking['Posição'].astype(str) + '°')
+    return ranking.sort_values([*particao, 'Posição'], ignore_index=True)
+
+
+# Métricas principais de uma fatia do cubo (visão geral e card do grupo)
+@dataclass
+class ResumoGeral:
+    total_pontos: float = 0.0
+    total_doacoes: float = 0.0
+    grupos_ativos: int = 0
+    participantes_ativos: int = 0
+
+
+def resumo_geral(cubo):
+    return ResumoGeral(
+        total_pontos=cubo['Total_Geral'].sum() if 'Total_Geral' in cubo.columns else 0,
+        total_doacoes=cubo['Quantidade'].sum() if 'Quantidade' in cubo.columns else 0,
+        grupos_ativos=cubo['Grupo'].nunique() if 'Grupo' in cubo.columns else 0,
+        participantes_ativos=cubo['Nome'].nunique() if 'Nome' in cubo.columns else 0,
+    )
+
+
+# Máscara de igualdade; em colunas categóricas compara os códigos inteiros
+def _mascara_igual(serie, valor):
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        categorias = serie.cat.categories
+        if valor not in categorias:
+            return np.zeros(len(serie), dtype=bool)
+        return serie.cat.codes.to_numpy() == categorias.get_loc(valor)
+    return (serie == valor).to_numpy(dtype=bool, na_value=False)
+
+
+# Posições das doações que passam nos filtros, sem copiar o DataFrame.
+# Retorna None quando nenhum filtro se aplica ('Todos' em tudo).
+def posicoes_filtradas(doacoes, grupo='Todos', sprint='Todos', nome='Todos'):
+    mascara = None
+    for coluna, valor in (('Grupo', grupo), ('SPRINT', sprint), ('Nome', nome)):
+        if valor == 'Todos' or coluna not in doacoes.columns:
+            continue
+        igual = _mascara_igual(doacoes[coluna], valor)
+        mascara = igual if mascara is None else mascara & igual
+    if mascara is None:
+        return None
+    return np.flatnonzero(mascara).astype(np.int32 if len(doacoes) < 2**31 else np.int64)
+
+
+# Linhas selecionadas por posicoes_filtradas; sem filtro devolve o próprio frame
+def aplicar_filtro(doacoes, posicoes):
+    return doacoes if posicoes is None else doacoes.iloc[posicoes]
+
+
+# Colunas de texto em que a busca da tabela de dados procura o termo
+COLUNAS_BUSCA = ['Nome', 'Grupo', 'SPRINT', 'Categoria', 'Tipo_Item', 'Observações']
+
+
+# Posições (dentre `posicoes`, None = todas) cujas colunas de texto contêm o
+# termo, sem diferenciar maiúsculas. Em colunas categóricas a busca roda só
+# nas categorias e é mapeada para as linhas pelos códigos.
+def buscar_texto(doacoes, posicoes, termo, colunas=COLUNAS_BUSCA):
+    if posicoes is None:
+        posicoes = np.arange(len(doacoes), dtype=np.int32 if len(doacoes) < 2**31 else np.int64)
+    termo = termo.strip()
+    if not termo:
+        return posicoes
+
+    encontradas = np.zeros(len(posicoes), dtype=bool)
+    for coluna in colunas:
+        if coluna not in doacoes.columns:
+            continue
+        serie = doacoes[coluna]
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            categorias = serie.cat.categories.astype(str)
+            casam = np.asarray(categorias.str.contains(termo, case=False, regex=False), dtype=bool)
+            codigos = serie.cat.codes.to_numpy()[posicoes]
+            encontradas |= (codigos >= 0) & np.append(casam, False)[codigos]
+        elif pd.api.types.is_string_dtype(serie) or serie.dtype == object:
+            trecho = serie.iloc[posicoes].astype(str).where(serie.iloc[posicoes].notna(), '')
+            encontradas |= trecho.str.contains(termo, case=False, regex=False).to_numpy(dtype=bool)
+    return posicoes[encontradas]
+
+
+# Reordena as posições pelos valores de uma coluna (estável; vazios por
+# último). Categóricas ordenam pelas categorias, que já vêm em ordem alfabética.
+def ordenar_posicoes(doacoes, posicoes, coluna, crescente=True):
+    if posicoes is None:
+        posicoes = np.arange(len(doacoes), dtype=np.int32 if len(doacoes) < 2**31 else np.int64)
+    if coluna not in doacoes.columns or not len(posicoes):
+        return posicoes
+    valores = doacoes[coluna].iloc[posicoes].reset_index(drop=True)
+    ordem = valores.sort_values(ascending=crescente, kind='stable', na_position='last').index.to_numpy()
+    return posicoes[ordem]
+
+
+# Uma página (numerada a partir de 1) das linhas nas posições dadas. As
+# categóricas ficam só com as categorias da página: serializada em Arrow, a
+# coluna leva o dicionário inteiro de categorias junto com poucas linhas.
+def pagina_de(doacoes, posicoes, pagina, tamanho):
+    inicio = (pagina - 1) * tamanho
+    recorte = doacoes.iloc[posicoes[inicio:inicio + tamanho]]
+    categoricas = [col for col in recorte.columns if isinstance(recorte[col].dtype, pd.CategoricalDtype)]
+    if not categoricas:
+        return recorte
+    return recorte.assign(**{col: recorte[col].cat.remove_unused_categories() for col in categoricas})
+
+
+# Índice das doações por participante, montado uma vez por carga: as posições
+# de cada nome ficam contíguas, já na ordem do histórico (Data mais recente
+# primeiro, empates na ordem da planilha, sem data no fim), com os totais de
+# cada um somados. Detalhe e histórico de uma pessoa custam O(doações dela).
+class IndiceParticipantes:
+    def __init__(self, participantes, doacoes):
+        self.doacoes = doacoes
+        nomes = doacoes['Nome'] if 'Nome' in doacoes.columns else pd.Series(index=doacoes.index, dtype=object)
+        if isinstance(nomes.dtype, pd.CategoricalDtype):
+            codigos, categorias = nomes.cat.codes.to_numpy(), nomes.cat.categories
+        else:
+            codigos, categorias = pd.factorize(nomes)
+        self._codigos = {nome: i for i, nome in enumerate(categorias)}
+
+        chaves = _chaves_historico(doacoes)
+        if chaves is not None:
+            ordem = np.lexsort((chaves, codigos))
+        elif 'Data' in doacoes.columns:
+            datas, unicas = pd.factorize(doacoes['Data'], sort=True)
+            ordem_data = np.where(datas < 0, len(unicas), len(unicas) - 1 - datas)
+            ordem = np.lexsort((ordem_data, codigos))
+        else:
+            ordem = np.argsort(codigos, kind='stable')
+        com_nome = codigos >= 0
+        ordem = ordem[com_nome[ordem]]
+        tipo = np.int32 if len(doacoes) < 2**31 else np.int64
+        self.posicoes = ordem.astype(tipo)
+        # Chave de data de cada posição, para estender() achar onde entram
+        # as doações novas (None se a Data não é datetime)
+        self._chaves = chaves[ordem] if chaves is not None else None
+
+        self.registros = np.bincount(codigos[com_nome], minlength=len(categorias))
+        self.inicios = np.concatenate(([0], np.cumsum(self.registros)))
+        # Somas como as do cubo (vazios contam como zero)
+        self.totais = {
+            medida: np.bincount(
+                codigos[com_nome], minlength=len(categorias),
+                weights=np.nan_to_num(doacoes[medida].to_numpy(dtype='float64')[com_nome]),
+            )
+            for medida in MEDIDAS_CUBO if medida in doacoes.columns
+        }
+        cadastro = participantes.drop_duplicates('Nome') if 'Grupo' in participantes.columns else participantes.iloc[:0]
+        self.grupos = dict(zip(cadastro['Nome'], cadastro['Grupo'])) if len(cadastro) else {}
+
+    # Índice de `doacoes` cujas linhas antes de `inicio` são as deste índice
+    # (carga incremental): só as doações a partir de `inicio` são ordenadas,
+    # e cada uma entra no trecho do seu nome por busca binária, depois das
+    # de mesma data. Os nomes novos vão para o fim. Sem Data datetime, monta
+    # o índice de novo.
+    def estender(self, doacoes, inicio, participantes):
+        if inicio >= len(doacoes):
+            indice = copy.copy(self)
+            indice.doacoes = doacoes
+            return indice
+        novas = doacoes.iloc[inicio:]
+        chaves = _chaves_historico(novas)
+        medidas = [medida for medida in MEDIDAS_CUBO if medida in doacoes.columns]
+        if self._chaves is None or chaves is None or medidas != list(self.totais):
+            return IndiceParticipantes(participantes, doacoes)
+
+        nomes = novas['Nome'] if 'Nome' in novas.columns else pd.Series(index=novas.index, dtype=object)
+        locais, unicos = pd.factorize(nomes)
+        codigos_nomes = dict(self._codigos)
+        for nome in unicos:
+            codigos_nomes.setdefault(nome, len(codigos_nomes))
+        codigos = np.array([codigos_nomes[nome] for nome in unicos] + [-1], dtype=np.int64)[locais]
+        ordem = np.lexsort((chaves, codigos))
+        ordem = ordem[codigos[ordem] >= 0]
+        codigos, chaves = codigos[ordem], chaves[ordem]
+
+        # Onde cada nova entra: no fim das doações do mesmo nome com data
+        # igual ou mais recente (as novas vêm ordenadas, então empates
+        # mantêm a ordem da planilha)
+        destinos = np.full(len(ordem), len(self.posicoes), dtype=np.int64)
+        nomes_novos, primeiras = np.unique(codigos, return_index=True)
+        for codigo, de, ate in zip(nomes_novos, primeiras, list(primeiras[1:]) + [len(codigos)]):
+            if codigo < len(self.registros):
+                trecho = self._chaves[self.inicios[codigo]:self.inicios[codigo + 1]]
+                destinos[de:ate] = self.inicios[codigo] + np.searchsorted(trecho, chaves[de:ate], side='right')
+
+        indice = copy.copy(self)
+        indice.doacoes = doacoes
+        indice._codigos = codigos_nomes
+        tipo = np.int32 if len(doacoes) < 2**31 else np.int64
+        indice.posicoes = np.insert(self.posicoes.astype(tipo), destinos, (ordem + inicio).astype(tipo))
+        indice._chaves = np.insert(self._chaves, destinos, chaves)
+        acrescimo = len(codigos_nomes) - len(self.registros)
+        indice.registros = np.pad(self.registros, (0, acrescimo)) + np.bincount(codigos, minlength=len(codigos_nomes))
+        indice.inicios = np.concatenate(([0], np.cumsum(indice.registros)))
+        indice.totais = {
+            medida: np.pad(totais, (0, acrescimo)) + np.bincount(
+                codigos, minlength=len(codigos_nomes),
+                weights=np.nan_to_num(novas[medida].to_numpy(dtype='float64')[ordem]),
+            )
+            for medida, totais in self.totais.items()
+        }
+        return indice
+
+    # Grupo do participante no cadastro (None se não estiver cadastrado)
+    def grupo_de(self, nome):
+        return self.grupos.get(nome)
+
+    # Posições das doações do participante na ordem do histórico, restritas
+    # aos filtros da sidebar ('Todos' não filtra)
+    def posicoes_de(self, nome, grupo='Todos', sprint='Todos'):
+        codigo = self._codigos.get(nome)
+        if codigo is None:
+            return self.posicoes[:0]
+        posicoes = self.posicoes[self.inicios[codigo]:self.inicios[codigo + 1]]
+        for coluna, valor in (('Grupo', grupo), ('SPRINT', sprint)):
+            if valor != 'Todos' and coluna in self.doacoes.columns and len(posicoes):
+                posicoes = posicoes[_mascara_igual(self.doacoes[coluna].iloc[posicoes], valor)]
+        return posicoes
+
+    # Total_Geral, Quantidade e número de registros do participante: sem
+    # filtros vêm dos totais já somados, com filtros só das doações dele
+    def totais_de(self, nome, grupo='Todos', sprint='Todos'):
+        codigo = self._codigos.get(nome)
+        if codigo is not None and grupo == 'Todos' and sprint == 'Todos':
+            totais = {medida: float(valores[codigo]) for medida, valores in self.totais.items()}
+            totais['Registros'] = int(self.registros[codigo])
+            return totais
+        posicoes = self.posicoes_de(nome, grupo, sprint)
+        totais = {medida: float(np.nansum(self.doacoes[medida].to_numpy(dtype='float64')[posicoes])) for medida in self.totais}
+        totais['Registros'] = len(posicoes)
+        return totais
+
+
+# Chave da ordem do histórico (Data mais recente primeiro, sem data no fim)
+# para ordenar e buscar como inteiro; None se a Data não é datetime
+def _chaves_historico(doacoes):
+    if 'Data' not in doacoes.columns or not pd.api.types.is_datetime64_any_dtype(doacoes['Data']):
+        return None
+    datas = doacoes['Data'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+    sem_data = datas == np.iinfo(np.int64).min
+    return np.negative(datas, out=np.full(len(datas), np.iinfo(np.int64).max), where=~sem_data)
+
+
+# Uma foto do placar depois de uma atualização dos dados: para participantes
+# e grupos, os índices no dicionário de nomes do histórico, os pontos e as
+# posições (empatados dividem a posição, como no calcular_ranking)
+@dataclass
+class FotoPlacar:
+    versao: str
+    registrada_em: float
+    linhas: int
+    participantes: np.ndarray
+    pontos_participantes: np.ndarray
+    posicoes_participantes: np.ndarray
+    grupos: np.ndarray
+    pontos_grupos: np.ndarray
+    posicoes_grupos: np.ndarray
+
+    @property
+    def bytes_em_uso(self):
+        return sum(valor.nbytes for valor in self.__dict__.values() if isinstance(valor, np.ndarray))
+
+
+# Posições por pontos, maior primeiro; empatados ficam com a menor posição
+def _posicoes_por_pontos(pontos):
+    ordenados = np.sort(-pontos)
+    return (np.searchsorted(ordenados, -pontos, side='left') + 1).astype(np.int32)
+
+
+# Seta de movimento no placar a partir da variação de posição
+def _seta(variacao):
+    if pd.isna(variacao):
+        return '🆕'
+    if variacao > 0:
+        return f'▲ {variacao:.0f}'
+    if variacao < 0:
+        return f'▼ {-variacao:.0f}'
+    return '＝'
+
+
+# Histórico do placar (participantes e grupos) ao longo das atualizações dos
+# dados. Os totais são mantidos como a ingestão mantém o cubo: a parte da
+# base da aba fica guardada e cada atualização incremental só soma as
+# doações novas (mais as linhas finais relidas). Cada foto guarda só
+# vetores de índices, pontos e posições; passando de `max_fotos`, as fotos
+# antigas são compactadas (fica a última de cada dia) e depois descartadas.
+class HistoricoPlacar:
+    def __init__(self, max_fotos=48):
+        self.max_fotos = max_fotos
+        self.fotos = []
+        self.compactacoes = 0
+        self._nomes = {}
+        self._grupos = {}
+        self._base = None
+        self._lock = threading.Lock()
+
+    @property
+    def bytes_em_uso(self):
+        return sum(foto.bytes_em_uso for foto in self.fotos)
+
+    # Índices de `valores` no dicionário (acrescentando os que faltam)
+    @staticmethod
+    def _indices(dicionario, valores):
+        rotulos = pd.Index(valores).astype(str).tolist()
+        return np.array([dicionario.setdefault(rotulo, len(dicionario)) for rotulo in rotulos], dtype=np.int64)
+
+    # Total_Geral de um trecho das doações por nome/grupo, nos índices do histórico
+    def _somar(self, trecho, coluna, dicionario):
+        if coluna not in trecho.columns or not len(trecho):
+            return np.zeros(len(dicionario))
+        codigos, valores = _codificar(trecho[coluna])
+        validos = codigos >= 0
+        indices = self._indices(dicionario, valores)
+        return np.bincount(indices[codigos[validos]], weights=_numeros(trecho, 'Total_Geral')[validos],
+                           minlength=len(dicionario))
+
+    @staticmethod
+    def _estender(valores, tamanho):
+        return np.pad(valores, (0, tamanho - len(valores)))
+
+    def _somar_trecho(self, trecho):
+        nomes = self._somar(trecho, 'Nome', self._nomes)
+        grupos = self._somar(trecho, 'Grupo', self._grupos)
+        return nomes, grupos
+
+    # Tira a foto da versão `versao` dos dados. `linhas_base` é o tamanho da
+    # parte estável da aba (a que só cresce) e `linhas_iguais` quantas linhas
+    # do início são as mesmas da foto anterior: se coincidem com a base
+    # guardada, só o resto das doações é somado.
+    def registrar(self, versao, participantes, doacoes, linhas_base=None, linhas_iguais=0, registrada_em=None):
+        with self._lock:
+            if self.fotos and self.fotos[-1].versao == versao:
+                return self.fotos[-1]
+            linhas_base = len(doacoes) if linhas_base is None else linhas_base
+            inicio = 0
+            base_nomes = base_grupos = np.zeros(0)
+            if self._base is not None and linhas_iguais and self._base[0] == linhas_iguais:
+                inicio, base_nomes, base_grupos = self._base
+            novos_nomes, novos_grupos = self._somar_trecho(doacoes.iloc[inicio:linhas_base])
+            base_nomes = self._estender(base_nomes, len(self._nomes)) + self._estender(novos_nomes, len(self._nomes))
+            base_grupos = self._estender(base_grupos, len(self._grupos)) + self._estender(novos_grupos, len(self._grupos))
+            self._base = (linhas_base, base_nomes, base_grupos)
+
+            resto_nomes, resto_grupos = self._somar_trecho(doacoes.iloc[linhas_base:])
+            pontos_nomes = self._estender(base_nomes, len(self._nomes)) + self._estender(resto_nomes, len(self._nomes))
+            pontos_grupos = self._estender(base_grupos, len(self._grupos)) + self._estender(resto_grupos, len(self._grupos))
+
+            nomes = participantes['Nome'].dropna().unique() if 'Nome' in participantes.columns else []
+            indices_nomes = self._indices(self._nomes, nomes)
+            pontos_nomes = self._estender(pontos_nomes, len(self._nomes))[indices_nomes]
+            rotulos = list(self._grupos)
+            indices_grupos = np.array([indice for indice, grupo in enumerate(rotulos)
+                                       if not _rotulo_invalido(grupo)], dtype=np.int64)
+            pontos_grupos = pontos_grupos[indices_grupos]
+
+            foto = FotoPlacar(
+                versao=versao,
+                registrada_em=time.time() if registrada_em is None else registrada_em,
+                linhas=len(doacoes),
+                participantes=indices_nomes.astype(np.int32),
+                pontos_participantes=pontos_nomes,
+                posicoes_participantes=_posicoes_por_pontos(pontos_nomes),
+                grupos=indices_grupos.astype(np.int32),
+                pontos_grupos=pontos_grupos,
+                posicoes_grupos=_posicoes_por_pontos(pontos_grupos),
+            )
+            self.fotos.append(foto)
+            self._compactar()
+            return foto
+
+    def _compactar(self):
+        if len(self.fotos) <= self.max_fotos:
+            return
+        recentes = max(1, self.max_fotos // 2)
+        antigas, novas = self.fotos[:-recentes], self.fotos[-recentes:]
+        por_dia = {}
+        for foto in antigas:
+            por_dia[time.strftime('%Y-%m-%d', time.localtime(foto.registrada_em))] = foto
+        self.fotos = (list(por_dia.values()) + novas)[-self.max_fotos:]
+        self.compactacoes += 1
+
+    def _posicao_da_versao(self, versao):
+        if versao is None:
+            return len(self.fotos) - 1
+        return next((i for i in range(len(self.fotos) - 1, -1, -1) if self.fotos[i].versao == versao), None)
+
+    # Posição, pontos e movimento de cada participante ('participantes') ou
+    # grupo ('grupos') na foto da versão `versao` (a última, se None) em
+    # relação à foto `passos` antes dela; sem foto anterior, não há variação.
+    def movimentos(self, tipo='participantes', versao=None, passos=1):
+        colunas = ['Posição', 'Pontos', 'Posição_Anterior', 'Pontos_Ganhos', 'Variação', 'Movimento']
+        with self._lock:
+            atual = self._posicao_da_versao(versao)
+            if atual is None:
+                return pd.DataFrame(columns=colunas)
+            foto = self.fotos[atual]
+            anterior = self.fotos[atual - passos] if atual >= passos else None
+            rotulos = np.array(list(self._nomes if tipo == 'participantes' else self._grupos), dtype=object)
+
+        indices = getattr(foto, tipo)
+        movimentos = pd.DataFrame({
+            'Posição': getattr(foto, f'posicoes_{tipo}'),
+            'Pontos': getattr(foto, f'pontos_{tipo}'),
+        }, index=pd.Index(rotulos[indices], name='Nome' if tipo == 'participantes' else 'Grupo'))
+        posicoes_anteriores = np.full(len(rotulos), np.nan)
+        pontos_anteriores = np.full(len(rotulos), np.nan)
+        if anterior is not None:
+            posicoes_anteriores[getattr(anterior, tipo)] = getattr(anterior, f'posicoes_{tipo}')
+            pontos_anteriores[getattr(anterior, tipo)] = getattr(anterior, f'pontos_{tipo}')
+            movimentos['Posição_Anterior'] = posicoes_anteriores[indices]
+            movimentos['Pontos_Ganhos'] = movimentos['Pontos'] - pontos_anteriores[indices]
+            movimentos['Variação'] = movimentos['Posição_Anterior'] - movimentos['Posição']
+            movimentos['Movimento'] = movimentos['Variação'].map(_seta)
+        else:
+            movimentos['Posição_Anterior'] = np.nan
+            movimentos['Pontos_Ganhos'] = np.nan
+            movimentos['Variação'] = np.nan
+            movimentos['Movimento'] = '–'
+        return movimentos
+
+    # Posição de cada grupo em cada foto (linhas: horário da foto)
+    def historico_grupos(self):
+        with self._lock:
+            fotos = list(self.fotos)
+            rotulos = np.array(list(self._grupos), dtype=object)
+        historico = pd.DataFrame(
+            [dict(zip(rotulos[foto.grupos], foto.posicoes_grupos)) for foto in fotos],
+            index=pd.DatetimeIndex([pd.Timestamp.fromtimestamp(foto.registrada_em) for foto in fotos]),
+        )
+        historico.index.name = 'Atualização'
+        return historico
+
+
+# Contadores do cache de resultados (exibidos na sidebar e nos benchmarks);
+# `compartilhados` conta as consultas que esperaram o cálculo já em
+# andamento de outra sessão em vez de repeti-lo
+@dataclass
+class EstatisticasResultados:
+    acertos: int = 0
+    faltas: int = 0
+    compartilhados: int = 0
+    descartes: int = 0
+    bytes_em_uso: int = 0
+    resultados: int = 0
+
+    @property
+    def taxa_acerto(self):
+        consultas = self.acertos + self.faltas + self.compartilhados
+        return (self.acertos + self.compartilhados) / consultas if consultas else 0.0
+
+
+# Memória aproximada de um resultado: DataFrames, séries e índices pela
+# memory_usage (com o texto), arrays pelo nbytes, tuplas, listas, dicts e
+# dataclasses pela soma das partes
+def tamanho_em_bytes(valor):
+    if isinstance(valor, pd.DataFrame):
+        return int(valor.memory_usage(index=True, deep=True).sum())
+    if isinstance(valor, (pd.Series, pd.Index)):
+        return int(valor.memory_usage(deep=True))
+    if isinstance(valor, np.ndarray):
+        return int(valor.nbytes)
+    if isinstance(valor, (tuple, list)):
+        return sys.getsizeof(valor) + sum(tamanho_em_bytes(item) for item in valor)
+    if isinstance(valor, dict):
+        return sys.getsizeof(valor) + sum(tamanho_em_bytes(item) for item in valor.values())
+    if dataclasses.is_dataclass(valor) and not isinstance(valor, type):
+        return sys.getsizeof(valor) + sum(tamanho_em_bytes(getattr(valor, campo.name))
+                                          for campo in dataclasses.fields(valor))
+    return sys.getsizeof(valor)
+
+
+# Cache LRU de resultados derivados (tabelas, totais, posições, rankings)
+# compartilhado pelas sessões do processo, no molde do cache de figuras. A
+# chave começa pela versão dos dados e pelos filtros, então cada versão nova
+# só gera chaves novas e as antigas saem pelo limite de memória. Cálculos
+# iguais pedidos ao mesmo tempo por várias sessões rodam uma vez só: quem
+# chega depois espera o resultado de quem chegou primeiro. Os resultados
+# devolvidos são compartilhados e não devem ser alterados.
+class CacheResultados:
+    def __init__(self, limite_bytes=LIMITE_CACHE_RESULTADOS):
+        self.limite_bytes = limite_bytes
+        self.estatisticas = EstatisticasResultados()
+        self._resultados = OrderedDict()
+        self._em_calculo = {}
+        self._lock = threading.Lock()
+
+    # Resultado da chave; `calcular()` só roda quando ele não está no cache
+    # nem sendo calculado por outra thread. Um erro no cálculo chega a todas
+    # as threads que esperavam por ele e nada é guardado.
+    def obter(self, chave, calcular):
+        with self._lock:
+            item = self._resultados.get(chave)
+            if item is not None:
+                self._resultados.move_to_end(chave)
+                self.estatisticas.acertos += 1
+                return item[0]
+            pendente = self._em_calculo.get(chave)
+            dono = pendente is None
+            if dono:
+                pendente = self._em_calculo[chave] = Future()
+                self.estatisticas.faltas += 1
+            else:
+                self.estatisticas.compartilhados += 1
+        if not dono:
+            return pendente.result()
+
+        try:
+            resultado = calcular()
+        except BaseException as erro:
+            with self._lock:
+                del self._em_calculo[chave]
+            pendente.set_exception(erro)
+            raise
+        tamanho = tamanho_em_bytes(resultado)
+        with self._lock:
+            del self._em_calculo[chave]
+            if tamanho <= self.limite_bytes:
+                self._resultados[chave] = (resultado, tamanho)
+                self.estatisticas.bytes_em_uso += tamanho
+            while self.estatisticas.bytes_em_uso > self.limite_bytes and self._resultados:
+                _, (_, descartado) = self._resultados.popitem(last=False)
+                self.estatisticas.bytes_em_uso -= descartado
+                self.estatisticas.descartes += 1
+            self.estatisticas.resultados = len(self._resultados)
+        pendente.set_result(resultado)
+        return resultado
+
+    def limpar(self):
+        with self._lock:
+            self._resultados.clear()
+            self.estatisticas.bytes_em_uso = 0
+            self.estatisticas.resultados = 0
@@ -0,0 +1,1966 @@
+import contextlib
+import hashlib
+import io
+import json
+import logging
+import multiprocessing
+import operator
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field, replace
+from xml.etree import ElementTree
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+import requests
+
+from gincana_calculos import (DIMENSOES_CUBO, DIMENSOES_METAS, DIMENSOES_SERIE, HistoricoPlacar, IndiceParticipantes,
+                              combinar_cubos, combinar_tabelas_metas, montar_cubo, RelatorioPontos, montar_serie_diaria,
+                              montar_tabela_metas, validar_pontos)
+from gincana_xlsx import PastaXlsx, delimitar, fim_da_linha, ler_textos, montar_bloco, nomes_colunas
+
+_log = logging.getLogger(__name__)
+
+# Abas obrigatórias da planilha da gincana
+ABAS_PLANILHA = ('participantes', 'categorias', 'doacoes_registros')
+
+# Aba que só recebe linhas novas durante a sprint (ingestão incremental)
+ABA_INCREMENTAL = 'doacoes_registros'
+
+# Colunas numéricas das doações que podem vir como fórmula do Excel
+COLUNAS_NUMERICAS = ['Pontos_Total', 'Total_Geral', 'Quantidade', 'Pontos_Unit', 'Bonus']
+
+# Colunas de texto de baixa cardinalidade das doações, guardadas como
+# categóricas: ocupam menos memória e os filtros comparam códigos inteiros
+COLUNAS_CATEGORICAS = ['Grupo', 'SPRINT', 'Categoria', 'Tipo_Item', 'Nome']
+
+# Fórmulas simples de duas parcelas, como =G5*H5 ou =I5+J5 (referência ou número)
+_RE_FORMULA = (
+    r'^=\s*(?:(?P<col_a>[A-Za-z]{1,3})(?P<lin_a>\d+)|(?P<num_a>\d+(?:[.,]\d+)?))'
+    r'\s*(?P<op>[-+*/])\s*'
+    r'(?:(?P<col_b>[A-Za-z]{1,3})(?P<lin_b>\d+)|(?P<num_b>\d+(?:[.,]\d+)?))\s*$'
+)
+_OPERADORES = {'+': operator.add, '-': operator.sub, '*': operator.mul, '/': operator.truediv}
+
+# Snapshots colunares (Arrow) da planilha já limpa, reaproveitados entre
+# reinícios do processo. Mudar VERSAO_SNAPSHOT invalida os snapshots antigos
+# sempre que a etapa de limpeza mudar de formato.
+SNAPSHOT_DIR = os.environ.get(
+    'GINCANA_SNAPSHOT_DIR', os.path.join(tempfile.gettempdir(), 'gincana_do_bem_snapshots')
+)
+VERSAO_SNAPSHOT = 5
+MAX_SNAPSHOTS = 3
+# Partes de doações num snapshot antes de regravar tudo numa parte só
+MAX_PARTES_SNAPSHOT = 16
+
+# Intervalo (segundos) entre as consultas do atualizador em segundo plano;
+# 0 desliga a atualização automática (só o botão de recarga consulta a fonte)
+INTERVALO_ATUALIZACAO = float(os.environ.get('GINCANA_INTERVALO_ATUALIZACAO', '60'))
+
+# Linhas por bloco na leitura em fluxo da aba de doações: cada bloco é lido,
+# limpo, compactado e agregado antes do próximo
+TAMANHO_BLOCO = int(os.environ.get('GINCANA_TAMANHO_BLOCO', '10000'))
+
+# Fotos do placar guardadas pelo histórico de posições (uma por atualização)
+MAX_FOTOS_PLACAR = int(os.environ.get('GINCANA_MAX_FOTOS_PLACAR', '48'))
+
+
+# Contadores de rede da fonte da planilha (exibidos na sidebar e nos benchmarks)
+@dataclass
+class EstatisticasDownload:
+    requisicoes: int = 0
+    downloads: int = 0
+    nao_modificados: int = 0
+    bytes_transferidos: int = 0
+
+
+# Fonte da planilha: baixa o xlsx uma única vez para memória e revalida com
+# ETag/If-Modified-Since, de modo que um arquivo inalterado custa apenas um 304.
+# Aceita URL http(s) ou caminho local (revalidado por mtime/tamanho).
+class FontePlanilha:
+    def __init__(self, origem, timeout=30, sessao=None):
+        self.origem = origem
+        self.timeout = timeout
+        self.sessao = sessao or requests.Session()
+        self.estatisticas = EstatisticasDownload()
+        self.conteudo = None
+        self.hash_conteudo = None
+        self._etag = None
+        self._last_modified = None
+        self._assinatura_local = None
+        self._abas = None
+        self._lock = threading.Lock()
+
+    @property
+    def remota(self):
+        return str(self.origem).startswith(('http://', 'https://'))
+
+    # Retorna os bytes atuais da planilha, baixando apenas se houve mudança
+    def obter(self):
+        with self._lock:
+            if self.remota:
+                self._revalidar_remoto()
+            else:
+                self._revalidar_local()
+            return self.conteudo
+
+    def _revalidar_remoto(self):
+        headers = {}
+        if self.conteudo is not None:
+            if self._etag:
+                headers['If-None-Match'] = self._etag
+            if self._last_modified:
+                headers['If-Modified-Since'] = self._last_modified
+
+        resposta = self.sessao.get(self.origem, headers=headers, timeout=self.timeout)
+        self.estatisticas.requisicoes += 1
+
+        if resposta.status_code == 304 and self.conteudo is not None:
+            self.estatisticas.nao_modificados += 1
+            return
+
+        resposta.raise_for_status()
+        self._etag = resposta.headers.get('ETag')
+        self._last_modified = resposta.headers.get('Last-Modified')
+        self._atualizar_conteudo(resposta.content)
+
+    def _revalidar_local(self):
+        info = os.stat(self.origem)
+        assinatura = (info.st_mtime_ns, info.st_size)
+        self.estatisticas.requisicoes += 1
+
+        if assinatura == self._assinatura_local and self.conteudo is not None:
+            self.estatisticas.nao_modificados += 1
+            return
+
+        with open(self.origem, 'rb') as arquivo:
+            conteudo = arquivo.read()
+        self._assinatura_local = assinatura
+        self._atualizar_conteudo(conteudo)
+
+    def _atualizar_conteudo(self, conteudo):
+        self.estatisticas.downloads += 1
+        self.estatisticas.bytes_transferidos += len(conteudo)
+        novo_hash = hashlib.sha256(conteudo).hexdigest()
+        # Mesmo conteúdo servido sem validadores: mantém as abas já lidas
+        if novo_hash != self.hash_conteudo:
+            self._abas = None
+        self.conteudo = conteudo
+        self.hash_conteudo = novo_hash
+
+    # Lê todas as abas de uma vez só (um único parse do container zip).
+    # Devolve cópias para que a limpeza feita pelo chamador não altere o cache.
+    # Com revalidar=False usa o conteúdo já obtido, sem nova requisição.
+    def ler_abas(self, revalidar=True):
+        conteudo = self.obter() if revalidar or self.conteudo is None else None
+        with self._lock:
+            conteudo = conteudo if conteudo is not None else self.conteudo
+            if self._abas is None:
+                abas = pd.read_excel(io.BytesIO(conteudo), sheet_name=list(ABAS_PLANILHA))
+                doacoes = _doacoes_com_formulas(conteudo)
+                if doacoes is not None:
+                    abas[ABA_INCREMENTAL] = doacoes
+                self._abas = abas
+            return {nome: aba.copy() for nome, aba in self._abas.items()}
+
+
+# Quantas células de cada coluna numérica precisaram ser convertidas
+@dataclass
+class RelatorioLimpeza:
+    formulas_avaliadas: dict = field(default_factory=dict)
+    textos_convertidos: dict = field(default_factory=dict)
+    invalidos: dict = field(default_factory=dict)
+
+    @property
+    def total_convertidas(self):
+        return sum(self.formulas_avaliadas.values()) + sum(self.textos_convertidos.values())
+
+    @property
+    def total_invalidos(self):
+        return sum(self.invalidos.values())
+
+    # Soma as contagens de outro relatório (fator=-1 desconta)
+    def somar(self, outro, fator=1):
+        def juntar(meu, dele):
+            return {col: meu.get(col, 0) + fator * dele.get(col, 0) for col in {**meu, **dele}}
+        return RelatorioLimpeza(
+            juntar(self.formulas_avaliadas, outro.formulas_avaliadas),
+            juntar(self.textos_convertidos, outro.textos_convertidos),
+            juntar(self.invalidos, outro.invalidos),
+        )
+
+
+# Converte letra(s) de coluna do Excel em índice: A -> 0, B -> 1, AA -> 26
+def _indice_coluna(letras):
+    indice = 0
+    for letra in letras.upper():
+        indice = indice * 26 + ord(letra) - ord('A') + 1
+    return indice - 1
+
+
+# Operando de uma fórmula já decomposto em arrays: índice da coluna
+# referenciada (-1 para número literal), posição da linha na aba e o literal
+@dataclass
+class _Operando:
+    coluna: np.ndarray
+    posicao: np.ndarray
+    literal: np.ndarray
+
+    def __getitem__(self, mascara):
+        return _Operando(self.coluna[mascara], self.posicao[mascara], self.literal[mascara])
+
+    @classmethod
+    def vazio(cls, tamanho):
+        return cls(np.full(tamanho, -1), np.zeros(tamanho, dtype='int64'), np.full(tamanho, np.nan))
+
+    def preencher(self, mascara, outro):
+        self.coluna[mascara] = outro.coluna
+        self.posicao[mascara] = outro.posicao
+        self.literal[mascara] = outro.literal
+
+
+def _para_numero(texto):
+    texto = pc.replace_substring(texto, ',', '.')
+    valido = pc.fill_null(pc.match_substring_regex(texto, r'^[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?$'), False)
+    numeros = pc.cast(pc.if_else(valido, texto, pa.scalar(None, pa.string())), pa.float64())
+    return numeros.to_numpy(zero_copy_only=False)
+
+
+# Grupos opcionais que não casaram vêm como '' do extract_regex; a letra
+# vazia vira índice -1 (literal) e a linha vazia vira 0
+def _decompor_operando(partes, sufixo, primeira_linha):
+    letras = pc.dictionary_encode(pc.utf8_upper(partes.field(f'col_{sufixo}')))
+    indices_letras = np.array([_indice_coluna(letra) for letra in letras.dictionary.to_pylist()] + [-1])
+    codigos = pc.fill_null(letras.indices, -1).to_numpy(zero_copy_only=False)
+    linhas = partes.field(f'lin_{sufixo}')
+    linhas = pc.cast(pc.if_else(pc.equal(linhas, ''), '0', linhas), pa.int64()).to_numpy(zero_copy_only=False)
+    return _Operando(indices_letras[codigos], linhas - primeira_linha, _para_numero(partes.field(f'num_{sufixo}')))
+
+
+# Fórmulas de uma coluna quase sempre seguem o mesmo modelo relativo (=G5*H5
+# na linha 5, =G6*H6 na linha 6...). O modelo é tirado da primeira fórmula e
+# todas as outras são conferidas de uma vez contra o texto esperado; só as
+# que não casam passam pelo extract_regex, bem mais caro.
+def _decompor_formulas(texto, posicoes, primeira_linha):
+    tamanho = len(texto)
+    a, b = _Operando.vazio(tamanho), _Operando.vazio(tamanho)
+    simbolos = np.full(tamanho, '', dtype='<U1')
+    reconhecidas = np.zeros(tamanho, dtype=bool)
+
+    casadas = np.zeros(tamanho, dtype=bool)
+    modelo = re.match(_RE_FORMULA, texto[0].as_py())
+    if modelo:
+        linha_propria = int(posicoes[0]) + primeira_linha
+        linhas_excel = pc.cast(pa.array(posicoes + primeira_linha), pa.string())
+        pedacos = ['=']
+        for sufixo in ('a', 'b'):
+            if sufixo == 'b':
+                pedacos.append(modelo['op'])
+            if modelo[f'col_{sufixo}']:
+                relativa = int(modelo[f'lin_{sufixo}']) == linha_propria
+                pedacos += [modelo[f'col_{sufixo}'], linhas_excel if relativa else modelo[f'lin_{sufixo}']]
+            else:
+                pedacos.append(modelo[f'num_{sufixo}'])
+
+        esperado = pc.binary_join_element_wise(*pedacos, '')
+        casadas = pc.fill_null(pc.equal(texto, esperado), False).to_numpy(zero_copy_only=False)
+        quantidade = int(casadas.sum())
+        for sufixo, operando in (('a', a), ('b', b)):
+            letras = modelo[f'col_{sufixo}']
+            if letras:
+                relativa = int(modelo[f'lin_{sufixo}']) == linha_propria
+                linhas = posicoes[casadas] if relativa else np.full(
+                    quantidade, int(modelo[f'lin_{sufixo}']) - primeira_linha
+                )
+                operando.preencher(casadas, _Operando(
+                    np.full(quantidade, _indice_coluna(letras)), linhas, np.full(quantidade, np.nan)
+                ))
+            else:
+                numero = float(modelo[f'num_{sufixo}'].replace(',', '.'))
+                operando.preencher(casadas, _Operando(
+                    np.full(quantidade, -1), np.zeros(quantidade, dtype='int64'), np.full(quantidade, numero)
+                ))
+        simbolos[casadas] = modelo['op']
+        reconhecidas |= casadas
+
+    if not casadas.all():
+        resto = ~casadas
+        partes = pc.extract_regex(texto.filter(pa.array(resto)), _RE_FORMULA)
+        validas = partes.is_valid().to_numpy(zero_copy_only=False)
+        if validas.any():
+            partes = partes.filter(pa.array(validas))
+            alvo = np.flatnonzero(resto)[validas]
+            a.preencher(alvo, _decompor_operando(partes, 'a', primeira_linha))
+            b.preencher(alvo, _decompor_operando(partes, 'b', primeira_linha))
+            simbolos[alvo] = partes.field('op').to_numpy(zero_copy_only=False)
+            reconhecidas[alvo] = True
+
+    return {
+        'posicao': posicoes[reconhecidas],
+        'op': simbolos[reconhecidas],
+        'a': a[reconhecidas],
+        'b': b[reconhecidas],
+    }, reconhecidas
+
+
+# Limpa as colunas numéricas das doações de forma vetorizada (pyarrow.compute):
+# números em texto (inclusive com vírgula decimal) são convertidos e fórmulas
+# simples como =G5*H5 são avaliadas contra as células referenciadas da própria
+# aba. Células vazias valem 0, como no Excel. `primeira_linha` é a linha do
+# Excel da primeira linha do frame (2 para a aba inteira, logo abaixo do
+# cabeçalho). Retorna o RelatorioLimpeza.
+def limpar_colunas_numericas(doacoes, colunas=COLUNAS_NUMERICAS, primeira_linha=2):
+    relatorio = RelatorioLimpeza()
+    presentes = [col for col in colunas if col in doacoes.columns]
+    valores = {}
+    formulas = {}
+
+    for col in presentes:
+        serie = doacoes[col]
+        relatorio.formulas_avaliadas[col] = 0
+        relatorio.textos_convertidos[col] = 0
+        relatorio.invalidos[col] = 0
+        if pd.api.types.is_numeric_dtype(serie):
+            valores[col] = serie.to_numpy(dtype='float64', na_value=np.nan, copy=True)
+            continue
+
+        # Só as células que não são número passam pelo tratamento de texto
+        if serie.dtype == object:
+            numerico = pd.to_numeric(serie, errors='coerce').to_numpy(dtype='float64', na_value=np.nan, copy=True)
+            candidatas = np.isnan(numerico) & serie.notna().to_numpy()
+        else:
+            numerico = np.full(len(serie), np.nan)
+            candidatas = serie.notna().to_numpy()
+        valores[col] = numerico
+        posicoes = np.flatnonzero(candidatas)
+        if not len(posicoes):
+            continue
+
+        texto = pc.utf8_trim_whitespace(pa.array(serie.iloc[posicoes].astype('string[pyarrow]')))
+        eh_formula = pc.fill_null(pc.starts_with(texto, '='), False).to_numpy(zero_copy_only=False)
+
+        # Números em texto, inclusive com vírgula decimal
+        outros = texto.filter(pa.array(~eh_formula))
+        do_texto = _para_numero(outros)
+        preenchidos = pc.not_equal(outros, '').to_numpy(zero_copy_only=False)
+        convertidos = ~np.isnan(do_texto)
+        numerico[posicoes[~eh_formula][convertidos]] = do_texto[convertidos]
+        relatorio.textos_convertidos[col] = int(convertidos.sum())
+        relatorio.invalidos[col] = int((~convertidos & preenchidos).sum())
+
+        # Fórmulas: decompostas uma única vez em arrays de operandos
+        if eh_formula.any():
+            formula, reconhecidas = _decompor_formulas(
+                texto.filter(pa.array(eh_formula)), posicoes[eh_formula], primeira_linha
+            )
+            relatorio.invalidos[col] += int((~reconhecidas).sum())
+            if reconhecidas.any():
+                formulas[col] = formula
+
+    _avaliar_formulas(doacoes, valores, formulas, relatorio)
+
+    for col in presentes:
+        doacoes[col] = np.nan_to_num(valores[col], nan=0.0)
+    return relatorio
+
+
+# Avalia as fórmulas em passadas sucessivas: cada passada resolve as células
+# cujas referências já têm valor (ex.: =I5+J5 depois de =G5*H5). Fórmulas
+# que sobram (referência circular ou a célula não numérica) viram 0.
+def _avaliar_formulas(doacoes, valores, formulas, relatorio):
+    pendentes = {}
+    for col, formula in formulas.items():
+        pendentes[col] = np.zeros(len(doacoes), dtype=bool)
+        pendentes[col][formula['posicao']] = True
+
+    while formulas:
+        progresso = False
+        for col in list(formulas):
+            formula = formulas[col]
+            a, bloqueado_a = _resolver_operando(doacoes, valores, pendentes, formula['a'])
+            b, bloqueado_b = _resolver_operando(doacoes, valores, pendentes, formula['b'])
+            prontos = ~(bloqueado_a | bloqueado_b)
+            if not prontos.any():
+                continue
+
+            resultado = np.full(len(prontos), np.nan)
+            for simbolo, funcao in _OPERADORES.items():
+                mascara = prontos & (formula['op'] == simbolo)
+                if mascara.any():
+                    with np.errstate(divide='ignore', invalid='ignore'):
+                        resultado[mascara] = funcao(a[mascara], b[mascara])
+            validos = np.isfinite(resultado[prontos])
+
+            posicoes = formula['posicao'][prontos]
+            valores[col][posicoes] = np.where(validos, resultado[prontos], np.nan)
+            pendentes[col][posicoes] = False
+            relatorio.formulas_avaliadas[col] += int(validos.sum())
+            relatorio.invalidos[col] += int((~validos).sum())
+
+            restantes = ~prontos
+            if restantes.any():
+                formulas[col] = {
+                    'posicao': formula['posicao'][restantes],
+                    'op': formula['op'][restantes],
+                    'a': formula['a'][restantes],
+                    'b': formula['b'][restantes],
+                }
+            else:
+                del formulas[col]
+            progresso = True
+
+        if not progresso:
+            for col, formula in formulas.items():
+                relatorio.invalidos[col] += len(formula['posicao'])
+            break
+
+
+# Valores de um operando: número literal ou célula referenciada da aba.
+# Retorna (valores, bloqueado), onde bloqueado marca referências a fórmulas
+# ainda não avaliadas.
+def _resolver_operando(doacoes, valores, pendentes, operando):
+    resultado = operando.literal.copy()
+    bloqueado = np.zeros(len(resultado), dtype=bool)
+
+    for indice in np.unique(operando.coluna[operando.coluna >= 0]):
+        mascara = operando.coluna == indice
+        if indice >= len(doacoes.columns):
+            continue
+        nome = doacoes.columns[indice]
+        if nome in valores:
+            coluna = valores[nome]
+        else:
+            coluna = pd.to_numeric(doacoes[nome], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+
+        alvo = operando.posicao[mascara]
+        dentro = (alvo >= 0) & (alvo < len(doacoes))
+        lidos = np.zeros(len(alvo))
+        lidos[dentro] = np.nan_to_num(coluna[alvo[dentro]], nan=0.0)
+        resultado[mascara] = lidos
+        if nome in pendentes:
+            travado = np.zeros(len(alvo), dtype=bool)
+            travado[dentro] = pendentes[nome][alvo[dentro]]
+            bloqueado[mascara] = travado
+
+    return resultado, bloqueado
+
+
+# Limpeza das abas lidas: tipos de Grupo e colunas numéricas das doações
+def limpar_dados(participantes, categorias, doacoes):
+    # Converter coluna Grupo para string para evitar problemas de tipo
+    participantes['Grupo'] = participantes['Grupo'].astype(str)
+    relatorio = limpar_doacoes(doacoes)
+    return participantes, categorias, doacoes, relatorio
+
+
+# Limpeza das doações (a aba inteira ou um bloco de linhas novas)
+def limpar_doacoes(doacoes, primeira_linha=2):
+    if 'Grupo' in doacoes.columns:
+        doacoes['Grupo'] = doacoes['Grupo'].astype(str)
+    return limpar_colunas_numericas(doacoes, primeira_linha=primeira_linha)
+
+
+# Memória (bytes, contando o conteúdo dos textos) de cada aba antes e depois do schema
+@dataclass
+class RelatorioMemoria:
+    antes: dict = field(default_factory=dict)
+    depois: dict = field(default_factory=dict)
+
+    @property
+    def total_antes(self):
+        return sum(self.antes.values())
+
+    @property
+    def total_depois(self):
+        return sum(self.depois.values())
+
+
+# Reduz uma coluna numérica ao menor inteiro que a representa sem perda
+# (só quando todos os valores são inteiros); senão mantém float64.
+# Atenção: contas entre colunas reduzidas devem converter antes (overflow).
+def _reduzir_numerica(serie):
+    if not pd.api.types.is_numeric_dtype(serie) or pd.api.types.is_bool_dtype(serie):
+        return serie
+    reduzida = pd.to_numeric(serie, downcast='integer')
+    return reduzida if pd.api.types.is_integer_dtype(reduzida) else serie
+
+
+# Schema compacto das abas limpas: textos de baixa cardinalidade das doações
+# e o Grupo dos participantes viram categóricos, pontos e quantidades inteiros
+# são reduzidos ao menor tipo seguro e a Data vira datetime64
+def aplicar_schema(participantes, categorias, doacoes):
+    relatorio = RelatorioMemoria()
+    frames = {'participantes': participantes, 'categorias': categorias, 'doacoes_registros': doacoes}
+    for aba, frame in frames.items():
+        relatorio.antes[aba] = int(frame.memory_usage(deep=True).sum())
+
+    aplicar_schema_doacoes(doacoes)
+    aplicar_schema_cadastros(participantes, categorias)
+
+    for aba, frame in frames.items():
+        relatorio.depois[aba] = int(frame.memory_usage(deep=True).sum())
+    return relatorio
+
+
+# Parte do schema compacto que cabe às doações (também usada nos blocos novos)
+def aplicar_schema_doacoes(doacoes):
+    for col in COLUNAS_CATEGORICAS:
+        if col in doacoes.columns:
+            doacoes[col] = doacoes[col].astype('category')
+    if 'Data' in doacoes.columns:
+        doacoes['Data'] = pd.to_datetime(doacoes['Data'], errors='coerce')
+    for col in doacoes.columns:
+        doacoes[col] = _reduzir_numerica(doacoes[col])
+
+
+# Parte do schema compacto das abas pequenas (participantes e categorias)
+def aplicar_schema_cadastros(participantes, categorias):
+    if 'Grupo' in participantes.columns:
+        participantes['Grupo'] = participantes['Grupo'].astype('category')
+    for frame in (participantes, categorias):
+        for col in frame.columns:
+            frame[col] = _reduzir_numerica(frame[col])
+
+
+def _pasta_snapshot(hash_conteudo, diretorio):
+    return os.path.join(diretorio, f'v{VERSAO_SNAPSHOT}-{hash_conteudo}')
+
+
+# Estado da ingestão incremental da aba de doações: até qual linha do Excel
+# a aba já foi incorporada e as impressões digitais (sha256) do que veio
+# antes dela. A "base" vai até a última linha com algum valor digitado; as
+# linhas seguintes (só fórmulas de modelo, ou vazias) são relidas sempre.
+@dataclass
+class EstadoIngestao:
+    linha_base: int
+    tamanho_base: int
+    hash_base: str
+    tamanho_textos: int
+    hash_textos: str
+    hash_fixos: str
+    colunas: list
+    limpeza_base: dict
+    memoria_base: int
+
+    # Quantidade de linhas do frame de doações que correspondem à base
+    @property
+    def linhas_base(self):
+        return self.linha_base - 1
+
+
+# Dados da planilha já limpos, como ficam no cache do Streamlit
+@dataclass
+class DadosPlanilha:
+    participantes: pd.DataFrame
+    categorias: pd.DataFrame
+    doacoes: pd.DataFrame
+    hash_conteudo: str
+    relatorio_limpeza: RelatorioLimpeza
+    relatorio_memoria: RelatorioMemoria
+    do_snapshot: bool = False
+    cubo: pd.DataFrame = None
+    # Pontos por dia x Grupo x SPRINT (gráficos de corrida e ritmo)
+    serie_diaria: pd.DataFrame = None
+    # Doações de cada participante em ordem de data, com os totais somados
+    indice_participantes: IndiceParticipantes = None
+    # Quantidades por item do catálogo já com as metas (progresso das metas)
+    tabela_metas: pd.DataFrame = None
+    # Pontos recalculados pelo catálogo e divergências com a planilha
+    relatorio_pontos: RelatorioPontos = None
+    ingestao: EstadoIngestao = None
+    # Segundos gastos em cada etapa da carga que produziu estes dados
+    tempos_carga: dict = field(default_factory=dict)
+    # Posição na aba da primeira linha de `doacoes`. Com o banco de doações
+    # as linhas anteriores ficam só nele; depois de sincronizadas, `doacoes`
+    # fica só com as colunas e todas as linhas são lidas do banco.
+    inicio_doacoes: int = 0
+
+    @property
+    def frames(self):
+        return self.participantes, self.categorias, self.doacoes
+
+    @property
+    def total_doacoes(self):
+        return self.inicio_doacoes + len(self.doacoes)
+
+    @property
+    def doacoes_no_banco(self):
+        return self.inicio_doacoes > 0
+
+
+# Carrega o snapshot da planilha com esse hash (mapeado em memória), ou None
+def carregar_snapshot(hash_conteudo, diretorio=SNAPSHOT_DIR):
+    pasta = _pasta_snapshot(hash_conteudo, diretorio)
+    if not os.path.isdir(pasta):
+        return None
+    try:
+        metadados = _ler_metadados(pasta)
+        frames = [
+            feather.read_table(os.path.join(pasta, f'{aba}.arrow'), memory_map=True).to_pandas()
+            for aba in ABAS_PLANILHA if aba != ABA_INCREMENTAL
+        ]
+        frames.append(_juntar_blocos([
+            feather.read_table(os.path.join(pasta, arquivo), memory_map=True).to_pandas()
+            for arquivo, _ in metadados['partes']
+        ]))
+        relatorio_limpeza = RelatorioLimpeza(**metadados['relatorio_limpeza'])
+        relatorio_memoria = RelatorioMemoria(**metadados['relatorio_memoria'])
+        ingestao = EstadoIngestao(**metadados['ingestao']) if metadados.get('ingestao') else None
+    except (OSError, ValueError, TypeError, KeyError):
+        return None
+    return DadosPlanilha(
+        *frames, hash_conteudo, relatorio_limpeza, relatorio_memoria, do_snapshot=True, ingestao=ingestao
+    )
+
+
+# Relatórios e estado da ingestão de uma versão, gravados com ela (no
+# snapshot e no banco de doações)
+def _metadados(dados):
+    return {
+        'relatorio_limpeza': dados.relatorio_limpeza.__dict__,
+        'relatorio_memoria': dados.relatorio_memoria.__dict__,
+        'ingestao': asdict(dados.ingestao) if dados.ingestao is not None else None,
+    }
+
+
+def _ler_metadados(pasta):
+    with open(os.path.join(pasta, 'metadados.json'), encoding='utf-8') as arquivo:
+        return json.load(arquivo)
+
+
+# Grava os quadros limpos como Arrow sem compressão (permite memory-map).
+# As doações vão em partes, a última sempre com as linhas finais (depois da
+# base da ingestão). Numa carga incremental, com o hash `anterior`, as partes
+# da base do snapshot anterior são reaproveitadas por hard link e só as
+# linhas novas são gravadas; passando de MAX_PARTES_SNAPSHOT, tudo volta a
+# ser gravado de uma vez. A gravação é atômica: escreve numa pasta
+# temporária e renomeia no final.
+def salvar_snapshot(dados, diretorio=SNAPSHOT_DIR, anterior=None):
+    os.makedirs(diretorio, exist_ok=True)
+    pasta = _pasta_snapshot(dados.hash_conteudo, diretorio)
+    if os.path.isdir(pasta):
+        return pasta
+
+    temporaria = tempfile.mkdtemp(prefix='.tmp-', dir=diretorio)
+    try:
+        for aba, frame in zip(ABAS_PLANILHA, dados.frames):
+            if aba != ABA_INCREMENTAL:
+                feather.write_feather(frame, os.path.join(temporaria, f'{aba}.arrow'), compression='uncompressed')
+        partes = []
+        inicio = 0
+        for origem, fim in _partes_snapshot(dados, diretorio, anterior):
+            arquivo = f'{ABA_INCREMENTAL}-{len(partes)}.arrow'
+            destino = os.path.join(temporaria, arquivo)
+            if origem is None or not _vincular(origem, destino):
+                feather.write_feather(dados.doacoes.iloc[inicio:fim], destino, compression='uncompressed')
+            partes.append((arquivo, fim - inicio))
+            inicio = fim
+        with open(os.path.join(temporaria, 'metadados.json'), 'w', encoding='utf-8') as arquivo:
+            json.dump({'partes': partes, **_metadados(dados)}, arquivo)
+        os.replace(temporaria, pasta)
+    except OSError:
+        shutil.rmtree(temporaria, ignore_errors=True)
+        if not os.path.isdir(pasta):
+            raise
+    _remover_snapshots_antigos(diretorio)
+    return pasta
+
+
+# Hard link de uma parte de outro snapshot (False se não deu: outro sistema
+# de arquivos, ou o snapshot anterior acabou de ser removido)
+def _vincular(origem, destino):
+    try:
+        os.link(origem, destino)
+    except OSError:
+        return False
+    return True
+
+
+# Partes das doações de um snapshot: (arquivo a reaproveitar ou None, linha
+# final). As partes da base do snapshot `anterior` valem quando cobrem
+# exatamente a base dele, que a carga incremental manteve igual.
+def _partes_snapshot(dados, diretorio, anterior):
+    linhas_base = dados.ingestao.linhas_base if dados.ingestao is not None else len(dados.doacoes)
+    partes = []
+    if anterior is not None:
+        pasta_anterior = _pasta_snapshot(anterior, diretorio)
+        try:
+            metadados = _ler_metadados(pasta_anterior)
+            base_anterior = EstadoIngestao(**metadados['ingestao']).linhas_base
+            fim = 0
+            for arquivo, linhas in metadados['partes'][:-1]:
+                fim += linhas
+                partes.append((os.path.join(pasta_anterior, arquivo), fim))
+            if fim != base_anterior or fim > linhas_base or len(partes) + 2 > MAX_PARTES_SNAPSHOT:
+                partes = []
+        except (OSError, ValueError, TypeError, KeyError):
+            partes = []
+    fim = partes[-1][1] if partes else 0
+    if linhas_base > fim:
+        partes.append((None, linhas_base))
+    partes.append((None, len(dados.doacoes)))
+    return partes
+
+
+# Ponteiro para o último snapshot bom de cada fonte (JSON fora das pastas
+# de snapshot): permite pintar o dashboard sem consultar a rede
+def _arquivo_ultimo(origem, diretorio):
+    return os.path.join(diretorio, f'ultimo-{hashlib.sha256(str(origem).encode()).hexdigest()[:16]}.json')
+
+
+def registrar_ultimo(origem, hash_conteudo, diretorio=SNAPSHOT_DIR):
+    os.makedirs(diretorio, exist_ok=True)
+    destino = _arquivo_ultimo(origem, diretorio)
+    temporario = f'{destino}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(temporario, 'w', encoding='utf-8') as arquivo:
+        json.dump({'origem': str(origem), 'hash_conteudo': hash_conteudo, 'salvo_em': time.time()}, arquivo)
+    os.replace(temporario, destino)
+
+
+# Hash e horário (epoch) do último snapshot bom da fonte, ou None
+def ler_ultimo(origem, diretorio=SNAPSHOT_DIR):
+    try:
+        with open(_arquivo_ultimo(origem, diretorio), encoding='utf-8') as arquivo:
+            ultimo = json.load(arquivo)
+        return ultimo['hash_conteudo'], float(ultimo['salvo_em'])
+    except (OSError, ValueError, TypeError, KeyError):
+        return None
+
+
+def _remover_snapshots_antigos(diretorio):
+    pastas = [
+        os.path.join(diretorio, nome) for nome in os.listdir(diretorio)
+        if nome.startswith('v') and os.path.isdir(os.path.join(diretorio, nome))
+    ]
+    pastas.sort(key=os.path.getmtime, reverse=True)
+    for pasta in pastas[MAX_SNAPSHOTS:]:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+# Formatos da exportação de doações: extensão e tipo MIME
+FORMATOS_EXPORTACAO = {
+    'CSV': ('csv', 'text/csv'),
+    'Parquet': ('parquet', 'application/vnd.apache.parquet'),
+}
+
+# Grava as doações nas posições dadas (None = todas) em `destino` (caminho
+# ou arquivo binário aberto), bloco a bloco: só `tamanho_bloco` linhas são
+# convertidas por vez, sem montar o conteúdo inteiro em memória
+def exportar_doacoes(doacoes, posicoes, destino, formato='CSV', tamanho_bloco=TAMANHO_BLOCO):
+    if posicoes is None:
+        posicoes = np.arange(len(doacoes))
+    blocos = (doacoes.iloc[posicoes[inicio:inicio + tamanho_bloco]] for inicio in range(0, len(posicoes), tamanho_bloco))
+    exportar_blocos(doacoes.iloc[:0], blocos, destino, formato)
+
+
+# Grava em `destino` blocos de doações já recortados (ex.: lidos do banco de
+# doações), com as colunas e os tipos de `esquema`
+def exportar_blocos(esquema, blocos, destino, formato='CSV'):
+    if formato not in FORMATOS_EXPORTACAO:
+        raise ValueError(f'formato de exportação desconhecido: {formato}')
+
+    if formato == 'Parquet':
+        schema = pa.Schema.from_pandas(esquema, preserve_index=False)
+        with pq.ParquetWriter(destino, schema) as escritor:
+            for bloco in blocos:
+                escritor.write_table(pa.Table.from_pandas(bloco, schema=schema, preserve_index=False))
+        return
+
+    with contextlib.ExitStack() as pilha:
+        if isinstance(destino, (str, os.PathLike)):
+            destino = pilha.enter_context(open(destino, 'wb'))
+        # detach no fim: devolve o arquivo do chamador sem fechá-lo
+        texto = io.TextIOWrapper(destino, encoding='utf-8', newline='', write_through=True)
+        pilha.callback(texto.detach)
+        esquema.to_csv(texto, index=False)
+        for bloco in blocos:
+            bloco.to_csv(texto, index=False, header=False)
+
+
+# Lê a planilha da fonte já limpa, usando o snapshot em disco quando o
+# conteúdo não mudou; o xlsx só é interpretado de novo quando o hash muda.
+# Com revalidar=False usa o conteúdo que a fonte já obteve. A aba de doações
+# é lida em fluxo (carregar_em_fluxo); se o formato não permitir, cai na
+# leitura completa com o pandas.
+def carregar_planilha(fonte, diretorio=SNAPSHOT_DIR, revalidar=True, em_fluxo=True):
+    if revalidar or fonte.conteudo is None:
+        fonte.obter()
+    inicio = time.perf_counter()
+    dados = carregar_snapshot(fonte.hash_conteudo, diretorio)
+    if dados is not None:
+        dados.tempos_carga['snapshot'] = time.perf_counter() - inicio
+        return dados
+
+    dados = carregar_em_fluxo(fonte.conteudo, fonte.hash_conteudo) if em_fluxo else None
+    if dados is None:
+        tempos = {}
+        inicio = time.perf_counter()
+        abas = fonte.ler_abas(revalidar=False)
+        tempos['leitura'] = time.perf_counter() - inicio
+        participantes, categorias, doacoes, relatorio_limpeza = limpar_dados(
+            *(abas[aba] for aba in ABAS_PLANILHA)
+        )
+        tempos['limpeza'] = time.perf_counter() - inicio - tempos['leitura']
+        relatorio_memoria = aplicar_schema(participantes, categorias, doacoes)
+        tempos['schema'] = time.perf_counter() - inicio - tempos['leitura'] - tempos['limpeza']
+        dados = DadosPlanilha(
+            participantes, categorias, doacoes, fonte.hash_conteudo, relatorio_limpeza, relatorio_memoria,
+            tempos_carga=tempos,
+        )
+        inicio = time.perf_counter()
+        dados.ingestao = preparar_ingestao(fonte.conteudo, dados)
+        tempos['ingestão'] = time.perf_counter() - inicio
+    try:
+        salvar_snapshot(dados, diretorio)
+    except (OSError, ValueError, TypeError):
+        # Snapshot é só otimização: falha ao gravar não impede o carregamento
+        pass
+    return dados
+
+
+# Erros de leitura do xlsx que apenas desligam a ingestão incremental
+_ERROS_XLSX = (zipfile.BadZipFile, ElementTree.ParseError, KeyError, ValueError, TypeError)
+
+
+# Trechos internos de <sheetData> da aba de doações e de <sst> (textos
+# compartilhados), como memoryview para fatiar sem copiar o XML; None se a
+# pasta não tem o formato esperado
+def _trechos_incrementais(pasta):
+    if any(pasta.caminhos.get(aba) is None for aba in ABAS_PLANILHA):
+        return None
+    xml = pasta.xml_aba(ABA_INCREMENTAL)
+    limites = delimitar(xml, b'sheetData')
+    xml_textos = pasta.xml_textos()
+    limites_textos = delimitar(xml_textos, b'sst') if xml_textos else (0, 0)
+    if limites is None or limites_textos is None:
+        return None
+    return memoryview(xml)[slice(*limites)], memoryview(xml_textos)[slice(*limites_textos)]
+
+
+# Impressão digital do que a ingestão incremental não relê: as outras abas,
+# os estilos (formatos de data) e o calendário da pasta
+def _hash_fixos(pasta):
+    hash_fixos = hashlib.sha256(b'1904' if pasta.date1904 else b'1900')
+    partes = [pasta.xml_aba(aba) for aba in ABAS_PLANILHA if aba != ABA_INCREMENTAL]
+    for parte in partes + [pasta.xml('xl/styles.xml')]:
+        hash_fixos.update(hashlib.sha256(parte).digest())
+    return hash_fixos.hexdigest()
+
+
+# Colunas numéricas (números do Excel, a partir de 1) em que uma fórmula sem
+# valor calculado é lida como texto, para a limpeza avaliar
+def _colunas_formula(colunas):
+    return {numero for numero, col in enumerate(colunas, 1) if col in COLUNAS_NUMERICAS}
+
+
+# Célula com fórmula e sem valor calculado (<v/>, <v></v> ou nenhum <v>)
+_FORMULA_SEM_VALOR = re.compile(rb'(?:</f>|<f\b[^>]*/>)(?:<v\s*/>|<v></v>|</c>)')
+
+
+# Aba de doações relida com o texto das fórmulas sem valor calculado nas
+# colunas numéricas, para a limpeza avaliar como na leitura em fluxo (o
+# pd.read_excel as lê vazias e descarta as linhas de modelo do fim). None
+# quando não há fórmulas assim ou a aba foge do formato simples (cabeçalho
+# fora da linha 1, linha mais larga que o cabeçalho): aí vale a leitura do
+# pd.read_excel, com essas fórmulas zeradas.
+def _doacoes_com_formulas(conteudo):
+    try:
+        pasta = PastaXlsx(conteudo)
+        trechos = _trechos_incrementais(pasta)
+        if trechos is None or not _FORMULA_SEM_VALOR.search(trechos[0]):
+            return None
+        trecho = bytes(trechos[0])
+        fim = fim_da_linha(trecho, 1) if re.match(rb'\s*<row\b[^>]*?\br="1"', trecho) else None
+        if fim is None:
+            return None
+        textos = ler_textos(bytes(trechos[1]))
+        cabecalho = pasta.ler_linhas(trecho[:fim], textos)
+        if not cabecalho or not cabecalho[0][1]:
+            return None
+        colunas = nomes_colunas(cabecalho[0][1])
+        linhas = pasta.ler_linhas(trecho[fim:], textos, _colunas_formula(colunas))
+        bloco = montar_bloco(linhas, 2, colunas)
+    except _ERROS_XLSX:
+        return None
+    return None if bloco is None else bloco.reset_index(drop=True)
+
+
+# Última linha do Excel com valor digitado, procurando de trás para frente
+# em janelas crescentes (as linhas de modelo ficam no fim da aba)
+def _ultima_digitada(pasta, trecho, textos):
+    fim = len(trecho)
+    janela = 64
+    while fim > 0:
+        inicio = fim
+        for _ in range(janela):
+            anterior = trecho.rfind(b'<row', 0, inicio)
+            if anterior < 0:
+                break
+            inicio = anterior
+        if inicio == fim:
+            break
+        digitadas = [numero for numero, _, digitada in pasta.ler_linhas(trecho[inicio:fim], textos) if digitada]
+        if digitadas:
+            return max(digitadas)
+        fim = inicio
+        janela *= 2
+    return 1
+
+
+# Limpeza e schema de um bloco de linhas novas; retorna a memória do bloco
+# antes do schema e o RelatorioLimpeza
+def _preparar_bloco(bloco, primeira_linha):
+    if not len(bloco):
+        return 0, RelatorioLimpeza()
+    memoria = int(bloco.memory_usage(index=False, deep=True).sum())
+    relatorio = limpar_doacoes(bloco, primeira_linha)
+    aplicar_schema_doacoes(bloco)
+    return memoria, relatorio
+
+
+# Prepara o estado da ingestão incremental logo após uma carga completa:
+# localiza a base na aba e separa dos relatórios a parte das linhas finais,
+# que serão relidas. None se a aba não permite ingestão incremental.
+def preparar_ingestao(conteudo, dados):
+    try:
+        pasta = PastaXlsx(conteudo)
+        trechos = _trechos_incrementais(pasta)
+        if trechos is None:
+            return None
+        trecho, xml_textos = bytes(trechos[0]), bytes(trechos[1])
+        if not re.match(rb'\s*<row\b[^>]*?\br="1"', trecho):
+            return None
+        textos = ler_textos(xml_textos)
+        colunas = list(dados.doacoes.columns)
+        linha_base = _ultima_digitada(pasta, trecho, textos)
+        tamanho_base = fim_da_linha(trecho, linha_base)
+        if tamanho_base is None:
+            return None
+        linhas = pasta.ler_linhas(trecho[tamanho_base:], textos, _colunas_formula(colunas))
+        cauda = montar_bloco(linhas, linha_base + 1, colunas)
+        if cauda is None or any(numero <= linha_base for numero, _, _ in linhas):
+            return None
+        if len(dados.doacoes) != linha_base - 1 + len(cauda):
+            return None
+        memoria_cauda, limpeza_cauda = _preparar_bloco(cauda, linha_base + 1)
+    except _ERROS_XLSX:
+        return None
+
+    return EstadoIngestao(
+        linha_base=linha_base,
+        tamanho_base=tamanho_base,
+        hash_base=hashlib.sha256(trecho[:tamanho_base]).hexdigest(),
+        tamanho_textos=len(xml_textos),
+        hash_textos=hashlib.sha256(xml_textos).hexdigest(),
+        hash_fixos=_hash_fixos(pasta),
+        colunas=colunas,
+        limpeza_base=dados.relatorio_limpeza.somar(limpeza_cauda, -1).__dict__,
+        memoria_base=dados.relatorio_memoria.antes.get(ABA_INCREMENTAL, 0) - memoria_cauda,
+    )
+
+
+# Leitura em fluxo da planilha para logs de doações muito grandes: o XML da
+# aba é descomprimido aos poucos e as linhas vêm em blocos de
+# `tamanho_bloco`, cada um limpo, compactado (schema) e somado ao cubo antes
+# do próximo, sem ter a aba bruta inteira (XML ou linhas) em memória. Já
+# deixa pronto o estado da ingestão incremental. Retorna None quando a aba
+# foge do formato simples (cabeçalho fora da linha 1, linha mais larga que o
+# cabeçalho, sem linhas de dados), e a carga volta ao pd.read_excel.
+# Atenção: os tipos são inferidos por bloco; numa coluna de texto com
+# valores numéricos o resultado pode diferir da leitura da aba inteira.
+def carregar_em_fluxo(conteudo, hash_conteudo, tamanho_bloco=TAMANHO_BLOCO):
+    inicio = time.perf_counter()
+    try:
+        pasta = PastaXlsx(conteudo)
+        if any(pasta.caminhos.get(aba) is None for aba in ABAS_PLANILHA):
+            return None
+        xml_textos = pasta.xml_textos()
+        limites_textos = delimitar(xml_textos, b'sst') if xml_textos else (0, 0)
+        if limites_textos is None:
+            return None
+        xml_textos = xml_textos[slice(*limites_textos)]
+        textos = ler_textos(xml_textos)
+
+        leitura = _LeituraEmFluxo(pasta, textos, tamanho_bloco)
+        for trecho in pasta.iterar_trechos(ABA_INCREMENTAL):
+            if not leitura.receber(trecho):
+                return None
+        if not leitura.terminar():
+            return None
+
+        abas = pd.read_excel(io.BytesIO(conteudo), sheet_name=[aba for aba in ABAS_PLANILHA if aba != ABA_INCREMENTAL])
+        hash_fixos = _hash_fixos(pasta)
+    except _ERROS_XLSX:
+        return None
+
+    participantes, categorias = abas['participantes'], abas['categorias']
+    participantes['Grupo'] = participantes['Grupo'].astype(str)
+    relatorio_memoria = RelatorioMemoria()
+    for aba, frame in (('participantes', participantes), ('categorias', categorias)):
+        relatorio_memoria.antes[aba] = int(frame.memory_usage(deep=True).sum())
+    aplicar_schema_cadastros(participantes, categorias)
+    for aba, frame in (('participantes', participantes), ('categorias', categorias)):
+        relatorio_memoria.depois[aba] = int(frame.memory_usage(deep=True).sum())
+
+    doacoes = _juntar_blocos(leitura.blocos)
+    indice = int(pd.RangeIndex(len(doacoes)).memory_usage())
+    relatorio_memoria.antes[ABA_INCREMENTAL] = leitura.memoria + leitura.memoria_cauda + indice
+    relatorio_memoria.depois[ABA_INCREMENTAL] = int(doacoes.memory_usage(deep=True).sum())
+    cubo = _alinhar_cubo(combinar_cubos(*leitura.cubos), doacoes)
+
+    ingestao = EstadoIngestao(
+        linha_base=leitura.linha_base,
+        tamanho_base=leitura.tamanho_base,
+        hash_base=leitura.hash_base.hexdigest(),
+        tamanho_textos=len(xml_textos),
+        hash_textos=hashlib.sha256(xml_textos).hexdigest(),
+        hash_fixos=hash_fixos,
+        colunas=leitura.colunas,
+        limpeza_base=leitura.limpeza.__dict__,
+        memoria_base=leitura.memoria + indice,
+    )
+    total = time.perf_counter() - inicio
+    return DadosPlanilha(
+        participantes, categorias, doacoes, hash_conteudo, leitura.limpeza.somar(leitura.limpeza_cauda),
+        relatorio_memoria, cubo=cubo, ingestao=ingestao,
+        tempos_carga={'leitura em fluxo': total - leitura.tempo_preparo, 'limpeza e schema': leitura.tempo_preparo},
+    )
+
+
+# Estado da leitura em fluxo da aba de doações. A base (até a última linha
+# digitada vista) entra no hash conforme avança; as linhas depois dela ficam
+# pendentes até aparecer outra digitada ou a aba acabar (são a cauda).
+class _LeituraEmFluxo:
+    def __init__(self, pasta, textos, tamanho_bloco):
+        self.pasta = pasta
+        self.textos = textos
+        self.tamanho_bloco = max(int(tamanho_bloco), 1)
+        self.colunas = None
+        self.formulas = frozenset()
+        self.linha_base = 1
+        self.tamanho_base = 0
+        self.hash_base = hashlib.sha256()
+        self.blocos = []
+        self.cubos = []
+        self.limpeza = RelatorioLimpeza()
+        self.limpeza_cauda = RelatorioLimpeza()
+        self.memoria = 0
+        self.memoria_cauda = 0
+        self.tempo_preparo = 0.0
+        self._bytes_pendentes = []
+        self._linhas = []
+        self._primeira = 2
+        self._ultima_lida = 0
+
+    # Processa um trecho de <sheetData>; False se o formato não serve
+    def receber(self, trecho):
+        if self.colunas is None and trecho.strip() and not self._ler_cabecalho(trecho):
+            return False
+        linhas = self.pasta.ler_linhas(trecho, self.textos, self.formulas)
+        if not linhas:
+            self._bytes_pendentes.append(trecho)
+            return True
+        if any(numero <= anterior for (numero, _, _), anterior in zip(
+            linhas, [self._ultima_lida] + [numero for numero, _, _ in linhas[:-1]]
+        )):
+            return False
+        self._ultima_lida = linhas[-1][0]
+
+        if linhas[0][0] == 1:
+            linhas[0] = (1, linhas[0][1], True)
+
+        digitadas = [numero for numero, _, digitada in linhas if digitada]
+        if digitadas:
+            self.linha_base = max(digitadas)
+            fim = fim_da_linha(trecho, self.linha_base)
+            if fim is None:
+                return False
+            for parte in self._bytes_pendentes:
+                self.hash_base.update(parte)
+                self.tamanho_base += len(parte)
+            self.hash_base.update(memoryview(trecho)[:fim])
+            self.tamanho_base += fim
+            self._bytes_pendentes = [memoryview(trecho)[fim:]]
+        else:
+            self._bytes_pendentes.append(trecho)
+
+        self._linhas += [linha for linha in linhas if linha[0] > 1]
+        if self.linha_base - self._primeira + 1 >= self.tamanho_bloco:
+            return self._fechar_bloco(self.linha_base)
+        return True
+
+    # Nomes das colunas pela linha 1, que precisa abrir a aba (antes das
+    # outras linhas, que dependem deles para saber onde há fórmulas)
+    def _ler_cabecalho(self, trecho):
+        fim = fim_da_linha(trecho, 1) if re.match(rb'\s*<row\b[^>]*?\br="1"', trecho) else None
+        cabecalho = self.pasta.ler_linhas(trecho[:fim], self.textos) if fim else []
+        if not cabecalho or not cabecalho[0][1]:
+            return False
+        self.colunas = nomes_colunas(cabecalho[0][1])
+        self.formulas = _colunas_formula(self.colunas)
+        return True
+
+    # Fecha os blocos que faltam: o último da base e a cauda
+    def terminar(self):
+        if self.colunas is None:
+            return False
+        if self.linha_base >= self._primeira and not self._fechar_bloco(self.linha_base):
+            return False
+        cauda = montar_bloco(self._linhas, self._primeira, self.colunas)
+        if cauda is None:
+            return False
+        inicio = time.perf_counter()
+        self.memoria_cauda, self.limpeza_cauda = _preparar_bloco(cauda, self._primeira)
+        self.tempo_preparo += time.perf_counter() - inicio
+        self.blocos.append(cauda)
+        self.cubos.append(montar_cubo(cauda))
+        return sum(len(bloco) for bloco in self.blocos) > 0
+
+    # Monta, limpa e agrega as linhas pendentes até a linha `ultima` do Excel
+    def _fechar_bloco(self, ultima):
+        bloco = montar_bloco(self._linhas, self._primeira, self.colunas, ultima=ultima)
+        if bloco is None:
+            return False
+        inicio = time.perf_counter()
+        memoria, limpeza = _preparar_bloco(bloco, self._primeira)
+        self.tempo_preparo += time.perf_counter() - inicio
+        self.memoria += memoria
+        self.limpeza = self.limpeza.somar(limpeza)
+        self.blocos.append(bloco)
+        self.cubos.append(montar_cubo(bloco))
+        self._linhas = [linha for linha in self._linhas if linha[0] > ultima]
+        self._primeira = ultima + 1
+        return True
+
+
+# Tipo comum de uma coluna entre blocos de doações, para que a junção
+# mantenha o schema compacto (None: deixa como está). Categóricas juntam as
+# categorias (ordenadas, como no astype('category') da carga completa) e
+# inteiros reduzidos sobem só até o menor tipo que comporta todos os blocos.
+def _tipo_comum(series):
+    tipos = [serie.dtype for serie in series]
+    if all(tipo == tipos[0] for tipo in tipos[1:]):
+        return None
+    preenchidas = [serie for serie in series if serie.notna().any()]
+    if any(isinstance(serie.dtype, pd.CategoricalDtype) for serie in preenchidas):
+        categorias = None
+        for serie in preenchidas:
+            valores = serie.cat.categories if isinstance(serie.dtype, pd.CategoricalDtype) else serie.dropna().unique()
+            valores = pd.Index(valores)
+            categorias = valores if categorias is None else categorias.append(valores.difference(categorias, sort=False))
+        try:
+            categorias = categorias.sort_values()
+        except TypeError:
+            pass
+        return pd.CategoricalDtype(categorias)
+    if all(pd.api.types.is_numeric_dtype(tipo) and not pd.api.types.is_bool_dtype(tipo) for tipo in tipos):
+        return np.result_type(*tipos)
+    if preenchidas and all(serie.dtype == preenchidas[0].dtype for serie in preenchidas):
+        return preenchidas[0].dtype
+    return None
+
+
+# Junta blocos consecutivos de doações (já limpos) num frame só
+def _juntar_blocos(blocos):
+    blocos = [bloco for bloco in blocos if len(bloco)] or blocos[:1]
+    if len(blocos) == 1:
+        return blocos[0].reset_index(drop=True)
+    blocos = [bloco.copy(deep=False) for bloco in blocos]
+    for col in blocos[0].columns:
+        tipo = _tipo_comum([bloco[col] for bloco in blocos])
+        if tipo is not None:
+            for bloco in blocos:
+                bloco[col] = bloco[col].astype(tipo)
+    return pd.concat(blocos, ignore_index=True)
+
+
+# Linhas novas das doações (carga incremental com a base só no banco) com
+# os tipos de `esquema`, o frame sem linhas da versão anterior: categóricas
+# ganham as categorias dele (o cubo e as bases guardadas seguem com os
+# mesmos rótulos), colunas vazias nas novas e números mantêm o tipo dele
+def _cauda_no_esquema(esquema, cauda):
+    cauda = cauda.copy(deep=False)
+    for col in esquema.columns.intersection(cauda.columns):
+        tipo, serie = esquema[col].dtype, cauda[col]
+        if isinstance(tipo, pd.CategoricalDtype):
+            valores = pd.Index(serie.cat.categories if isinstance(serie.dtype, pd.CategoricalDtype)
+                               else serie.dropna().unique())
+            categorias = tipo.categories.append(valores.difference(tipo.categories, sort=False))
+            try:
+                categorias = categorias.sort_values()
+            except TypeError:
+                pass
+            cauda[col] = serie.astype(pd.CategoricalDtype(categorias))
+        elif serie.dtype != tipo:
+            if serie.isna().all() and not (pd.api.types.is_integer_dtype(tipo) and len(serie)):
+                cauda[col] = serie.astype(tipo)
+            elif all(pd.api.types.is_numeric_dtype(t) and not pd.api.types.is_bool_dtype(t) for t in (tipo, serie.dtype)):
+                cauda[col] = serie.astype(np.result_type(tipo, serie.dtype))
+    return cauda
+
+
+# Dimensões categóricas do cubo com as mesmas categorias das doações
+def _alinhar_cubo(cubo, doacoes, dimensoes=DIMENSOES_CUBO):
+    tipos = {
+        col: doacoes[col].dtype for col in cubo.columns
+        if col in dimensoes and col in doacoes.columns and cubo[col].dtype != doacoes[col].dtype
+    }
+    return cubo.astype(tipos) if tipos else cubo
+
+
+# Contadores da ingestão (exibidos na sidebar e nos benchmarks)
+@dataclass
+class EstatisticasIngestao:
+    cargas_completas: int = 0
+    cargas_incrementais: int = 0
+    linhas_incrementais: int = 0
+
+
+# Ingestão incremental das doações, compartilhada pelo processo. As doações
+# só crescem durante a sprint: numa recarga em que a base da aba (bytes do
+# XML e textos compartilhados) e as outras abas não mudaram, só as linhas
+# novas são lidas, limpas e anexadas ao frame, e o cubo de agregados recebe
+# apenas os totais delas. Qualquer edição na base cai na carga completa.
+# Com o banco de doações, as linhas só ficam em memória até chegarem a ele:
+# daí em diante os dados publicados têm só os agregados, a carga incremental
+# lê apenas as linhas novas e, ao iniciar, os dados vêm do banco.
+class IngestaoIncremental:
+    def __init__(self, fonte, diretorio=SNAPSHOT_DIR, banco=None):
+        self.fonte = fonte
+        self.diretorio = diretorio
+        # Banco de doações (gincana_banco.BancoDoacoes) mantido em dia com
+        # cada versão nova da planilha; None sem banco
+        self.banco = banco
+        self.estatisticas = EstatisticasIngestao()
+        self.dados = None
+        self._textos = None
+        self._cubo_base = None
+        self._serie_base = None
+        self._indice_base = None
+        self._metas_base = None
+        self._pontos_base = None
+        # Horário da última consulta à fonte que confirmou os dados atuais
+        # (None enquanto só houver os dados do último snapshot bom)
+        self.confirmado_em = None
+        # Horário em que o snapshot servido por `anteriores()` foi gravado
+        self.salvo_em = None
+        # (erro, horário) da última consulta à fonte que falhou; None depois
+        # de uma carga boa
+        self.ultima_falha = None
+        # Posições de participantes e grupos a cada versão dos dados
+        self.placar = HistoricoPlacar(MAX_FOTOS_PLACAR)
+        self._lock = threading.RLock()
+
+    # Primeira pintura sem rede (stale-while-revalidate): os dados do último
+    # snapshot bom desta fonte, ainda que a planilha já tenha mudado. Quem
+    # consulta a fonte e troca os dados pela versão nova é o atualizador;
+    # como o snapshot guarda o estado da ingestão, a troca costuma ser
+    # incremental. None se não houver snapshot (ou os dados ainda não
+    # confirmados estiverem sendo lidos).
+    def anteriores(self):
+        dados = self.dados
+        if dados is not None:
+            return dados
+        with self._lock:
+            if self.dados is None:
+                dados = self._carregar_do_banco()
+                if dados is None:
+                    ultimo = ler_ultimo(self.fonte.origem, self.diretorio)
+                    dados = carregar_snapshot(ultimo[0], self.diretorio) if ultimo else None
+                    if dados is not None:
+                        self._derivar_base(dados)
+                        self.salvo_em = ultimo[1]
+                if dados is not None:
+                    self._fotografar(dados, registrada_em=self.salvo_em)
+                    self.dados = dados
+            return self.dados
+
+    # Dados já carregados, sem consultar a fonte. Só a primeira chamada do
+    # processo carrega; chamadas simultâneas esperam essa carga e a reusam.
+    # Se ela falhou, devolve None sem tentar de novo nem esperar o lock:
+    # quem tenta de novo é o atualizador (atualizar()), e a falha fica em
+    # `ultima_falha`.
+    def atual(self):
+        dados = self.dados
+        if dados is not None or self.ultima_falha is not None:
+            return dados
+        with self._lock:
+            if self.dados is None and self.ultima_falha is None:
+                return self.atualizar()
+            return self.dados
+
+    # Dados atuais da planilha, relendo só o que mudou desde a última chamada.
+    # Uma falha fica registrada (erro e horário) até a próxima carga boa.
+    def atualizar(self):
+        with self._lock:
+            try:
+                dados = self._atualizar()
+            except Exception as erro:
+                self.ultima_falha = (erro, time.time())
+                raise
+            self.ultima_falha = None
+            return dados
+
+    # Consulta e carga de atualizar(), já com o lock
+    def _atualizar(self):
+        conteudo = self.fonte.obter()
+        hash_conteudo = self.fonte.hash_conteudo
+        if self.dados is not None and self.dados.hash_conteudo == hash_conteudo:
+            self.confirmado_em = time.time()
+            self._publicar_no_banco(self.dados)
+            return self.dados
+
+        versao_anterior = self.dados.hash_conteudo if self.dados is not None else None
+        dados = None
+        linhas_iguais = 0
+        if self.dados is not None and self.dados.ingestao is not None:
+            dados = self._anexar_novas(conteudo, hash_conteudo)
+            linhas_iguais = self.dados.ingestao.linhas_base if dados is not None else 0
+        if dados is not None and dados.doacoes_no_banco:
+            # Só as linhas novas estão em memória: vão para o banco antes de a
+            # versão ser publicada; se o banco não as receber, carga completa
+            if self._sincronizar_banco(dados, versao_anterior, linhas_iguais):
+                dados = self._sem_linhas(dados)
+            else:
+                dados, linhas_iguais = None, 0
+        if dados is None:
+            dados = carregar_planilha(self.fonte, self.diretorio, revalidar=False)
+            self._textos = None
+            self._derivar_base(dados)
+            self.estatisticas.cargas_completas += 1
+        elif not dados.doacoes_no_banco:
+            inicio = time.perf_counter()
+            try:
+                salvar_snapshot(dados, self.diretorio, anterior=versao_anterior)
+            except (OSError, ValueError, TypeError):
+                pass
+            dados.tempos_carga['gravação do snapshot'] = time.perf_counter() - inicio
+        self._fotografar(dados, linhas_iguais)
+        try:
+            registrar_ultimo(self.fonte.origem, hash_conteudo, self.diretorio)
+        except OSError:
+            pass
+        self.confirmado_em = time.time()
+        self.dados = dados
+        self._publicar_no_banco(dados, versao_anterior, linhas_iguais)
+        return dados
+
+    # Foto do placar da nova versão; na carga incremental só as doações
+    # depois das `linhas_iguais` primeiras são somadas. Com as doações no
+    # banco, soma o cubo (mesmos totais por nome e grupo).
+    def _fotografar(self, dados, linhas_iguais=0, registrada_em=None):
+        inicio = time.perf_counter()
+        if dados.doacoes_no_banco:
+            self.placar.registrar(dados.hash_conteudo, dados.participantes, dados.cubo, 0, 0, registrada_em)
+        else:
+            linhas_base = dados.ingestao.linhas_base if dados.ingestao is not None else None
+            self.placar.registrar(dados.hash_conteudo, dados.participantes, dados.doacoes, linhas_base, linhas_iguais,
+                                  registrada_em)
+        dados.tempos_carga['placar'] = time.perf_counter() - inicio
+
+    # Leva a versão ao banco de doações, se houver; quando o banco está na
+    # versão anterior, só as doações depois das `linhas_iguais` são gravadas.
+    # Qualquer erro aqui é registrado no log e em `banco.ultimo_erro`, sem
+    # derrubar a carga. True se o banco ficou (ou já estava) na versão.
+    def _sincronizar_banco(self, dados, versao_anterior=None, linhas_iguais=0):
+        if self.banco is None:
+            return False
+        if self.banco.versao == dados.hash_conteudo:
+            return True
+        inicio = time.perf_counter()
+        try:
+            self.banco.sincronizar(dados, versao_anterior, linhas_iguais, inicio_doacoes=dados.inicio_doacoes,
+                                   metadados={**_metadados(dados), 'salvo_em': time.time()})
+        except Exception as erro:
+            _log.exception('falha ao sincronizar o banco de doações com a versão %s', dados.hash_conteudo)
+            self.banco.ultimo_erro = erro
+        dados.tempos_carga['banco'] = time.perf_counter() - inicio
+        return self.banco.versao == dados.hash_conteudo
+
+    # Sincroniza os dados já publicados; com o banco em dia, publica no
+    # lugar deles a versão sem as linhas (que passam a ser lidas do banco)
+    def _publicar_no_banco(self, dados, versao_anterior=None, linhas_iguais=0):
+        if self._sincronizar_banco(dados, versao_anterior, linhas_iguais) and len(dados.doacoes):
+            self._indice_base = None
+            self.dados = self._sem_linhas(dados)
+
+    # Os mesmos dados com `doacoes` só com as colunas e sem o índice de
+    # participantes (que aponta para as linhas)
+    @staticmethod
+    def _sem_linhas(dados):
+        doacoes = dados.doacoes.iloc[:0].copy()
+        relatorio_memoria = RelatorioMemoria(dict(dados.relatorio_memoria.antes), dict(dados.relatorio_memoria.depois))
+        relatorio_memoria.depois[ABA_INCREMENTAL] = int(doacoes.memory_usage(deep=True).sum())
+        return replace(dados, doacoes=doacoes, inicio_doacoes=dados.total_doacoes, indice_participantes=None,
+                       relatorio_memoria=relatorio_memoria)
+
+    # Dados da versão gravada no banco de doações, sem as linhas em memória:
+    # cadastros, relatórios e estado da ingestão vêm do banco; cubo, série
+    # diária, metas e validação de pontos são somados bloco a bloco, com a
+    # base da ingestão separada do resto (como numa carga completa). None
+    # sem banco, com ele vazio ou num erro ao ler.
+    def _carregar_do_banco(self):
+        if self.banco is None:
+            return None
+        inicio = time.perf_counter()
+        try:
+            metadados = self.banco.metadados()
+            if metadados is None or 'relatorio_limpeza' not in metadados:
+                return None
+            participantes, categorias = self.banco.cadastros()
+            tipos = self.banco.categorias_doacoes()
+            esquema = self.banco.doacoes(limite=0, categorias=tipos).reset_index(drop=True)
+            ingestao = EstadoIngestao(**metadados['ingestao']) if metadados.get('ingestao') else None
+            linhas_base = ingestao.linhas_base if ingestao is not None else metadados['linhas']
+            partes = {parte: {'cubos': [montar_cubo(esquema)], 'series': [montar_serie_diaria(esquema)],
+                              'metas': [montar_tabela_metas(esquema, categorias)], 'pontos': RelatorioPontos()}
+                      for parte in ('base', 'resto')}
+            for bloco in self.banco.blocos_doacoes(tamanho=TAMANHO_BLOCO, categorias=tipos):
+                posicao = int(bloco.index[0])
+                bloco = bloco.reset_index(drop=True)
+                corte = min(max(linhas_base - posicao, 0), len(bloco))
+                for parte, trecho, inicio_trecho in (('base', bloco.iloc[:corte], posicao),
+                                                     ('resto', bloco.iloc[corte:], posicao + corte)):
+                    if len(trecho):
+                        acumulado = partes[parte]
+                        acumulado['cubos'].append(montar_cubo(trecho))
+                        acumulado['series'].append(montar_serie_diaria(trecho))
+                        acumulado['metas'].append(montar_tabela_metas(trecho, categorias))
+                        acumulado['pontos'] = acumulado['pontos'].somar(validar_pontos(trecho, categorias),
+                                                                        inicio_trecho)
+        except (sqlite3.Error, ValueError, TypeError, KeyError):
+            _log.exception('falha ao carregar os dados do banco de doações')
+            return None
+
+        base, resto = partes['base'], partes['resto']
+        self._textos = None
+        self._indice_base = None
+        self._cubo_base = combinar_cubos(*base['cubos'])
+        self._serie_base = combinar_cubos(*base['series'], dimensoes=DIMENSOES_SERIE)
+        self._metas_base = combinar_tabelas_metas(*base['metas'])
+        self._pontos_base = base['pontos']
+        relatorio_memoria = RelatorioMemoria(**metadados['relatorio_memoria'])
+        relatorio_memoria.depois[ABA_INCREMENTAL] = int(esquema.memory_usage(deep=True).sum())
+        self.salvo_em = metadados.get('salvo_em')
+        return DadosPlanilha(
+            participantes, categorias, esquema, metadados['versao'],
+            RelatorioLimpeza(**metadados['relatorio_limpeza']), relatorio_memoria,
+            cubo=combinar_cubos(self._cubo_base, *resto['cubos']),
+            serie_diaria=combinar_cubos(self._serie_base, *resto['series'], dimensoes=DIMENSOES_SERIE),
+            tabela_metas=combinar_tabelas_metas(self._metas_base, *resto['metas']),
+            relatorio_pontos=self._pontos_base.somar(resto['pontos'], 0),
+            ingestao=ingestao, tempos_carga={'banco': time.perf_counter() - inicio},
+            inicio_doacoes=metadados['linhas'],
+        )
+
+    # Estruturas derivadas de uma carga completa: cubo, série diária, índice
+    # de participantes, metas e validação de pontos. De cada uma fica
+    # guardada a parte da base, que a carga incremental só estende.
+    def _derivar_base(self, dados):
+        self._cubo_base = None
+        self._serie_base = None
+        inicio = time.perf_counter()
+        dados.cubo = self._montar_cubo(dados)
+        dados.tempos_carga['cubo'] = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        dados.serie_diaria = self._montar_serie(dados)
+        dados.tempos_carga['série diária'] = time.perf_counter() - inicio
+
+        linhas_base = dados.ingestao.linhas_base if dados.ingestao is not None else len(dados.doacoes)
+        base = dados.doacoes.iloc[:linhas_base]
+        cauda = dados.doacoes.iloc[linhas_base:]
+        inicio = time.perf_counter()
+        self._indice_base = IndiceParticipantes(dados.participantes, base)
+        dados.indice_participantes = self._indice_base.estender(dados.doacoes, linhas_base, dados.participantes)
+        dados.tempos_carga['índice de participantes'] = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        self._metas_base = montar_tabela_metas(base, dados.categorias)
+        dados.tabela_metas = combinar_tabelas_metas(self._metas_base, montar_tabela_metas(cauda, dados.categorias))
+        dados.tempos_carga['metas'] = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        self._pontos_base = validar_pontos(base, dados.categorias)
+        dados.relatorio_pontos = self._pontos_base.somar(validar_pontos(cauda, dados.categorias), linhas_base)
+        dados.tempos_carga['validação de pontos'] = time.perf_counter() - inicio
+
+    def _montar_cubo(self, dados):
+        if dados.cubo is not None:
+            # Com o banco, a base do cubo fica guardada: a carga incremental
+            # não terá as linhas da base para somá-las de novo
+            if self.banco is not None and dados.ingestao is not None:
+                self._cubo_base = montar_cubo(dados.doacoes.iloc[:dados.ingestao.linhas_base])
+            return dados.cubo
+        if dados.ingestao is None:
+            return montar_cubo(dados.doacoes)
+        linhas_base = dados.ingestao.linhas_base
+        self._cubo_base = montar_cubo(dados.doacoes.iloc[:linhas_base])
+        return combinar_cubos(self._cubo_base, montar_cubo(dados.doacoes.iloc[linhas_base:]))
+
+    # Série diária guardando a parte da base, como o cubo
+    def _montar_serie(self, dados):
+        if dados.ingestao is None:
+            return montar_serie_diaria(dados.doacoes)
+        linhas_base = dados.ingestao.linhas_base
+        self._serie_base = montar_serie_diaria(dados.doacoes.iloc[:linhas_base])
+        return combinar_cubos(
+            self._serie_base, montar_serie_diaria(dados.doacoes.iloc[linhas_base:]), dimensoes=DIMENSOES_SERIE
+        )
+
+    # Carga incremental; None quando a base mudou e é preciso a carga completa.
+    # Com as doações anteriores só no banco, o frame devolvido começa na base
+    # anterior e as bases guardadas dos agregados recebem só as linhas novas.
+    def _anexar_novas(self, conteudo, hash_conteudo):
+        anterior = self.dados
+        estado = anterior.ingestao
+        no_banco = anterior.doacoes_no_banco
+        bases = (self._cubo_base, self._serie_base, self._metas_base, self._pontos_base)
+        if no_banco and (self.banco is None or self.banco.versao != anterior.hash_conteudo
+                         or any(base is None for base in bases)):
+            return None
+        inicio = time.perf_counter()
+        try:
+            pasta = PastaXlsx(conteudo)
+            trechos = _trechos_incrementais(pasta)
+            if trechos is None or _hash_fixos(pasta) != estado.hash_fixos:
+                return None
+            trecho, xml_textos = trechos
+            hash_base = hashlib.sha256(trecho[:estado.tamanho_base])
+            hash_textos = hashlib.sha256(xml_textos[:estado.tamanho_textos])
+            if hash_base.hexdigest() != estado.hash_base or hash_textos.hexdigest() != estado.hash_textos:
+                return None
+
+            textos = self._textos
+            if textos is None:
+                textos = ler_textos(bytes(xml_textos[:estado.tamanho_textos]))
+            textos = textos + ler_textos(bytes(xml_textos[estado.tamanho_textos:]))
+
+            cauda = bytes(trecho[estado.tamanho_base:])
+            linhas = pasta.ler_linhas(cauda, textos, _colunas_formula(estado.colunas))
+            if any(numero <= estado.linha_base for numero, _, _ in linhas):
+                return None
+            digitadas = [numero for numero, _, digitada in linhas if digitada]
+            linha_base = max(digitadas, default=estado.linha_base)
+            fim_novas = fim_da_linha(cauda, linha_base) if linha_base > estado.linha_base else 0
+            novas = montar_bloco(linhas, estado.linha_base + 1, estado.colunas, ultima=linha_base)
+            resto = montar_bloco(linhas, linha_base + 1, estado.colunas)
+            if novas is None or resto is None or fim_novas is None:
+                return None
+            tempos = {'leitura incremental': time.perf_counter() - inicio}
+            inicio = time.perf_counter()
+            memoria_novas, limpeza_novas = _preparar_bloco(novas, estado.linha_base + 1)
+            memoria_resto, limpeza_resto = _preparar_bloco(resto, linha_base + 1)
+            tempos['limpeza e schema'] = time.perf_counter() - inicio
+        except _ERROS_XLSX:
+            return None
+
+        if no_banco:
+            doacoes = _cauda_no_esquema(anterior.doacoes, _juntar_blocos([novas, resto]))
+            inicio_doacoes = estado.linhas_base
+        else:
+            doacoes = _juntar_blocos([anterior.doacoes.iloc[:estado.linhas_base], novas, resto])
+            inicio_doacoes = 0
+        linhas_base = linha_base - 1
+
+        # Doações da posição `de` até `ate` (exclusive; None = até o fim) da aba
+        def trecho(de, ate=None):
+            return doacoes.iloc[de - inicio_doacoes:None if ate is None else ate - inicio_doacoes]
+
+        # Cubo: base anterior + totais das linhas novas + linhas finais relidas
+        inicio = time.perf_counter()
+        cubo_base = self._cubo_base
+        if cubo_base is None:
+            cubo_base = montar_cubo(anterior.doacoes.iloc[:estado.linhas_base])
+        cubo_base = _alinhar_cubo(cubo_base, doacoes)
+        if linhas_base > estado.linhas_base:
+            cubo_base = combinar_cubos(cubo_base, montar_cubo(trecho(estado.linhas_base, linhas_base)))
+        cubo = combinar_cubos(cubo_base, montar_cubo(trecho(linhas_base)))
+        tempos['cubo'] = time.perf_counter() - inicio
+
+        # Série diária: mesma conta do cubo, por dia
+        inicio = time.perf_counter()
+        serie_base = self._serie_base
+        if serie_base is None:
+            serie_base = montar_serie_diaria(anterior.doacoes.iloc[:estado.linhas_base])
+        serie_base = _alinhar_cubo(serie_base, doacoes)
+        if linhas_base > estado.linhas_base:
+            serie_base = combinar_cubos(
+                serie_base, montar_serie_diaria(trecho(estado.linhas_base, linhas_base)), dimensoes=DIMENSOES_SERIE
+            )
+        serie = combinar_cubos(serie_base, montar_serie_diaria(trecho(linhas_base)), dimensoes=DIMENSOES_SERIE)
+        tempos['série diária'] = time.perf_counter() - inicio
+
+        # Índice de participantes, metas e validação: mesma conta, só com as
+        # doações depois da base anterior (sem índice com as doações no banco)
+        participantes, categorias = anterior.participantes, anterior.categorias
+        inicio = time.perf_counter()
+        indice_base = indice = None
+        if not no_banco:
+            indice_base = self._indice_base
+            if indice_base is None:
+                indice_base = IndiceParticipantes(participantes, anterior.doacoes.iloc[:estado.linhas_base])
+            if linhas_base > estado.linhas_base:
+                indice_base = indice_base.estender(doacoes.iloc[:linhas_base], estado.linhas_base, participantes)
+            indice = indice_base.estender(doacoes, linhas_base, participantes)
+            tempos['índice de participantes'] = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        metas_base = self._metas_base
+        if metas_base is None:
+            metas_base = montar_tabela_metas(anterior.doacoes.iloc[:estado.linhas_base], categorias)
+        metas_base = _alinhar_cubo(metas_base, doacoes, DIMENSOES_METAS)
+        if linhas_base > estado.linhas_base:
+            metas_base = combinar_tabelas_metas(
+                metas_base, montar_tabela_metas(trecho(estado.linhas_base, linhas_base), categorias)
+            )
+        metas = combinar_tabelas_metas(metas_base, montar_tabela_metas(trecho(linhas_base), categorias))
+        tempos['metas'] = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        pontos_base = self._pontos_base
+        if pontos_base is None:
+            pontos_base = validar_pontos(anterior.doacoes.iloc[:estado.linhas_base], categorias)
+        if linhas_base > estado.linhas_base:
+            pontos_base = pontos_base.somar(
+                validar_pontos(trecho(estado.linhas_base, linhas_base), categorias), estado.linhas_base
+            )
+        relatorio_pontos = pontos_base.somar(validar_pontos(trecho(linhas_base), categorias), linhas_base)
+        tempos['validação de pontos'] = time.perf_counter() - inicio
+
+        hash_base.update(cauda[:fim_novas])
+        hash_textos.update(xml_textos[estado.tamanho_textos:])
+        limpeza_base = RelatorioLimpeza(**estado.limpeza_base).somar(limpeza_novas)
+        ingestao = EstadoIngestao(
+            linha_base=linha_base,
+            tamanho_base=estado.tamanho_base + fim_novas,
+            hash_base=hash_base.hexdigest(),
+            tamanho_textos=len(xml_textos),
+            hash_textos=hash_textos.hexdigest(),
+            hash_fixos=estado.hash_fixos,
+            colunas=estado.colunas,
+            limpeza_base=limpeza_base.__dict__,
+            memoria_base=estado.memoria_base + memoria_novas,
+        )
+        relatorio_memoria = RelatorioMemoria(
+            dict(anterior.relatorio_memoria.antes), dict(anterior.relatorio_memoria.depois)
+        )
+        relatorio_memoria.antes[ABA_INCREMENTAL] = ingestao.memoria_base + memoria_resto
+        relatorio_memoria.depois[ABA_INCREMENTAL] = int(doacoes.memory_usage(deep=True).sum())
+
+        self._textos = textos
+        self._cubo_base = cubo_base
+        self._serie_base = serie_base
+        self._indice_base = indice_base
+        self._metas_base = metas_base
+        self._pontos_base = pontos_base
+        self.estatisticas.cargas_incrementais += 1
+        # Linhas em branco do modelo entre a base anterior e a nova não contam
+        self.estatisticas.linhas_incrementais += len(digitadas)
+        return DadosPlanilha(
+            anterior.participantes, anterior.categorias, doacoes, hash_conteudo,
+            limpeza_base.somar(limpeza_resto), relatorio_memoria, cubo=cubo, serie_diaria=serie,
+            indice_participantes=indice, tabela_metas=metas, relatorio_pontos=relatorio_pontos,
+            ingestao=ingestao, tempos_carga=tempos, inicio_doacoes=inicio_doacoes,
+        )
+
+
+# Atualizador em segundo plano, um por processo: consulta a fonte a cada
+# `intervalo` segundos e troca os dados da ingestão de uma só vez (uma
+# atribuição). As sessões leem `ingestao.dados` sem esperar nada e seguem
+# com o DadosPlanilha anterior, que nunca é alterado, até a troca. Como só
+# esta thread consulta a fonte, há uma consulta por ciclo com qualquer
+# número de sessões abertas.
+class AtualizadorPlanilha:
+    def __init__(self, ingestao, intervalo=INTERVALO_ATUALIZACAO):
+        self.ingestao = ingestao
+        self.intervalo = intervalo
+        self.ciclos = 0
+        self.ultimo_erro = None
+        self.ultima_consulta = None
+        self._em_andamento = False
+        self._pedido = threading.Event()
+        self._parar = threading.Event()
+        self._ciclo = threading.Condition()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def ativo(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    # Inicia a thread (uma vez só; chamadas repetidas não fazem nada)
+    def iniciar(self):
+        with self._lock:
+            if self.intervalo > 0 and not self.ativo:
+                self._parar.clear()
+                self._thread = threading.Thread(target=self._executar, name='gincana-atualizador', daemon=True)
+                self._thread.start()
+        return self
+
+    def parar(self, timeout=None):
+        self._parar.set()
+        self._pedido.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    # Antecipa a próxima consulta (botão de recarga) e espera ela terminar.
+    # Pedidos de várias sessões no mesmo ciclo viram uma consulta só.
+    def solicitar(self, timeout=None):
+        if not self.ativo:
+            self._consultar()
+            return True
+        with self._ciclo:
+            alvo = self.ciclos + (2 if self._em_andamento else 1)
+            self._pedido.set()
+            return self._ciclo.wait_for(lambda: self.ciclos >= alvo, timeout)
+
+    def _executar(self):
+        while not self._parar.is_set():
+            self._pedido.clear()
+            self._consultar()
+            self._pedido.wait(self.intervalo)
+
+    def _consultar(self):
+        with self._ciclo:
+            self._em_andamento = True
+        try:
+            self.ingestao.atualizar()
+            self.ultimo_erro = None
+        except Exception as erro:
+            # Fonte fora do ar ou planilha inválida: as sessões seguem com os
+            # dados anteriores e o erro aparece na sidebar
+            self.ultimo_erro = erro
+        finally:
+            with self._ciclo:
+                self._em_andamento = False
+                self.ultima_consulta = time.time()
+                self.ciclos += 1
+                self._ciclo.notify_all()
+
+
+# Planilhas de várias edições e unidades, no formato "edição/unidade=origem"
+# separado por ';' ou quebra de linha (a unidade é opcional)
+PLANILHAS_FEDERADAS = os.environ.get('GINCANA_PLANILHAS', '')
+
+# Processos para interpretar em paralelo as planilhas federadas ainda sem
+# snapshot (0 = só threads; só compensa com mais de um núcleo)
+PROCESSOS_CARGA = int(os.environ.get('GINCANA_PROCESSOS_CARGA', '0'))
+
+# Colunas que identificam a partição (edição e unidade) nos quadros federados
+COLUNAS_PARTICAO = ['Edicao', 'Unidade']
+
+
+# Uma planilha do registro: edição da gincana, unidade da empresa e origem
+# (URL http(s) ou caminho local, como na FontePlanilha)
+@dataclass(frozen=True)
+class EdicaoPlanilha:
+    edicao: str
+    unidade: str
+    origem: str
+
+    @property
+    def chave(self):
+        return self.edicao, self.unidade
+
+    @property
+    def rotulo(self):
+        return f'{self.edicao} / {self.unidade}'
+
+
+def ler_registro(texto, unidade_padrao='Geral'):
+    edicoes = []
+    for entrada in re.split(r'[;\n]', texto or ''):
+        entrada = entrada.strip()
+        if not entrada:
+            continue
+        rotulo, separador, origem = entrada.partition('=')
+        edicao, _, unidade = rotulo.partition('/')
+        if not separador or not edicao.strip() or not origem.strip():
+            raise ValueError(f'Entrada inválida no registro de planilhas: {entrada!r} (use edição/unidade=origem)')
+        edicoes.append(EdicaoPlanilha(edicao.strip(), unidade.strip() or unidade_padrao, origem.strip()))
+    return edicoes
+
+
+# Interpreta uma planilha (bytes já baixados) e grava o snapshot, num
+# processo à parte: o parse do xlsx é Python puro e não roda em paralelo
+# em threads. O processo principal depois só lê o snapshot.
+def _interpretar_em_processo(origem, conteudo, diretorio):
+    fonte = FontePlanilha(origem)
+    fonte._atualizar_conteudo(conteudo)
+    carregar_planilha(fonte, diretorio, revalidar=False)
+    return fonte.hash_conteudo
+
+
+# Cópia rasa do quadro com as colunas da partição na frente
+def _marcar_particao(frame, edicao):
+    marcado = frame.copy(deep=False)
+    for posicao, (coluna, valor) in enumerate(zip(COLUNAS_PARTICAO, (edicao.edicao, edicao.unidade))):
+        marcado.insert(posicao, coluna, pd.Categorical.from_codes(np.zeros(len(frame), dtype=np.int8), [valor]))
+    return marcado
+
+
+# Junta os quadros das partições (colunas ausentes numa planilha ficam vazias)
+def _juntar_particoes(frames):
+    colunas = list(dict.fromkeys(col for frame in frames for col in frame.columns))
+    return _juntar_blocos([frame.reindex(columns=colunas) for frame in frames])
+
+
+# Planilhas federadas: os DadosPlanilha de cada edição/unidade e os quadros
+# juntos numa tabela só, marcados por Edicao e Unidade. As doações de cada
+# planilha ocupam um trecho contíguo (`particoes`), e o cubo federado
+# responde aos rankings entre edições sem reler nenhuma planilha.
+@dataclass
+class DadosFederados:
+    edicoes: list
+    dados: dict
+    participantes: pd.DataFrame
+    doacoes: pd.DataFrame
+    cubo: pd.DataFrame
+    # (início, fim) das doações de cada edição/unidade no quadro federado
+    particoes: dict
+    # Erro da última consulta de cada planilha que falhou
+    erros: dict = field(default_factory=dict)
+    tempos_carga: dict = field(default_factory=dict)
+
+    @property
+    def versao(self):
+        return hashlib.sha256(' '.join(
+            f'{chave}:{dados.hash_conteudo}:{len(dados.doacoes)}' for chave, dados in self.dados.items()
+        ).encode()).hexdigest()
+
+    def doacoes_de(self, chave):
+        inicio, fim = self.particoes[chave]
+        return self.doacoes.iloc[inicio:fim]
+
+
+# Registro de planilhas de várias edições e unidades, compartilhado pelo
+# processo. Cada planilha tem a sua IngestaoIncremental (fonte, cache e
+# pasta de snapshots próprios), e todas são consultadas ao mesmo tempo num
+# pool de threads (download, snapshot e ingestão incremental); com
+# `processos`, as planilhas ainda sem snapshot são interpretadas num pool
+# de processos. Só as partições que mudaram são marcadas de novo antes da
+# junção. Uma planilha que falha não derruba as outras: fica com os dados
+# anteriores (ou de fora) e o erro vai para DadosFederados.erros.
+class RegistroPlanilhas:
+    def __init__(self, edicoes, diretorio=SNAPSHOT_DIR, trabalhadores=None, processos=PROCESSOS_CARGA):
+        self.edicoes = list(edicoes)
+        if len({edicao.chave for edicao in self.edicoes}) != len(self.edicoes):
+            raise ValueError('Edição/unidade repetida no registro de planilhas')
+        self.ingestoes = {
+            edicao.chave: IngestaoIncremental(FontePlanilha(edicao.origem), os.path.join(
+                diretorio, 'edicoes', hashlib.sha256(repr(edicao.chave).encode()).hexdigest()[:16]
+            ))
+            for edicao in self.edicoes
+        }
+        self.trabalhadores = trabalhadores or max(1, min(8, len(self.edicoes)))
+        self.processos = processos
+        self.dados = None
+        self._marcados = {}
+        self._lock = threading.RLock()
+
+    def atual(self):
+        dados = self.dados
+        if dados is not None:
+            return dados
+        with self._lock:
+            if self.dados is None:
+                return self.atualizar()
+            return self.dados
+
+    # Consulta todas as planilhas em paralelo e refaz o quadro federado
+    def atualizar(self):
+        with self._lock:
+            inicio = time.perf_counter()
+            with ThreadPoolExecutor(self.trabalhadores, thread_name_prefix='gincana-registro') as pool:
+                if self.processos:
+                    self._interpretar_novas(pool)
+                consultas = {
+                    chave: pool.submit(ingestao.atualizar) for chave, ingestao in self.ingestoes.items()
+                }
+                por_chave, erros = {}, {}
+                for chave, consulta in consultas.items():
+                    try:
+                        por_chave[chave] = consulta.result()
+                    except Exception as erro:
+                        erros[chave] = str(erro)
+                        if self.ingestoes[chave].dados is not None:
+                            por_chave[chave] = self.ingestoes[chave].dados
+            tempos = {'carga': time.perf_counter() - inicio}
+            anterior = self.dados
+            if anterior is not None and anterior.erros == erros and anterior.dados.keys() == por_chave.keys() \
+                    and all(anterior.dados[chave] is dados for chave, dados in por_chave.items()):
+                return anterior
+            inicio = time.perf_counter()
+            self.dados = self._federar(por_chave, erros)
+            tempos['junção'] = time.perf_counter() - inicio
+            self.dados.tempos_carga = tempos
+            return self.dados
+
+    # Baixa as planilhas ainda não carregadas e interpreta em processos as
+    # que não têm snapshot (com uma só, não compensa subir um processo)
+    def _interpretar_novas(self, pool):
+        def obter(ingestao):
+            try:
+                return ingestao.fonte.obter()
+            except Exception:
+                # O erro reaparece (e é registrado) na consulta normal
+                return None
+
+        pendentes = [ingestao for ingestao in self.ingestoes.values() if ingestao.dados is None]
+        novas = [
+            (ingestao, conteudo) for ingestao, conteudo in zip(pendentes, pool.map(obter, pendentes))
+            if conteudo is not None and not os.path.isdir(_pasta_snapshot(ingestao.fonte.hash_conteudo, ingestao.diretorio))
+        ]
+        if len(novas) < 2:
+            return
+        contexto = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(min(self.processos, len(novas)), mp_context=contexto) as processos:
+            tarefas = [
+                processos.submit(_interpretar_em_processo, ingestao.fonte.origem, conteudo, ingestao.diretorio)
+                for ingestao, conteudo in novas
+            ]
+            for tarefa in tarefas:
+                try:
+                    tarefa.result()
+                except Exception:
+                    pass
+
+    def _federar(self, por_chave, erros):
+        partes = []
+        for edicao in self.edicoes:
+            dados = por_chave.get(edicao.chave)
+            if dados is None:
+                continue
+            marcado = self._marcados.get(edicao.chave)
+            if marcado is None or marcado[0] is not dados:
+                marcado = (dados, *(
+                    _marcar_particao(frame, edicao) for frame in (dados.participantes, dados.doacoes, dados.cubo)
+                ))
+                self._marcados[edicao.chave] = marcado
+            partes.append((edicao.chave, *marcado))
+
+        particoes, inicio = {}, 0
+        for chave, dados, *_ in partes:
+            particoes[chave] = (inicio, inicio + len(dados.doacoes))
+            inicio += len(dados.doacoes)
+        if not partes:
+            vazio = pd.DataFrame(columns=COLUNAS_PARTICAO)
+            return DadosFederados(self.edicoes, {}, vazio, vazio, vazio, {}, erros)
+        return DadosFederados(
+            self.edicoes,
+            {chave: dados for chave, dados, *_ in partes},
+            _juntar_particoes([parte[2] for parte in partes]),
+            _juntar_particoes([parte[3] for parte in partes]),
+            _juntar_particoes([parte[4] for parte in partes]),
+            particoes,
+            erros,
+        )
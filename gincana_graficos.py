@@ -0,0 +1,175 @@
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io
+
+# Limite (MB, medido pelo JSON das figuras) do cache de gráficos do processo
+LIMITE_CACHE_FIGURAS = float(os.environ.get('GINCANA_CACHE_FIGURAS_MB', '32')) * 1024 ** 2
+
+# Cores específicas de cada grupo no gráfico de barras
+CORES_GRUPOS = {
+    'PACE DO BEM': '#FF6B6B',
+    'MOTIVADOS NETSUPRE': '#4ECDC4',
+    'VIRTUX': '#45B7D1'
+}
+
+
+# Contadores do cache de gráficos (exibidos na sidebar e nos benchmarks)
+@dataclass
+class EstatisticasCache:
+    acertos: int = 0
+    faltas: int = 0
+    descartes: int = 0
+    bytes_em_uso: int = 0
+    figuras: int = 0
+
+    @property
+    def taxa_acerto(self):
+        consultas = self.acertos + self.faltas
+        return self.acertos / consultas if consultas else 0.0
+
+
+# Cache LRU de figuras Plotly prontas, compartilhado pelas sessões do
+# processo. A chave é (versão dos dados, grupo, sprint, id do gráfico, ...):
+# vistas repetidas e combinações comuns de filtros pulam a montagem da
+# figura. O tamanho de cada figura é o do seu JSON (medido uma vez, ao
+# entrar); passando do limite, as menos usadas recentemente saem.
+# Guarda a figura e não o JSON: refazer a figura a partir do JSON custa mais
+# que montá-la de novo, e o st.plotly_chart só aceita a figura.
+class CacheFiguras:
+    def __init__(self, limite_bytes=LIMITE_CACHE_FIGURAS):
+        self.limite_bytes = limite_bytes
+        self.estatisticas = EstatisticasCache()
+        self._figuras = OrderedDict()
+        self._lock = threading.Lock()
+
+    # Figura da chave; `montar()` só roda quando ela não está no cache. As
+    # figuras devolvidas são compartilhadas e não devem ser alteradas.
+    def obter(self, chave, montar):
+        with self._lock:
+            item = self._figuras.get(chave)
+            if item is not None:
+                self._figuras.move_to_end(chave)
+                self.estatisticas.acertos += 1
+                return item[0]
+            self.estatisticas.faltas += 1
+
+        figura = montar()
+        tamanho = len(plotly.io.to_json(figura, validate=False))
+        with self._lock:
+            if chave not in self._figuras:
+                self._figuras[chave] = (figura, tamanho)
+                self.estatisticas.bytes_em_uso += tamanho
+            while self.estatisticas.bytes_em_uso > self.limite_bytes and len(self._figuras) > 1:
+                _, (_, descartado) = self._figuras.popitem(last=False)
+                self.estatisticas.bytes_em_uso -= descartado
+                self.estatisticas.descartes += 1
+            self.estatisticas.figuras = len(self._figuras)
+        return figura
+
+    def limpar(self):
+        with self._lock:
+            self._figuras.clear()
+            self.estatisticas.bytes_em_uso = 0
+            self.estatisticas.figuras = 0
+
+
+# Barras individualizadas - cada grupo com sua própria barra e cor
+def grafico_pontos_por_grupo(pontos_por_grupo):
+    fig = go.Figure()
+
+    # Adicionar uma barra para cada grupo individualmente
+    for grupo in pontos_por_grupo.index:
+        cor = CORES_GRUPOS.get(grupo, '#888888')  # Cor padrão se não encontrado
+        fig.add_trace(go.Bar(
+            x=[grupo],
+            y=[pontos_por_grupo[grupo]],
+            name=grupo,
+            marker_color=cor,
+            text=[f"{pontos_por_grupo[grupo]:,.0f}"],
+            textposition='outside',
+            hovertemplate=f'<b>{grupo}</b><br>Pontos: %{{y:,.0f}}<extra></extra>'
+        ))
+
+    fig.update_layout(
+        title="Pontuação por Grupo - Comparação Individual",
+        xaxis_title="Grupos",
+        yaxis_title="Pontos",
+        showlegend=False,
+        height=500
+    )
+    return fig
+
+
+# Pizza (ou rosca, com `buraco`) da distribuição de uma série de totais
+def grafico_pizza(totais, titulo, buraco):
+    return px.pie(
+        values=totais.values,
+        names=totais.index,
+        title=titulo,
+        hole=buraco
+    )
+
+
+# Barras verticais por sprint
+def grafico_pontos_por_sprint(pontos_por_sprint):
+    fig = px.bar(
+        x=pontos_por_sprint.index,
+        y=pontos_por_sprint.values,
+        title="Pontuação por Sprint",
+        labels={'x': 'Sprint', 'y': 'Pontos'},
+        color=pontos_por_sprint.values,
+        color_continuous_scale='Blues',
+        text=pontos_por_sprint.values
+    )
+    fig.update_traces(texttemplate='%{text:.0f}', textposition='outside')
+    return fig
+
+
+# Barras horizontais de pontos por categoria de um grupo
+def grafico_categorias_do_grupo(cat_dist, grupo):
+    return px.bar(
+        x=cat_dist.values,
+        y=cat_dist.index,
+        orientation='h',
+        title=f"Pontos por Categoria - {grupo}",
+        color=cat_dist.values,
+        color_continuous_scale='Greens'
+    )
+
+
+# Corrida: uma linha de pontos acumulados por coluna de `acumulado` (grupos
+# com as cores do gráfico de barras)
+def grafico_corrida(acumulado, titulo):
+    fig = px.line(
+        acumulado,
+        x=acumulado.index,
+        y=list(acumulado.columns),
+        title=titulo,
+        labels={'x': 'Data', 'value': 'Pontos acumulados', 'variable': ''},
+        color_discrete_map=CORES_GRUPOS,
+        markers=len(acumulado) <= 60
+    )
+    fig.update_layout(hovermode='x unified', legend_title_text='')
+    return fig
+
+
+# Barras agrupadas dos pontos de cada grupo por edição/unidade
+def grafico_grupos_edicoes(ranking):
+    edicoes = ranking['Edicao'].astype(str) + ' / ' + ranking['Unidade'].astype(str)
+    fig = px.bar(
+        ranking.assign(Edicao_Unidade=edicoes),
+        x='Grupo',
+        y='Total_Pontos',
+        color='Edicao_Unidade',
+        barmode='group',
+        text='Medalha',
+        title="Pontuação dos Grupos por Edição",
+        labels={'Total_Pontos': 'Pontos', 'Edicao_Unidade': 'Edição / Unidade'}
+    )
+    fig.update_traces(textposition='outside')
+    return fig
@@ -0,0 +1,89 @@
+import contextlib
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+# Perfil de tempo do dashboard: ligado por GINCANA_PERFIL=1 no ambiente ou
+# por ?perfil=1 na URL. Cada rerun pode ser anexado como uma linha JSON em
+# GINCANA_PERFIL_ARQUIVO, para acompanhar regressões ao longo do tempo.
+PERFIL_ATIVO = os.environ.get('GINCANA_PERFIL', '').lower() in ('1', 'true', 'sim')
+ARQUIVO_PERFIL = os.environ.get(
+    'GINCANA_PERFIL_ARQUIVO', os.path.join(tempfile.gettempdir(), 'gincana_perfil.jsonl')
+)
+
+_lock_arquivo = threading.Lock()
+
+
+# Perfil ligado pelo ambiente ou pelo valor do parâmetro ?perfil= da URL
+def perfil_ativo(parametro=None):
+    return PERFIL_ATIVO or str(parametro or '').lower() in ('1', 'true', 'sim')
+
+
+# Cronômetro de etapas nomeadas de um rerun. Etapas podem ser aninhadas
+# (ex.: a aba e, dentro dela, cada gráfico) e ficam na ordem em que começaram,
+# com o caminho completo no nome ('Dashboard Geral › gráfico por grupo').
+# Desligado, etapa() não mede nada e custa só um nullcontext.
+class Cronometro:
+    SEPARADOR = ' › '
+
+    def __init__(self, ativo=True):
+        self.ativo = ativo
+        self.etapas = []
+        self._pilha = []
+        self._inicio = time.perf_counter()
+
+    def etapa(self, nome):
+        if not self.ativo:
+            return contextlib.nullcontext()
+        return self._medir(nome)
+
+    @contextlib.contextmanager
+    def _medir(self, nome):
+        self._pilha.append(nome)
+        registro = [self.SEPARADOR.join(self._pilha), 0.0]
+        self.etapas.append(registro)
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            registro[1] = time.perf_counter() - inicio
+            self._pilha.pop()
+
+    # Tempo desde a criação do cronômetro (o rerun inteiro até aqui)
+    @property
+    def total(self):
+        return time.perf_counter() - self._inicio
+
+    # Etapas de primeiro nível e o que sobrou fora delas
+    @property
+    def fora_das_etapas(self):
+        medido = sum(segundos for nome, segundos in self.etapas if self.SEPARADOR not in nome)
+        return max(self.total - medido, 0.0)
+
+    # Registro do rerun para o arquivo JSONL (tempos em ms). Uma etapa que
+    # roda mais de uma vez no rerun (ex.: um gráfico num laço) tem os tempos
+    # somados sob o mesmo nome.
+    def registro(self, **contexto):
+        etapas = {}
+        for nome, segundos in self.etapas:
+            etapas[nome] = etapas.get(nome, 0.0) + segundos
+        return {
+            'momento': datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
+            **contexto,
+            'total_ms': round(self.total * 1000, 3),
+            'etapas_ms': {nome: round(segundos * 1000, 3) for nome, segundos in etapas.items()},
+        }
+
+
+# Anexa um registro ao arquivo JSONL de perfis (sessões do mesmo processo
+# escrevem uma linha inteira por vez)
+def exportar_jsonl(registro, caminho=ARQUIVO_PERFIL):
+    pasta = os.path.dirname(caminho)
+    if pasta:
+        os.makedirs(pasta, exist_ok=True)
+    linha = json.dumps(registro, ensure_ascii=False) + '\n'
+    with _lock_arquivo, open(caminho, 'a', encoding='utf-8') as arquivo:
+        arquivo.write(linha)
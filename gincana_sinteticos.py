@@ -0,0 +1,164 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+
+from gincana_dados import ABAS_PLANILHA
+
+# Grupos da gincana (na ordem da planilha original)
+GRUPOS = ('PACE DO BEM', 'MOTIVADOS NETSUPRE', 'VIRTUX')
+
+SPRINTS = ('1ºSPRINT', '2ºSPRINT', '3ºSPRINT')
+
+# Chance de uma doação ganhar o bônus (Bonus_Pontos) do seu item
+PROBABILIDADE_BONUS = 0.3
+
+OBSERVACOES = ('Doação registrada', 'Doação com bônus')
+
+# Limite de linhas de uma aba do Excel (inclui o cabeçalho)
+MAX_LINHAS_XLSX = 1_048_576
+
+
+# Cadastros dos dados de demonstração (baseados na planilha original)
+def cadastros_demo():
+    participantes = pd.DataFrame({
+        'Nome': [
+            'Alexandre Alves', 'Ana Paula Martins', 'Bruno Hudson', 'Danillo Rodrigues',
+            'Durga', 'Eurípedes Lemes', 'Geovany Marcos', 'Gustavo Cordeiro', 'Igor Moreira',
+            'Ismael', 'Jessica Alcantara', 'Jorge Henrique', 'Jorge Nazaré', 'Kamila Nascimento',
+            'Lucas Dias', 'Lucas Rodrigues', 'Matheus Lima', 'Maycon cordeiro', 'Milena Jorge',
+            'Osias Fernando', 'Pabllo Gomes', 'Patricia Barbosa', 'Raécio Griêco', 'Thiago Porto',
+            'Tiago Alves', 'Wanderson Saldanha','Leonardo Max Pereira'
+        ],
+        'Grupo': ['MOTIVADOS NETSUPRE', 'VIRTUX', 'VIRTUX', 'VIRTUX', 'MOTIVADOS NETSUPRE', 'PACE DO BEM', 'PACE DO BEM', 'VIRTUX',
+                 'MOTIVADOS NETSUPRE', 'PACE DO BEM', 'MOTIVADOS NETSUPRE', 'PACE DO BEM', 'VIRTUX', 'VIRTUX', 'MOTIVADOS NETSUPRE', 'PACE DO BEM',
+                 'MOTIVADOS NETSUPRE', 'PACE DO BEM', 'PACE DO BEM', 'MOTIVADOS NETSUPRE', 'MOTIVADOS NETSUPRE', 'VIRTUX', 'PACE DO BEM', 'PACE DO BEM',
+                 'VIRTUX', 'MOTIVADOS NETSUPRE','VIRTUX']
+    })
+
+    categorias = pd.DataFrame({
+        'Categoria': ['Brinquedos', 'Brinquedos', 'Roupas', 'Roupas', 'Material Escolar', 'Material Escolar', 'Alimentos', 'Alimentos', 'Higiene', 'Higiene'],
+        'Tipo_Item': ['Novo', 'Usado bom estado', 'Peça de roupa', 'Par de calçados', 'Item individual', 'Kit completo', 'Kg solto', 'Cesta básica', 'Item de higiene', 'Pacote de fraldas'],
+        'Pontos_Unit': [5, 3, 3, 5, 4, 10, 2, 5, 4, 6],
+        'Meta_Grupo': [100, 100, 150, 150, 80, 80, 500, 500, 200, 200],
+        'Bonus_Condicao': [
+            'Instituição específica', 'Instituição específica', 'Itens lavados/organizados',
+            'Itens lavados/organizados', 'Foco em 2026', 'Foco em 2026', 'Consistência semanal',
+            'Consistência semanal', 'Embalagens coletivas', 'Embalagens coletivas'
+        ],
+        'Bonus_Pontos': [50, 50, 40, 40, 60, 60, 20, 20, 30, 30]
+    })
+    return participantes, categorias
+
+
+# Participantes sintéticos ('Participante 00000', ...) espalhados pelos grupos
+def participantes_sinteticos(quantidade, semente=42):
+    rng = np.random.default_rng(semente)
+    return pd.DataFrame({
+        'Nome': [f'Participante {i:05d}' for i in range(quantidade)],
+        'Grupo': np.array(GRUPOS)[rng.integers(0, len(GRUPOS), quantidade)],
+    })
+
+
+# Doações sorteadas de uma vez com NumPy: participante (e o grupo dele),
+# categoria, tipo de item da categoria, quantidade, bônus, sprint e data.
+# Grupo e pontos saem de vetores de consulta montados uma vez a partir dos
+# cadastros, sem filtrar os DataFrames por linha. As colunas de texto já
+# vêm como category (códigos + valores distintos), o que mantém a geração
+# de dezenas de milhões de linhas barata em tempo e memória.
+def gerar_doacoes(participantes, categorias, linhas, semente=42, inicio='2024-10-01', dias=88):
+    rng = np.random.default_rng(semente)
+    nomes, codigos_nome = np.unique(participantes['Nome'].astype(str).to_numpy(), return_inverse=True)
+    grupos, codigos_grupo = np.unique(participantes['Grupo'].astype(str).to_numpy(), return_inverse=True)
+
+    # Catálogo ordenado por categoria: os tipos de cada categoria ficam em
+    # posições contíguas (a partir de `primeiro_tipo`, `tipos_por_categoria` deles)
+    catalogo = categorias.sort_values('Categoria', kind='stable').reset_index(drop=True)
+    nomes_categorias, primeiro_tipo, tipos_por_categoria = np.unique(
+        catalogo['Categoria'].astype(str).to_numpy(), return_index=True, return_counts=True)
+    tipos, codigos_tipo = np.unique(catalogo['Tipo_Item'].astype(str).to_numpy(), return_inverse=True)
+    pontos_unit = catalogo['Pontos_Unit'].to_numpy(dtype='float64')
+    bonus_pontos = np.nan_to_num(catalogo['Bonus_Pontos'].to_numpy(dtype='float64', na_value=np.nan)) \
+        if 'Bonus_Pontos' in catalogo.columns else np.zeros(len(catalogo))
+
+    quem = rng.integers(0, len(participantes), linhas)
+    categoria = rng.integers(0, len(nomes_categorias), linhas)
+    item = primeiro_tipo[categoria] + (rng.random(linhas) * tipos_por_categoria[categoria]).astype(np.int64)
+    quantidade = rng.integers(1, 10, linhas).astype('float64')
+    bonus = np.where(rng.random(linhas) < PROBABILIDADE_BONUS, bonus_pontos[item], 0.0)
+    pontos_total = quantidade * pontos_unit[item]
+
+    def texto(codigos, valores):
+        return pd.Categorical.from_codes(codigos, categories=pd.Index(valores).astype(str))
+
+    return pd.DataFrame({
+        'SPRINT': texto(rng.integers(0, len(SPRINTS), linhas), SPRINTS),
+        'Data': np.datetime64(inicio, 'D') + rng.integers(0, dias, linhas).astype('timedelta64[D]'),
+        'Nome': texto(codigos_nome[quem], nomes),
+        'Grupo': texto(codigos_grupo[quem], grupos),
+        'Categoria': texto(categoria, nomes_categorias),
+        'Tipo_Item': texto(codigos_tipo[item], tipos),
+        'Quantidade': quantidade,
+        'Pontos_Unit': pontos_unit[item],
+        'Pontos_Total': pontos_total,
+        'Bonus': bonus,
+        'Total_Geral': pontos_total + bonus,
+        'Observações': texto((bonus > 0).astype(np.int8), OBSERVACOES),
+    })
+
+
+# Grava os três quadros como fixture: um .xlsx com as abas da planilha ou,
+# para qualquer outro destino, uma pasta com um .arrow por aba (o mesmo
+# formato do snapshot, lido com memory-map)
+def salvar_fixture(participantes, categorias, doacoes, destino):
+    frames = dict(zip(ABAS_PLANILHA, (participantes, categorias, doacoes)))
+    if destino.endswith('.xlsx'):
+        if len(doacoes) >= MAX_LINHAS_XLSX:
+            raise ValueError(f'O Excel aceita até {MAX_LINHAS_XLSX - 1:,} doações por aba; '
+                             f'use uma fixture Arrow para {len(doacoes):,}')
+        with pd.ExcelWriter(destino, engine='openpyxl') as writer:
+            for aba, frame in frames.items():
+                frame.to_excel(writer, sheet_name=aba, index=False)
+        return destino
+
+    os.makedirs(destino, exist_ok=True)
+    for aba, frame in frames.items():
+        feather.write_feather(frame, os.path.join(destino, f'{aba}.arrow'), compression='uncompressed')
+    return destino
+
+
+# Lê uma fixture gravada por salvar_fixture (participantes, categorias, doações)
+def carregar_fixture(origem):
+    if origem.endswith('.xlsx'):
+        abas = pd.read_excel(origem, sheet_name=list(ABAS_PLANILHA))
+        return tuple(abas[aba] for aba in ABAS_PLANILHA)
+    return tuple(
+        feather.read_table(os.path.join(origem, f'{aba}.arrow'), memory_map=True).to_pandas()
+        for aba in ABAS_PLANILHA
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Gera dados sintéticos da Gincana do Bem')
+    parser.add_argument('destino', help='arquivo .xlsx ou pasta para a fixture Arrow')
+    parser.add_argument('--linhas', type=int, default=100_000, help='número de doações')
+    parser.add_argument('--participantes', type=int, default=0,
+                        help='participantes sintéticos (0 = cadastro da demonstração)')
+    parser.add_argument('--semente', type=int, default=42)
+    args = parser.parse_args()
+
+    participantes, categorias = cadastros_demo()
+    if args.participantes:
+        participantes = participantes_sinteticos(args.participantes, args.semente)
+    doacoes = gerar_doacoes(participantes, categorias, args.linhas, args.semente)
+    try:
+        destino = salvar_fixture(participantes, categorias, doacoes, args.destino)
+    except ValueError as erro:
+        parser.error(str(erro))
+    print(f'{len(doacoes):,} doações de {len(participantes):,} participantes gravadas em {destino}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,332 @@
+import io
+import posixpath
+import re
+import zipfile
+from xml.etree import ElementTree
+
+import pandas as pd
+from openpyxl.formula.translate import Translator
+from openpyxl.reader.strings import read_string_table
+from openpyxl.styles.stylesheet import Stylesheet
+from openpyxl.utils.cell import column_index_from_string
+from openpyxl.utils.datetime import CALENDAR_MAC_1904, WINDOWS_EPOCH, from_excel, from_ISO8601
+
+# Namespaces do SpreadsheetML usados no workbook.xml e nos relacionamentos
+NS_PRINCIPAL = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+NS_RELACOES = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+NS_PACOTE = 'http://schemas.openxmlformats.org/package/2006/relationships'
+_TAG_LINHA = f'{{{NS_PRINCIPAL}}}row'
+_TAG_CELULA = f'{{{NS_PRINCIPAL}}}c'
+_TAG_FORMULA = f'{{{NS_PRINCIPAL}}}f'
+_TAG_VALOR = f'{{{NS_PRINCIPAL}}}v'
+_TAG_TEXTO_EM_LINHA = f'{{{NS_PRINCIPAL}}}is'
+_TAG_TRECHO_TEXTO = f'{{{NS_PRINCIPAL}}}r'
+_TAG_TEXTO = f'{{{NS_PRINCIPAL}}}t'
+
+
+# Acesso direto às partes XML de um xlsx em memória. Serve à ingestão
+# incremental: em vez de interpretar a pasta inteira, lê só trechos de
+# <sheetData> (linhas novas) e da tabela de textos compartilhados.
+# Os valores seguem as mesmas regras do pd.read_excel (openpyxl somente
+# leitura, com os valores calculados das fórmulas).
+class PastaXlsx:
+    def __init__(self, conteudo):
+        self.arquivo = zipfile.ZipFile(io.BytesIO(conteudo))
+        self.caminhos = self._mapear_abas()
+        self.date1904 = self._usa_date1904()
+        self._estilos = None
+        # Fórmulas compartilhadas já vistas: si -> (texto, célula mestre)
+        self._compartilhadas = {}
+
+    def xml(self, caminho):
+        try:
+            return self.arquivo.read(caminho)
+        except KeyError:
+            return b''
+
+    def xml_aba(self, aba):
+        return self.xml(self.caminhos[aba])
+
+    def xml_textos(self):
+        return self.xml('xl/sharedStrings.xml')
+
+    # Nome da aba -> caminho do XML, via workbook.xml e seus relacionamentos
+    def _mapear_abas(self):
+        relacoes = ElementTree.fromstring(self.xml('xl/_rels/workbook.xml.rels'))
+        alvos = {}
+        for relacao in relacoes.iter(f'{{{NS_PACOTE}}}Relationship'):
+            alvo = relacao.get('Target', '')
+            if alvo.startswith('/'):
+                alvo = alvo[1:]
+            else:
+                alvo = posixpath.normpath(posixpath.join('xl', alvo))
+            alvos[relacao.get('Id')] = alvo
+
+        pasta = ElementTree.fromstring(self.xml('xl/workbook.xml'))
+        return {
+            aba.get('name'): alvos.get(aba.get(f'{{{NS_RELACOES}}}id'))
+            for aba in pasta.iter(f'{{{NS_PRINCIPAL}}}sheet')
+        }
+
+    def _usa_date1904(self):
+        pasta = ElementTree.fromstring(self.xml('xl/workbook.xml'))
+        propriedades = pasta.find(f'{{{NS_PRINCIPAL}}}workbookPr')
+        if propriedades is None:
+            return False
+        return propriedades.get('date1904', 'false').lower() in ('1', 'true')
+
+    # Índices dos estilos de célula com formato de data/duração
+    def estilos_de_data(self):
+        if self._estilos is None:
+            xml = self.xml('xl/styles.xml')
+            if xml:
+                estilos = Stylesheet.from_tree(ElementTree.fromstring(xml))
+                self._estilos = (estilos.date_formats, estilos.timedelta_formats)
+            else:
+                self._estilos = (set(), set())
+        return self._estilos
+
+    # Lê a aba em fluxo, descomprimindo o zip aos poucos: entrega, em ordem,
+    # todos os bytes internos de <sheetData> em trechos que sempre terminam
+    # no fim de uma linha, sem nunca ter o XML inteiro da aba em memória
+    def iterar_trechos(self, aba, tamanho=1 << 20):
+        with self.arquivo.open(self.caminhos[aba]) as xml:
+            acumulado = b''
+            while True:
+                lido = xml.read(tamanho)
+                acumulado += lido
+                abertura = re.search(rb'<sheetData\b[^>]*?(/?)>', acumulado)
+                if abertura is not None:
+                    break
+                if not lido:
+                    return
+                acumulado = acumulado[-len(b'<sheetData'):]
+            if abertura.group(1):
+                return
+
+            acumulado = acumulado[abertura.end():]
+            while True:
+                fim = acumulado.find(b'</sheetData>')
+                if fim >= 0:
+                    if fim:
+                        yield acumulado[:fim]
+                    return
+                corte = acumulado.rfind(b'<row', 1)
+                if corte > 0:
+                    yield acumulado[:corte]
+                    acumulado = acumulado[corte:]
+                lido = xml.read(tamanho)
+                if not lido:
+                    raise ValueError('<sheetData> sem fechamento')
+                acumulado += lido
+
+    # Lê as linhas de um trecho de <sheetData> (sequência de <row>...</row>).
+    # Retorna [(número da linha no Excel, {coluna: valor}, digitada)], com os
+    # valores já convertidos como o pd.read_excel faria; `digitada` indica se
+    # a linha tem algum valor que não vem de fórmula. Nas colunas de
+    # `formulas` (números, a partir de 1), uma fórmula sem valor calculado
+    # (pasta salva pelo openpyxl ou outra ferramenta que não calcula) vem
+    # como o texto da fórmula, para a limpeza avaliar.
+    def ler_linhas(self, trecho, textos, formulas=frozenset()):
+        if not trecho.strip():
+            return []
+        datas, duracoes = self.estilos_de_data()
+        epoca = CALENDAR_MAC_1904 if self.date1904 else WINDOWS_EPOCH
+        dados = ElementTree.fromstring(f'<sheetData xmlns="{NS_PRINCIPAL}">'.encode() + trecho + b'</sheetData>')
+        linhas = []
+        numero = 0
+        for linha in dados.iterfind(_TAG_LINHA):
+            numero = _numero_linha(linha.get('r'), numero)
+            valores = {}
+            digitada = False
+            coluna = 0
+            for celula in linha.iterfind(_TAG_CELULA):
+                referencia = celula.get('r')
+                coluna = column_index_from_string(referencia.rstrip('0123456789')) if referencia else coluna + 1
+                valor = _converter_celula(*_ler_celula(celula, textos, datas, duracoes, epoca))
+                formula = celula.find(_TAG_FORMULA)
+                if formula is not None and coluna in formulas:
+                    texto = self._texto_formula(formula, referencia)
+                    if valor == '':
+                        valor = texto
+                if valor != '':
+                    valores[coluna] = valor
+                if formula is None and (
+                    celula.find(_TAG_VALOR) is not None or celula.get('t') == 'inlineStr'
+                ):
+                    digitada = True
+            linhas.append((numero, valores, digitada))
+        return linhas
+
+    # Texto de uma fórmula (com '='); as compartilhadas são traduzidas da
+    # célula mestre para a célula. Sem a mestre (ficou num trecho não lido)
+    # vem só '=', que a limpeza conta como inválido.
+    def _texto_formula(self, formula, referencia):
+        texto = formula.text
+        if formula.get('t') != 'shared':
+            return '=' + (texto or '')
+        if texto:
+            self._compartilhadas[formula.get('si')] = (texto, referencia)
+            return '=' + texto
+        mestre = self._compartilhadas.get(formula.get('si'))
+        if mestre is None or not mestre[1] or not referencia:
+            return '='
+        return Translator('=' + mestre[0], origin=mestre[1]).translate_formula(referencia)
+
+
+# Número da linha pelo atributo r (o Excel aceita "5.0"); sem ele, a seguinte
+def _numero_linha(referencia, anterior):
+    if referencia is None:
+        return anterior + 1
+    try:
+        return int(referencia)
+    except ValueError:
+        numero = float(referencia)
+        if not numero.is_integer():
+            raise ValueError(f'{referencia} não é um número de linha válido')
+        return int(numero)
+
+
+# Valor e tipo de uma célula <c>, com os valores calculados das fórmulas e as
+# mesmas conversões do leitor somente leitura do openpyxl: textos
+# compartilhados, booleanos, datas pelo estilo da célula e erros
+def _ler_celula(celula, textos, datas, duracoes, epoca):
+    tipo = celula.get('t', 'n')
+    if tipo == 'inlineStr':
+        texto = celula.find(_TAG_TEXTO_EM_LINHA)
+        if texto is None:
+            return None, tipo
+        partes = [texto.findtext(_TAG_TEXTO)]
+        partes += [trecho.findtext(_TAG_TEXTO) for trecho in texto.iterfind(_TAG_TRECHO_TEXTO)]
+        return ''.join(parte for parte in partes if parte is not None), 's'
+
+    valor = celula.findtext(_TAG_VALOR) or None
+    if valor is None:
+        return None, tipo
+    if tipo == 'n':
+        numero = float(valor) if '.' in valor or 'E' in valor or 'e' in valor else int(valor)
+        estilo = int(celula.get('s') or 0)
+        if estilo not in datas:
+            return numero, 'n'
+        try:
+            return from_excel(numero, epoca, timedelta=estilo in duracoes), 'd'
+        except (OverflowError, ValueError):
+            return '#VALUE!', 'e'
+    if tipo == 's':
+        return textos[int(valor)], 's'
+    if tipo == 'b':
+        return bool(int(valor)), 'b'
+    if tipo == 'str':
+        return valor, 's'
+    if tipo == 'd':
+        return from_ISO8601(valor), 'd'
+    return valor, tipo
+
+
+# Mesmas regras do leitor openpyxl do pandas: vazio -> '', erro -> NaN e
+# números inteiros como int
+def _converter_celula(valor, tipo):
+    if valor is None:
+        return ''
+    if tipo == 'e':
+        return float('nan')
+    if tipo == 'n':
+        inteiro = int(valor)
+        return inteiro if inteiro == valor else float(valor)
+    return valor
+
+
+# Textos compartilhados de um trecho de <sst> (sequência de <si>...</si>)
+def ler_textos(trecho):
+    if not trecho.strip():
+        return []
+    return read_string_table(io.BytesIO(f'<sst xmlns="{NS_PRINCIPAL}">'.encode() + trecho + b'</sst>'))
+
+
+# Trecho interno de um elemento (<sheetData>, <sst>): posições logo depois da
+# tag de abertura e no início da tag de fechamento; None se não existir
+def delimitar(xml, tag):
+    abertura = re.search(rb'<%s\b[^>]*?(/?)>' % tag, xml)
+    if abertura is None or abertura.group(1):
+        return None
+    fim = xml.rfind(b'</%s>' % tag)
+    if fim < abertura.end():
+        return None
+    return abertura.end(), fim
+
+
+# Posição logo depois do fim da linha `numero` no trecho de <sheetData>
+def fim_da_linha(trecho, numero):
+    abertura = re.search(rb'<row\b[^>]*?\br="%d"[^>]*?(/?)>' % numero, trecho)
+    if abertura is None:
+        return None
+    if abertura.group(1):
+        return abertura.end()
+    fim = trecho.find(b'</row>', abertura.end())
+    return None if fim < 0 else fim + len(b'</row>')
+
+
+# Textos que o pd.read_excel lê como ausentes (na_values padrão do pandas)
+VALORES_AUSENTES = frozenset([
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN', '<NA>', 'N/A',
+    'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+])
+
+
+# Nomes das colunas a partir dos valores da linha de cabeçalho, com as mesmas
+# regras do pd.read_excel ('Unnamed: n' para vazias, '.1' para repetidas)
+def nomes_colunas(valores):
+    nomes = [valores.get(coluna, '') for coluna in range(1, max(valores, default=0) + 1)]
+    sem_nome = [posicao for posicao, nome in enumerate(nomes) if nome == '']
+    for posicao in sem_nome:
+        nomes[posicao] = f'Unnamed: {posicao}'
+    # Repetidas ganham o primeiro sufixo livre, pulando os nomes que já
+    # existem no cabeçalho; as sem nome são as últimas a escolher
+    contagem = {}
+    for posicao in [posicao for posicao in range(len(nomes)) if posicao not in sem_nome] + sem_nome:
+        nome = original = nomes[posicao]
+        vezes = contagem.get(nome, 0)
+        while vezes:
+            contagem[original] = vezes + 1
+            nome = f'{original}.{vezes}'
+            vezes = vezes + 1 if nome in nomes else contagem.get(nome, 0)
+        nomes[posicao] = nome
+        contagem[nome] = vezes + 1
+    return nomes
+
+
+# Coluna de um bloco com a inferência do pd.read_excel: textos ausentes
+# viram NaN, colunas só de números (ou textos numéricos) viram numéricas e
+# as demais ficam com o tipo que os valores permitem (datas, texto, objeto)
+def _coluna_inferida(valores, indice):
+    serie = pd.Series(valores, index=indice, dtype=object)
+    serie = serie.mask(serie.isin(VALORES_AUSENTES))
+    try:
+        return pd.to_numeric(serie)
+    except (ValueError, TypeError):
+        return serie.infer_objects()
+
+
+# Monta o DataFrame de um bloco de linhas consecutivas da aba, da linha
+# `primeira` do Excel até `ultima`, com a mesma inferência de tipos do
+# pd.read_excel. Linhas ausentes no XML viram linhas vazias; sem `ultima`,
+# as vazias do final são descartadas. Retorna None se alguma linha passa
+# da largura do cabeçalho.
+def montar_bloco(linhas, primeira, colunas, ultima=None):
+    if ultima is None:
+        ultima = max((numero for numero, valores, _ in linhas if valores), default=primeira - 1)
+    total = max(ultima - primeira + 1, 0)
+    dados = [[''] * total for _ in colunas]
+    for numero, valores, _ in linhas:
+        if not valores or numero < primeira or numero > ultima:
+            continue
+        if max(valores) > len(colunas):
+            return None
+        for coluna, valor in valores.items():
+            dados[coluna - 1][numero - primeira] = valor
+    indice = range(primeira - 2, primeira - 2 + total)
+    if not total:
+        return pd.DataFrame(columns=list(colunas), index=indice)
+    return pd.DataFrame(
+        {nome: _coluna_inferida(valores, indice) for nome, valores in zip(colunas, dados)}, columns=list(colunas)
+    )
@@ -0,0 +1,60 @@
+import gincana_calculos
+import gincana_dados
+from gincana_dados import ABAS_PLANILHA, FontePlanilha
+
+# Sprint usada pelo filtro do caminho de dados
+SPRINT_FILTRO = '2ºSPRINT'
+
+
+# Caminho de dados do dashboard como funções sem Streamlit, na ordem do
+# script: cada etapa recebe o estado das anteriores e guarda nele o que
+# produziu. Usado pelos testes e pelo benchmark_gincana.py (bench_etapas).
+def etapas_caminho_dados(caminho):
+    def leitura(estado):
+        estado['abas'] = FontePlanilha(caminho).ler_abas()
+
+    def limpeza(estado):
+        estado['participantes'], estado['categorias'], estado['doacoes'], _ = gincana_dados.limpar_dados(
+            *(estado['abas'][aba] for aba in ABAS_PLANILHA))
+
+    def schema(estado):
+        gincana_dados.aplicar_schema(estado['participantes'], estado['categorias'], estado['doacoes'])
+
+    def cubo(estado):
+        estado['cubo'] = gincana_calculos.montar_cubo(estado['doacoes'])
+
+    def filtro(estado):
+        estado['grupos'] = gincana_calculos.opcoes_filtro(estado['participantes']['Grupo'])
+        estado['fatia'] = gincana_calculos.fatiar_cubo(estado['cubo'], estado['grupos'][0], SPRINT_FILTRO)
+        estado['filtradas'] = gincana_calculos.aplicar_filtro(estado['doacoes'], gincana_calculos.posicoes_filtradas(
+            estado['doacoes'], estado['grupos'][0], SPRINT_FILTRO))
+
+    def totais_grupo(estado):
+        estado['resumo'] = gincana_calculos.resumo_geral(estado['cubo'])
+        estado['totais_grupo'] = gincana_calculos.totais_validos(estado['cubo'], 'Grupo').sort_values(
+            ascending=False)
+
+    def totais_sprint(estado):
+        estado['totais_sprint'] = gincana_calculos.totais_validos(estado['cubo'], 'SPRINT')
+
+    def ranking(estado):
+        estado['ranking'] = gincana_calculos.calcular_ranking(estado['participantes'], estado['cubo'])
+
+    def metas(estado):
+        estado['tabela_metas'] = gincana_calculos.montar_tabela_metas(estado['doacoes'], estado['categorias'])
+        estado['serie'] = gincana_calculos.montar_serie_diaria(estado['doacoes'])
+        estado['progresso'] = gincana_calculos.progresso_metas(
+            estado['tabela_metas'], estado['categorias'], estado['grupos'],
+            estado['serie']['Dia'].min(), estado['serie']['Dia'].max())
+
+    return {
+        'leitura': leitura,
+        'limpeza': limpeza,
+        'schema': schema,
+        'cubo': cubo,
+        'filtro': filtro,
+        'totais por grupo': totais_grupo,
+        'totais por sprint': totais_sprint,
+        'ranking': ranking,
+        'progresso das metas': metas,
+    }
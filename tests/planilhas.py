@@ -0,0 +1,109 @@
+import contextlib
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+import gincana_sinteticos
+from gincana_dados import ABAS_PLANILHA
+
+# Planilhas de teste e o servidor HTTP local que as serve; usados pelos
+# testes e pelo benchmark_gincana.py
+
+# Planilha do repositório
+PLANILHA_LOCAL = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              'planilha_gincana_solidaria.xlsx')
+
+
+# Servidor HTTP local que imita o raw.githubusercontent.com: serve o xlsx
+# com ETag/Last-Modified e responde 304 às requisições condicionais
+class _ServidorPlanilha(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, endereco, caminho, atraso=0.0):
+        super().__init__(endereco, _HandlerPlanilha)
+        self.caminho = caminho
+        self.atraso = atraso
+        self.requisicoes = 0
+        self.respostas_304 = 0
+        self.bytes_enviados = 0
+        self._lock = threading.Lock()
+
+
+class _HandlerPlanilha(BaseHTTPRequestHandler):
+    def do_GET(self):
+        servidor = self.server
+        # Latência de rede simulada (como a de um servidor remoto)
+        time.sleep(servidor.atraso)
+        with open(servidor.caminho, 'rb') as arquivo:
+            conteudo = arquivo.read()
+        etag = '"%s"' % hashlib.sha256(conteudo).hexdigest()
+        last_modified = formatdate(os.stat(servidor.caminho).st_mtime, usegmt=True)
+
+        with servidor._lock:
+            servidor.requisicoes += 1
+        if self.headers.get('If-None-Match') == etag:
+            with servidor._lock:
+                servidor.respostas_304 += 1
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+        self.send_header('Content-Length', str(len(conteudo)))
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', last_modified)
+        self.end_headers()
+        self.wfile.write(conteudo)
+        with servidor._lock:
+            servidor.bytes_enviados += len(conteudo)
+
+    def log_message(self, *args):
+        pass
+
+
+@contextlib.contextmanager
+def servidor_local(caminho=PLANILHA_LOCAL, atraso=0.0):
+    servidor = _ServidorPlanilha(('127.0.0.1', 0), caminho, atraso)
+    thread = threading.Thread(target=servidor.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield servidor, f'http://127.0.0.1:{servidor.server_address[1]}/planilha_gincana_solidaria.xlsx'
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+
+
+# Gera (uma vez) uma cópia da planilha com a aba de doações replicada até
+# `linhas` registros, para medir o custo de parse em escala
+def planilha_ampliada(linhas):
+    caminho = os.path.join(tempfile.gettempdir(), f'gincana_bench_{linhas}.xlsx')
+    if os.path.exists(caminho):
+        return caminho
+
+    abas = pd.read_excel(PLANILHA_LOCAL, sheet_name=list(ABAS_PLANILHA))
+    doacoes = abas['doacoes_registros']
+    repeticoes = -(-linhas // len(doacoes))
+    abas['doacoes_registros'] = pd.concat([doacoes] * repeticoes, ignore_index=True).iloc[:linhas]
+    with pd.ExcelWriter(caminho, engine='openpyxl') as writer:
+        for aba in ABAS_PLANILHA:
+            abas[aba].to_excel(writer, sheet_name=aba, index=False)
+    return caminho
+
+
+# Fixture xlsx sintética (gerada uma vez) com `linhas` doações
+def planilha_sintetica(linhas):
+    caminho = os.path.join(tempfile.gettempdir(), f'gincana_sintetica_{linhas}.xlsx')
+    if not os.path.exists(caminho):
+        participantes = gincana_sinteticos.participantes_sinteticos(max(27, linhas // 200))
+        _, categorias = gincana_sinteticos.cadastros_demo()
+        doacoes = gincana_sinteticos.gerar_doacoes(participantes, categorias, linhas)
+        gincana_sinteticos.salvar_fixture(participantes, categorias, doacoes, caminho)
+    return caminho
@@ -0,0 +1,210 @@
+import os
+import shutil
+import threading
+import time
+
+import pytest
+
+from gincana_dados import AtualizadorPlanilha, FontePlanilha, IngestaoIncremental
+from tests.planilhas import PLANILHA_LOCAL, planilha_ampliada, servidor_local
+
+SESSOES = 10
+INTERVALO = 0.25
+# Prazo generoso para o atualizador pegar uma versão nova, mesmo com a
+# máquina ocupada; os testes não dependem dele para passar
+PRAZO = 60
+
+
+# Planilha servida por HTTP local, que o teste pode trocar no meio
+@pytest.fixture
+def servida(tmp_path):
+    caminho = tmp_path / 'planilha.xlsx'
+    shutil.copyfile(PLANILHA_LOCAL, caminho)
+    with servidor_local(str(caminho)) as (servidor, url):
+        yield caminho, servidor, url
+
+
+# Espera `condicao()` ficar verdadeira (ou o PRAZO acabar)
+def _esperar(condicao):
+    limite = time.monotonic() + PRAZO
+    while not condicao() and time.monotonic() < limite:
+        time.sleep(0.01)
+    return condicao()
+
+
+def test_uma_consulta_por_ciclo_com_varias_sessoes(servida, tmp_path):
+    caminho, servidor, url = servida
+    versoes = [PLANILHA_LOCAL, planilha_ampliada(2_000)]
+    ingestao = IngestaoIncremental(FontePlanilha(url), str(tmp_path / 'snapshots'))
+    atualizador = AtualizadorPlanilha(ingestao, INTERVALO).iniciar()
+    parar = threading.Event()
+    leituras = [0] * SESSOES
+    hashes = set()
+
+    def sessao(indice):
+        while not parar.is_set():
+            hashes.add(ingestao.atual().hash_conteudo)
+            leituras[indice] += 1
+            time.sleep(0.001)
+
+    threads = [threading.Thread(target=sessao, args=(indice,)) for indice in range(SESSOES)]
+    try:
+        for thread in threads:
+            thread.start()
+        assert _esperar(lambda: ingestao.dados is not None)
+        for troca in range(1, 5):
+            anterior = ingestao.dados.hash_conteudo
+            shutil.copyfile(versoes[troca % 2], caminho)
+            assert _esperar(lambda: ingestao.dados.hash_conteudo != anterior)
+            assert _esperar(lambda: ingestao.dados.hash_conteudo in hashes)
+    finally:
+        parar.set()
+        atualizador.parar()
+        for thread in threads:
+            thread.join()
+
+    # A primeira carga pode ser feita por uma sessão, antes do primeiro ciclo
+    assert servidor.requisicoes <= atualizador.ciclos + 1
+    assert all(leituras)
+    assert len(hashes) == 2
+
+
+# Lock da ingestão que só a thread `dona` pode tomar: qualquer outra que
+# tentar falha na hora, em vez de ficar esperando
+class _LockDoAtualizador:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.dona = None
+        self.tentativas_de_fora = 0
+
+    def __enter__(self):
+        if threading.get_ident() != self.dona:
+            self.tentativas_de_fora += 1
+            raise AssertionError('leitura tentou tomar o lock da ingestão')
+        return self._lock.__enter__()
+
+    def __exit__(self, *excecao):
+        return self._lock.__exit__(*excecao)
+
+
+# Fonte que, depois de `segurar`, para no meio da consulta até `soltar`
+class _FonteSegura(FontePlanilha):
+    def __init__(self, origem):
+        super().__init__(origem)
+        self.segurar = False
+        self.consultando = threading.Event()
+        self.soltar = threading.Event()
+
+    def obter(self):
+        if self.segurar:
+            self.consultando.set()
+            self.soltar.wait(PRAZO)
+        return super().obter()
+
+
+def test_leituras_servem_a_versao_anterior_sem_tomar_o_lock(tmp_path):
+    origem = tmp_path / 'planilha.xlsx'
+    shutil.copyfile(PLANILHA_LOCAL, origem)
+    fonte = _FonteSegura(str(origem))
+    ingestao = IngestaoIncremental(fonte, str(tmp_path / 'snapshots'))
+    anteriores = ingestao.atualizar()
+
+    shutil.copyfile(planilha_ampliada(2_000), origem)
+    ingestao._lock = lock = _LockDoAtualizador()
+    fonte.segurar = True
+
+    def atualizar():
+        lock.dona = threading.get_ident()
+        ingestao.atualizar()
+
+    atualizacao = threading.Thread(target=atualizar)
+    atualizacao.start()
+    try:
+        # O atualizador está com o lock, parado no meio da consulta
+        assert fonte.consultando.wait(PRAZO)
+        for _ in range(5):
+            assert ingestao.atual() is anteriores
+            assert ingestao.anteriores() is anteriores
+    finally:
+        fonte.soltar.set()
+        atualizacao.join()
+
+    assert lock.tentativas_de_fora == 0
+    assert ingestao.atual() is not anteriores
+    assert len(ingestao.atual().doacoes) == 2_000
+
+
+def test_pedidos_de_recarga_simultaneos_viram_uma_consulta(servida, tmp_path):
+    _, servidor, url = servida
+    ingestao = IngestaoIncremental(FontePlanilha(url), str(tmp_path / 'snapshots'))
+    atualizador = AtualizadorPlanilha(ingestao, 60).iniciar()
+    try:
+        assert atualizador.solicitar(30)
+        antes = servidor.requisicoes
+        pedidos = [threading.Thread(target=atualizador.solicitar, args=(30,)) for _ in range(SESSOES)]
+        for pedido in pedidos:
+            pedido.start()
+        for pedido in pedidos:
+            pedido.join()
+    finally:
+        atualizador.parar()
+    assert servidor.requisicoes - antes <= 2
+
+
+# Fonte que conta as consultas
+class _FonteContada(FontePlanilha):
+    consultas = 0
+
+    def obter(self):
+        self.consultas += 1
+        return super().obter()
+
+
+def test_falha_na_primeira_carga_nao_e_repetida_pelas_sessoes(tmp_path):
+    origem = tmp_path / 'planilha.xlsx'
+    fonte = _FonteContada(str(origem))
+    ingestao = IngestaoIncremental(fonte, str(tmp_path / 'snapshots'))
+
+    with pytest.raises(OSError):
+        ingestao.atual()
+    erro, falhou_em = ingestao.ultima_falha
+    assert isinstance(erro, OSError) and falhou_em <= time.time()
+    for _ in range(5):
+        assert ingestao.atual() is None
+    assert fonte.consultas == 1
+
+    # Só o atualizador tenta de novo; com a planilha de volta, a falha some
+    shutil.copyfile(PLANILHA_LOCAL, origem)
+    atualizador = AtualizadorPlanilha(ingestao, 0)
+    assert atualizador.solicitar()
+    assert atualizador.ultimo_erro is None and ingestao.ultima_falha is None
+    assert ingestao.atual() is not None
+    assert fonte.consultas == 2
+    assert os.path.isdir(tmp_path / 'snapshots')
+
+
+# Banco que falha ao sincronizar e anota o que já estava publicado
+class _BancoQuebrado:
+    versao = None
+    ultimo_erro = None
+
+    def __init__(self, ingestao):
+        self.ingestao = ingestao
+        self.publicados = []
+
+    def sincronizar(self, dados, versao_anterior=None, linhas_iguais=0, inicio_doacoes=0, metadados=None):
+        self.publicados.append(self.ingestao.dados is dados)
+        raise RuntimeError('disco cheio')
+
+
+def test_falha_do_banco_nao_segura_os_dados_novos(tmp_path):
+    ingestao = IngestaoIncremental(FontePlanilha(PLANILHA_LOCAL), str(tmp_path / 'snapshots'))
+    banco = ingestao.banco = _BancoQuebrado(ingestao)
+
+    dados = ingestao.atualizar()
+    assert ingestao.dados is dados and ingestao.ultima_falha is None
+    assert banco.publicados == [True]
+    assert isinstance(banco.ultimo_erro, RuntimeError)
+    # A versão igual tenta de novo levar os dados ao banco
+    assert ingestao.atualizar() is dados
+    assert banco.publicados == [True, True]
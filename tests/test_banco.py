@@ -0,0 +1,97 @@
+import threading
+
+import numpy as np
+import openpyxl
+import pytest
+
+from gincana_banco import BancoDoacoes
+from gincana_calculos import buscar_texto, ordenar_posicoes, posicoes_filtradas
+from gincana_dados import FontePlanilha, IngestaoIncremental
+from tests.test_ingestao import _copiar_doacao, _planilha_regravada
+
+
+@pytest.fixture
+def carregada(tmp_path):
+    caminho = _planilha_regravada(tmp_path)
+    banco = BancoDoacoes(str(tmp_path / 'doacoes.sqlite'))
+    ingestao = IngestaoIncremental(FontePlanilha(str(caminho)), str(tmp_path / 'snapshots'), banco=banco)
+    memoria = IngestaoIncremental(FontePlanilha(str(caminho)), str(tmp_path / 'snapshots_memoria'))
+    ingestao.atualizar()
+    memoria.atualizar()
+    return caminho, banco, ingestao, memoria
+
+
+# Mesmos valores, com vazios iguais, nas colunas do frame em memória
+def _mesmas_linhas(do_banco, em_memoria):
+    assert list(do_banco.index) == list(range(len(em_memoria)))
+    for coluna in em_memoria.columns:
+        x, y = do_banco[coluna].reset_index(drop=True), em_memoria[coluna].reset_index(drop=True)
+        assert (x.astype(str).where(x.notna(), '') == y.astype(str).where(y.notna(), '')).all(), coluna
+
+
+def test_doacoes_ficam_so_no_banco(carregada):
+    _, banco, ingestao, memoria = carregada
+    dados, esperado = ingestao.dados, memoria.dados
+    assert dados.doacoes_no_banco and dados.doacoes.empty
+    assert dados.indice_participantes is None
+    assert dados.total_doacoes == len(esperado.doacoes) == banco.contar_doacoes()
+    assert list(dados.doacoes.columns) == list(esperado.doacoes.columns)
+    _mesmas_linhas(banco.doacoes(), esperado.doacoes)
+    assert dados.cubo['Total_Geral'].sum() == pytest.approx(esperado.cubo['Total_Geral'].sum())
+
+
+def test_busca_ordem_e_pagina_batem_com_a_memoria(carregada):
+    _, banco, _, memoria = carregada
+    doacoes = memoria.dados.doacoes
+    grupo = doacoes['Grupo'].dropna().iloc[0]
+    for grupo_filtro in ('Todos', grupo):
+        for termo in ('', 'a', doacoes['Nome'].dropna().iloc[0][:3].lower()):
+            for coluna in ('(ordem da planilha)', 'Nome', 'Data', 'Total_Geral'):
+                for crescente in (True, False):
+                    posicoes = buscar_texto(doacoes, posicoes_filtradas(doacoes, grupo_filtro), termo)
+                    posicoes = ordenar_posicoes(doacoes, posicoes, coluna, crescente)
+                    assert banco.contar_doacoes(grupo_filtro, 'Todos', termo) == len(posicoes)
+                    pagina = banco.doacoes(grupo_filtro, 'Todos', termo, coluna, crescente, 5, 20)
+                    assert list(pagina.index) == list(posicoes[5:25]), (grupo_filtro, termo, coluna, crescente)
+
+
+def test_incremental_e_reinicio_a_partir_do_banco(carregada, tmp_path):
+    caminho, banco, ingestao, memoria = carregada
+    linha_base = ingestao.dados.ingestao.linha_base
+    pasta = openpyxl.load_workbook(caminho)
+    aba = pasta['doacoes_registros']
+    exemplo = next(linha for linha in range(linha_base, 1, -1) if aba.cell(linha, 3).value)
+    _copiar_doacao(aba, exemplo, linha_base + 1)
+    pasta.save(caminho)
+
+    dados, esperado = ingestao.atualizar(), memoria.atualizar()
+    assert ingestao.estatisticas.cargas_incrementais == 1
+    assert dados.doacoes_no_banco and dados.total_doacoes == len(esperado.doacoes)
+    _mesmas_linhas(banco.doacoes(), esperado.doacoes)
+    assert np.array_equal(dados.relatorio_pontos.posicoes, esperado.relatorio_pontos.posicoes)
+
+    # Outro processo, sem snapshot: começa pelo que está no banco
+    reiniciada = IngestaoIncremental(FontePlanilha(str(caminho)), str(tmp_path / 'snapshots_novos'),
+                                     banco=BancoDoacoes(banco.caminho))
+    anteriores = reiniciada.anteriores()
+    assert anteriores is not None and anteriores.doacoes_no_banco
+    assert anteriores.hash_conteudo == esperado.hash_conteudo
+    assert anteriores.total_doacoes == len(esperado.doacoes)
+    assert anteriores.cubo['Total_Geral'].sum() == pytest.approx(esperado.cubo['Total_Geral'].sum())
+    assert list(anteriores.participantes['Nome']) == list(esperado.participantes['Nome'])
+
+
+def test_contador_de_consultas_com_varias_threads(carregada):
+    _, banco, _, _ = carregada
+    antes = banco.estatisticas.consultas
+
+    def consultar():
+        for _ in range(50):
+            banco.contar_doacoes()
+
+    threads = [threading.Thread(target=consultar) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert banco.estatisticas.consultas == antes + 8 * 50
@@ -0,0 +1,96 @@
+import sys
+
+import pandas as pd
+import pytest
+
+from gincana_calculos import DIMENSOES_CUBO, MEDIDAS_CUBO
+from gincana_dados import ABAS_PLANILHA, COLUNAS_CATEGORICAS, COLUNAS_NUMERICAS
+from tests.etapas import SPRINT_FILTRO, etapas_caminho_dados
+from tests.planilhas import PLANILHA_LOCAL, planilha_sintetica
+
+LINHAS = 2_000
+
+
+# Estado ao fim do caminho de dados, na planilha do repositório e numa
+# sintética, com o Streamlit fora de alcance: importá-lo numa etapa falha
+@pytest.fixture(scope='module', params=['repositório', 'sintética'])
+def estado(request):
+    caminho = PLANILHA_LOCAL if request.param == 'repositório' else planilha_sintetica(LINHAS)
+    estado = {}
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setitem(sys.modules, 'streamlit', None)
+        for funcao in etapas_caminho_dados(caminho).values():
+            funcao(estado)
+    estado['sintetica'] = request.param == 'sintética'
+    return estado
+
+
+def test_leitura_traz_as_abas(estado):
+    assert set(estado['abas']) == set(ABAS_PLANILHA)
+    if estado['sintetica']:
+        assert len(estado['abas']['doacoes_registros']) == LINHAS
+
+
+def test_limpeza_e_schema_deixam_os_tipos_do_dashboard(estado):
+    doacoes = estado['doacoes']
+    assert len(doacoes) == len(estado['abas']['doacoes_registros'])
+    assert pd.api.types.is_datetime64_any_dtype(doacoes['Data'])
+    for coluna in COLUNAS_CATEGORICAS:
+        assert isinstance(doacoes[coluna].dtype, pd.CategoricalDtype), coluna
+    for coluna in COLUNAS_NUMERICAS:
+        assert pd.api.types.is_numeric_dtype(doacoes[coluna]), coluna
+        assert not doacoes[coluna].isna().any(), coluna
+    assert isinstance(estado['participantes']['Grupo'].dtype, pd.CategoricalDtype)
+
+
+def test_cubo_soma_as_doacoes(estado):
+    doacoes, cubo = estado['doacoes'], estado['cubo']
+    assert list(cubo.columns) == DIMENSOES_CUBO + MEDIDAS_CUBO + ['Registros']
+    assert not cubo.duplicated(DIMENSOES_CUBO).any()
+    assert cubo['Registros'].sum() == len(doacoes)
+    for medida in MEDIDAS_CUBO:
+        assert cubo[medida].sum() == pytest.approx(doacoes[medida].sum())
+
+
+def test_filtro_do_cubo_bate_com_o_das_doacoes(estado):
+    grupo = estado['grupos'][0]
+    filtradas, fatia = estado['filtradas'], estado['fatia']
+    assert len(filtradas)
+    assert (filtradas['Grupo'] == grupo).all() and (filtradas['SPRINT'] == SPRINT_FILTRO).all()
+    assert fatia['Registros'].sum() == len(filtradas)
+    assert fatia['Total_Geral'].sum() == pytest.approx(filtradas['Total_Geral'].sum())
+
+
+def test_totais_por_grupo_e_sprint_fecham_com_o_resumo(estado):
+    total = estado['doacoes']['Total_Geral'].sum()
+    resumo, por_grupo, por_sprint = estado['resumo'], estado['totais_grupo'], estado['totais_sprint']
+    assert resumo.total_pontos == pytest.approx(total)
+    assert resumo.grupos_ativos == len(por_grupo)
+    assert por_grupo.is_monotonic_decreasing
+    assert por_grupo.sum() == pytest.approx(total)
+    assert por_sprint.sum() == pytest.approx(total)
+    assert set(por_sprint.index) == set(estado['doacoes']['SPRINT'].dropna().astype(str))
+
+
+def test_ranking_tem_todos_os_participantes_em_ordem(estado):
+    ranking = estado['ranking']
+    assert list(ranking.columns) == ['Nome', 'Grupo', 'Total_Pontos', 'Total_Doacoes', 'Posição', 'Medalha']
+    assert len(ranking) == len(estado['participantes'])
+    assert ranking['Total_Pontos'].is_monotonic_decreasing
+    assert ranking['Posição'].iloc[0] == 1 and ranking['Posição'].is_monotonic_increasing
+    assert ranking['Total_Pontos'].sum() == pytest.approx(estado['doacoes']['Total_Geral'].sum())
+
+
+def test_metas_e_serie_diaria(estado):
+    doacoes, serie, progresso = estado['doacoes'], estado['serie'], estado['progresso']
+    assert list(estado['tabela_metas'].columns) == ['Grupo', 'SPRINT', 'Categoria', 'Tipo_Item', 'Quantidade',
+                                                    'Meta_Grupo']
+    assert pd.api.types.is_datetime64_any_dtype(serie['Dia'])
+    assert serie['Total_Geral'].sum() == pytest.approx(doacoes['Total_Geral'].sum())
+    assert list(progresso.columns) == ['Grupo', 'Categoria', 'Meta_Grupo', 'Quantidade', 'Percentual', 'Faltam',
+                                       'Ritmo', 'Dias_Para_Meta', 'Previsao']
+    assert set(progresso['Grupo']) <= set(estado['grupos'])
+    assert not progresso.duplicated(['Grupo', 'Categoria']).any()
+    assert (progresso['Faltam'] >= 0).all()
+    if estado['sintetica']:
+        assert len(progresso) == len(estado['grupos']) * estado['categorias']['Categoria'].nunique()
@@ -0,0 +1,78 @@
+import copy
+import shutil
+
+import openpyxl
+import pandas as pd
+
+from gincana_dados import FontePlanilha, IngestaoIncremental, carregar_planilha
+from tests.planilhas import PLANILHA_LOCAL
+
+# Colunas digitadas à mão; as outras são fórmulas do modelo
+COLUNAS_DIGITADAS = 8
+
+
+# Cópia da planilha já regravada pelo openpyxl, para que as edições do
+# teste (também pelo openpyxl) só acrescentem linhas ao XML da aba
+def _planilha_regravada(tmp_path):
+    caminho = tmp_path / 'planilha.xlsx'
+    shutil.copyfile(PLANILHA_LOCAL, caminho)
+    openpyxl.load_workbook(caminho).save(caminho)
+    return caminho
+
+
+# Copia valores e estilos das colunas digitadas da linha `origem` para `destino`
+def _copiar_doacao(aba, origem, destino):
+    for coluna in range(1, COLUNAS_DIGITADAS + 1):
+        celula = aba.cell(destino, coluna)
+        celula._style = copy.copy(aba.cell(origem, coluna)._style)
+        celula.value = aba.cell(origem, coluna).value
+
+
+def test_linhas_em_branco_do_modelo_nao_contam_como_novas(tmp_path):
+    caminho = _planilha_regravada(tmp_path)
+    ingestao = IngestaoIncremental(FontePlanilha(str(caminho)), str(tmp_path / 'snapshots'))
+    base = ingestao.atualizar()
+    linha_base = base.ingestao.linha_base
+
+    # Duas doações digitadas depois de duas linhas do modelo ainda vazias
+    pasta = openpyxl.load_workbook(caminho)
+    aba = pasta['doacoes_registros']
+    exemplo = next(linha for linha in range(linha_base, 1, -1) if aba.cell(linha, 3).value)
+    for destino in (linha_base + 3, linha_base + 4):
+        _copiar_doacao(aba, exemplo, destino)
+    pasta.save(caminho)
+
+    dados = ingestao.atualizar()
+    assert ingestao.estatisticas.cargas_incrementais == 1
+    assert ingestao.estatisticas.linhas_incrementais == 2
+    assert dados.ingestao.linha_base == linha_base + 4
+    assert dados.doacoes['Nome'].notna().sum() == base.doacoes['Nome'].notna().sum() + 2
+
+
+# Planilha salva pelo openpyxl, que grava as fórmulas sem valor calculado:
+# as doações digitadas só têm pontos se as fórmulas forem avaliadas
+def test_formulas_sem_valor_dao_os_mesmos_totais_nos_dois_caminhos(tmp_path):
+    caminho = _planilha_regravada(tmp_path)
+    pasta = openpyxl.load_workbook(caminho)
+    aba = pasta['doacoes_registros']
+    for linha in range(2, 40):
+        aba.cell(linha, 7).value = aba.cell(linha, 7).value or linha % 5 + 1
+        aba.cell(linha, 8).value = aba.cell(linha, 8).value or 10
+    pasta.save(caminho)
+
+    em_fluxo, read_excel = (
+        carregar_planilha(FontePlanilha(str(caminho)), str(tmp_path / f'snapshots-{fluxo}'), em_fluxo=fluxo)
+        for fluxo in (True, False)
+    )
+    assert 'leitura em fluxo' in em_fluxo.tempos_carga and 'leitura' in read_excel.tempos_carga
+    assert em_fluxo.doacoes['Pontos_Total'].sum() > 0
+    pd.testing.assert_frame_equal(em_fluxo.doacoes.reset_index(drop=True), read_excel.doacoes.reset_index(drop=True))
+    assert em_fluxo.relatorio_limpeza == read_excel.relatorio_limpeza
+    assert read_excel.relatorio_limpeza.formulas_avaliadas['Pontos_Total'] == len(read_excel.doacoes)
+    assert read_excel.ingestao is not None
+
+
+# Pasta salva pelo Excel (com os valores calculados): o pd.read_excel vale
+def test_formulas_com_valor_ficam_com_o_read_excel(tmp_path):
+    dados = carregar_planilha(FontePlanilha(PLANILHA_LOCAL), str(tmp_path), em_fluxo=False)
+    assert dados.relatorio_limpeza.total_convertidas == 0
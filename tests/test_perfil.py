@@ -0,0 +1,50 @@
+import json
+
+import pytest
+
+import gincana_perfil
+from gincana_perfil import Cronometro, exportar_jsonl
+
+
+# Relógio de mentira no lugar do perf_counter: só anda quando o teste manda
+class _Relogio:
+    def __init__(self):
+        self.agora = 100.0
+
+    def __call__(self):
+        return self.agora
+
+    def avancar(self, segundos):
+        self.agora += segundos
+
+
+def test_etapas_repetidas_e_aninhadas_somam_os_tempos(monkeypatch):
+    relogio = _Relogio()
+    monkeypatch.setattr(gincana_perfil.time, 'perf_counter', relogio)
+    cronometro = Cronometro()
+    for segundos in (0.001, 0.002, 0.004):
+        with cronometro.etapa('seção'):
+            relogio.avancar(0.010)
+            with cronometro.etapa('gráfico'):
+                relogio.avancar(segundos)
+    with cronometro.etapa('tabela'):
+        relogio.avancar(0.020)
+    relogio.avancar(0.5)
+
+    registro = cronometro.registro(secao='teste')
+    assert list(registro['etapas_ms']) == ['seção', 'seção › gráfico', 'tabela']
+    assert registro['etapas_ms'] == pytest.approx({'seção': 37.0, 'seção › gráfico': 7.0, 'tabela': 20.0})
+    assert registro['total_ms'] == pytest.approx(557.0)
+    assert registro['secao'] == 'teste'
+    # Só as etapas de primeiro nível contam para o que ficou de fora
+    assert cronometro.fora_das_etapas == pytest.approx(0.5)
+
+
+def test_cronometro_desligado_nao_mede(tmp_path):
+    cronometro = Cronometro(ativo=False)
+    with cronometro.etapa('gráfico'):
+        pass
+    caminho = tmp_path / 'perfil.jsonl'
+    exportar_jsonl(cronometro.registro(secao='teste'), str(caminho))
+    registro = json.loads(caminho.read_text(encoding='utf-8'))
+    assert registro['secao'] == 'teste' and registro['etapas_ms'] == {}
@@ -0,0 +1,70 @@
+import datetime
+
+import openpyxl
+import pandas as pd
+import pytest
+
+from gincana_xlsx import PastaXlsx, delimitar, ler_textos, montar_bloco, nomes_colunas
+from tests.planilhas import PLANILHA_LOCAL
+
+# Colunas com os casos de inferência de tipo que o pd.read_excel resolve:
+# vazios, textos de ausência, textos numéricos, booleanos e misturas
+COLUNAS_DE_BORDA = {
+    'inteiros': [1, None, 3, 4],
+    'decimais': [1.5, 2, None, -3],
+    'texto': ['a', None, 'b', 'c'],
+    'texto numérico': ['001', '2', None, '-3.5'],
+    'misto': ['a', 1, None, 2.5],
+    'ausentes': ['NA', 'x', 'null', 'N/A'],
+    'ausentes e números': ['NA', 1, 2, None],
+    'datas': [datetime.datetime(2025, 10, 14), None, datetime.datetime(2025, 11, 1), None],
+    'booleanos': [True, False, True, False],
+    'booleanos e vazios': [True, None, False, True],
+    'vazia': [None, None, None, None],
+    'repetida': [1, 2, 3, 4],
+}
+
+
+# Linhas (cabeçalho e dados) da primeira aba de um xlsx, como a ingestão lê
+def _linhas(caminho, aba):
+    with open(caminho, 'rb') as arquivo:
+        pasta = PastaXlsx(arquivo.read())
+    xml_textos = pasta.xml_textos()
+    limites = delimitar(xml_textos, b'sst') if xml_textos else None
+    textos = ler_textos(xml_textos[slice(*limites)]) if limites else []
+    return [linha for trecho in pasta.iterar_trechos(aba) for linha in pasta.ler_linhas(trecho, textos)]
+
+
+def _comparar_com_read_excel(caminho, aba):
+    linhas = _linhas(caminho, aba)
+    colunas = nomes_colunas(linhas[0][1])
+    bloco = montar_bloco(linhas[1:], 2, colunas)
+    esperado = pd.read_excel(caminho, sheet_name=aba)
+    pd.testing.assert_frame_equal(bloco.reset_index(drop=True), esperado)
+
+
+@pytest.mark.parametrize('aba', ['participantes', 'categorias', 'doacoes_registros'])
+def test_planilha_do_repositorio_igual_ao_read_excel(aba):
+    _comparar_com_read_excel(PLANILHA_LOCAL, aba)
+
+
+def test_tipos_de_borda_iguais_ao_read_excel(tmp_path):
+    caminho = tmp_path / 'bordas.xlsx'
+    pasta = openpyxl.Workbook()
+    aba = pasta.active
+    aba.title = 'bordas'
+    # Cabeçalho com nomes repetidos (um já com sufixo) e uma coluna sem nome
+    cabecalho = list(COLUNAS_DE_BORDA)[:-1] + ['inteiros', 'inteiros.1', None, 'inteiros']
+    aba.append(cabecalho)
+    valores = list(COLUNAS_DE_BORDA.values())
+    for linha in range(4):
+        aba.append([coluna[linha] for coluna in valores] + [linha, linha * 2, linha * 3])
+    pasta.save(caminho)
+
+    _comparar_com_read_excel(caminho, 'bordas')
+
+
+def test_nomes_de_colunas_como_o_pandas():
+    assert nomes_colunas({1: 'a', 2: 'a', 3: 'a.1', 4: 'a'}) == ['a', 'a.2', 'a.1', 'a.3']
+    assert nomes_colunas({1: 'x', 3: 'y'}) == ['x', 'Unnamed: 1', 'y']
+    assert nomes_colunas({}) == []